@@ -1,46 +1,157 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_file, send_from_directory
 from flask_cors import CORS
 import json
 import os
-import hashlib
+import base64
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from database import db
-
-app = Flask(__name__)
+from app_logging import get_logger, truncate
+from tts_service import TTSService, TTSQueueFull, audio_filename
+from audio_cache import AudioCache
+from blob_store import BlobStore, UploadTooLarge, stream_to_temp
+from care_plan_text import CarePlanTextIndexer
+from asset_pipeline import AssetPipeline
+from image_derivatives import AUTO_FORMAT, ImageDerivativeCache, ImageSupportUnavailable, parse_derivative_args
+from werkzeug.test import EnvironBuilder
+from werkzeug.utils import safe_join
+
+app = Flask(__name__, static_folder=None)  # /static is served by the asset pipeline below
 CORS(app)
 
+logger = get_logger('backend')
+
 # Audio cache directory
-AUDIO_CACHE_DIR = 'audio_cache'
+AUDIO_CACHE_DIR = os.environ.get('K9_AUDIO_CACHE_DIR', 'audio_cache')
 if not os.path.exists(AUDIO_CACHE_DIR):
     os.makedirs(AUDIO_CACHE_DIR)
 
+# Audio cache limits - least recently used clips are evicted beyond these
+AUDIO_CACHE_MAX_BYTES = int(os.environ.get('K9_AUDIO_CACHE_MAX_MB', 500)) * 1024 * 1024
+AUDIO_CACHE_MAX_AGE = float(os.environ.get('K9_AUDIO_CACHE_MAX_AGE_DAYS', 30)) * 24 * 3600
+
+MAX_AUDIO_CACHE_PAGE_SIZE = 1000
+MAX_AUDIO_EXISTS_BATCH = 1000
+
+# Background TTS generation (backend chosen by $K9_TTS_BACKEND)
+tts_service = TTSService(AUDIO_CACHE_DIR, workers=int(os.environ.get('K9_TTS_WORKERS', 4)),
+                         cache=AudioCache(AUDIO_CACHE_DIR, max_bytes=AUDIO_CACHE_MAX_BYTES,
+                                          max_age=AUDIO_CACHE_MAX_AGE))
+TTS_FILE_TIMEOUT = 120  # seconds /api/tts/speak/file waits before answering with a job id
+
 def initialize_database():
     """Initialize database"""
     try:
         # Check if database is empty
         users = db.get_all_users()
         if not users:
-            print("⚠️ Database is empty - no data available")
+            logger.warning("⚠️ Database is empty - no data available")
         else:
-            print("✅ Database initialized with existing data")
+            logger.info("✅ Database initialized with existing data")
     except Exception as e:
-        print(f"❌ Error initializing database: {e}")
+        logger.error("❌ Error initializing database: %s", e)
         raise
 
 # =============================================================================
 # STATIC FILE ROUTES
 # =============================================================================
 
+# Front-end assets: fingerprinted, precompressed and long-cached
+static_assets = AssetPipeline('.', os.environ.get('K9_ASSET_BUILD_DIR', 'asset_build'))
+static_assets.start()
+STATIC_ASSET_MAX_AGE = 31536000  # 1 year, only for fingerprinted URLs
+
+def send_asset(entry, immutable=False):
+    """Send an asset entry, picking the precompressed variant the client accepts"""
+    encoding = None
+    for candidate in ('br', 'gzip'):
+        if candidate in entry['variants'] and request.accept_encodings[candidate]:
+            encoding = candidate
+            break
+    
+    path = entry['variants'][encoding] if encoding else entry['path']
+    etag = f"{entry['fingerprint']}-{encoding}" if encoding else entry['fingerprint']
+    response = send_file(path, mimetype=entry['mimetype'], etag=etag, conditional=True,
+                         max_age=STATIC_ASSET_MAX_AGE if immutable else None)
+    if encoding and response.status_code != 304:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    else:
+        # Unversioned URLs are revalidated every time, usually answered with a 304
+        response.cache_control.no_cache = True
+    return response
+
+def serve_asset(requested, not_found_error):
+    """Serve a managed asset by its plain or fingerprinted path"""
+    logical, fingerprint = static_assets.resolve(requested)
+    entry = static_assets.get(logical) if logical else None
+    if entry is None:
+        return jsonify({'error': not_found_error}), 404
+    # A stale fingerprint gets the current file, but must not be cached under that URL
+    return send_asset(entry, immutable=fingerprint == entry['fingerprint'])
+
+def serve_page(filename):
+    """Serve an HTML page that references the fingerprinted assets"""
+    entry = static_assets.page(filename)
+    if entry is None:
+        return send_from_directory('.', filename)
+    return send_asset(entry)
+
+# Resized / re-encoded copies of photos and signatures, e.g. /images/x.jpg?w=480&fmt=webp
+IMAGE_CACHE_DIR = os.environ.get('K9_IMAGE_CACHE_DIR', 'image_cache')
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get('K9_IMAGE_CACHE_MAX_MB', 200)) * 1024 * 1024
+image_derivatives = ImageDerivativeCache(IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_BYTES)
+
+def image_derivative_response(source_path, fingerprint=None):
+    """Send a resized copy of an image if ?w= or ?fmt= ask for one, else return None.
+
+    The URL is cached for a year when fingerprint (from the URL or the content
+    addressed filename) matches the source hash. Raises ValueError for bad
+    parameters.
+    """
+    options = parse_derivative_args(request.args)
+    if options is None or source_path is None or not os.path.isfile(source_path):
+        return None
+    
+    negotiated = options['fmt'] == AUTO_FORMAT
+    if negotiated:
+        # Only an explicit image/webp counts - */* is sent by clients that cannot decode it
+        accepted = {mimetype for mimetype, quality in request.accept_mimetypes if quality > 0}
+        options['fmt'] = 'webp' if 'image/webp' in accepted else None
+    
+    try:
+        derivative = image_derivatives.get(source_path, options['width'], options['fmt'])
+    except ImageSupportUnavailable as e:
+        logger.warning("⚠️ Serving original image: %s", e)
+        return None
+    
+    immutable = bool(fingerprint) and derivative['source_hash'].startswith(fingerprint)
+    response = send_file(derivative['path'], mimetype=derivative['mimetype'],
+                         etag=derivative['filename'], conditional=True,
+                         max_age=STATIC_ASSET_MAX_AGE if immutable else None)
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    if negotiated:
+        response.vary.add('Accept')
+    return response
+
 @app.route('/')
 def index():
     """Serve main web app"""
-    return send_from_directory('.', 'index.html')
+    return serve_page('index.html')
 
 # Root level HTML files
 @app.route('/index.html')
 def web_app():
     """Serve web app"""
-    return send_from_directory('.', 'index.html')
+    return serve_page('index.html')
 
 @app.route('/dashboard_complete.html')
 def dashboard_complete():
@@ -90,28 +201,43 @@ def templates_index():
 
 # Static files
 @app.route('/style.css')
-def serve_css():
+@app.route('/style.<fingerprint>.css')
+def serve_css(fingerprint=None):
     """Serve CSS file"""
-    return send_from_directory('.', 'style.css')
+    return serve_asset(request.path, 'CSS file not found')
 
 @app.route('/script.js')
-def serve_js():
+@app.route('/script.<fingerprint>.js')
+def serve_js(fingerprint=None):
     """Serve JavaScript file"""
-    return send_from_directory('.', 'script.js')
+    return serve_asset(request.path, 'JavaScript file not found')
 
 @app.route('/journal_db_manager.js')
-def serve_journal_db_manager():
+@app.route('/journal_db_manager.<fingerprint>.js')
+def serve_journal_db_manager(fingerprint=None):
     """Serve Journal Database Manager JavaScript file"""
-    return send_from_directory('.', 'journal_db_manager.js')
+    return serve_asset(request.path, 'JavaScript file not found')
+
+# Uploaded signature images, named by content hash
+SIGNATURES_DIR = os.environ.get('K9_SIGNATURES_DIR', 'signatures')
 
 @app.route('/signatures/<filename>')
 def serve_signature(filename):
-    """Serve signature images"""
+    """Serve signature images, resized when ?w= or ?fmt= is given"""
     try:
-        return send_from_directory('signatures', filename)
+        # Uploaded signatures are named by their SHA-256
+        response = image_derivative_response(safe_join(SIGNATURES_DIR, filename), os.path.splitext(filename)[0])
+        if response is not None:
+            return response
+        return send_from_directory(SIGNATURES_DIR, filename)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except FileNotFoundError:
         return jsonify({"error": "Signature file not found"}), 404
 
+signature_uploads = BlobStore(SIGNATURES_DIR, '/signatures/')
+MAX_SIGNATURE_SIZE = 5 * 1024 * 1024  # 5MB
+
 @app.route('/api/upload-signature', methods=['POST'])
 def upload_signature():
     """Upload signature image"""
@@ -128,46 +254,67 @@ def upload_signature():
         if not file.filename.lower().endswith(('.png', '.jpg', '.jpeg')):
             return jsonify({"success": False, "error": "Invalid file type. Only PNG, JPG, JPEG allowed"}), 400
         
-        # Generate unique filename
-        import uuid
-        import os
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4().hex}{file_extension}"
-        
-        # Save file to signatures directory
-        file_path = os.path.join('signatures', unique_filename)
-        file.save(file_path)
+        # Stream into the signatures directory under the content's SHA-256, so
+        # uploading the same image again reuses the stored file
+        file_extension = os.path.splitext(file.filename)[1].lower()
+        filename, _ = signature_uploads.put_stream(file.stream, file_extension, MAX_SIGNATURE_SIZE)
         
         return jsonify({
             "success": True,
-            "filename": unique_filename,
+            "filename": filename,
             "message": "Signature uploaded successfully"
         })
         
+    except UploadTooLarge as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/static/<path:filename>')
 def serve_static(filename):
     """Serve static files from static directory"""
-    try:
-        return send_from_directory('static', filename)
-    except:
-        return jsonify({'error': 'Static file not found'}), 404
+    return serve_asset(f'static/{filename}', 'Static file not found')
 
 @app.route('/images/<path:filename>')
 def serve_images(filename):
-    """Serve image files"""
+    """Serve image files, resized when ?w= or ?fmt= is given"""
+    logical, fingerprint = static_assets.resolve(f'images/{filename}')
     try:
-        return send_from_directory('images', filename)
-    except:
-        return jsonify({'error': 'Image not found'}), 404
+        response = image_derivative_response(static_assets.source_path(logical) if logical else None, fingerprint)
+        if response is not None:
+            return response
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return serve_asset(f'images/{filename}', 'Image not found')
 
 @app.route('/signatures/<path:filename>')
 def serve_signatures(filename):
     """Serve signature files"""
     try:
-        return send_from_directory('signatures', filename)
+        response = image_derivative_response(safe_join(SIGNATURES_DIR, filename), os.path.splitext(os.path.basename(filename))[0])
+        if response is not None:
+            return response
+        return send_from_directory(SIGNATURES_DIR, filename)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except:
+        return jsonify({'error': 'Signature file not found'}), 404
+
+@app.route('/signature-blobs/<filename>')
+def serve_signature_blob(filename):
+    """Serve content-addressed signature images extracted from journals"""
+    try:
+        derivative = image_derivative_response(safe_join(db.signature_store.root_dir, filename),
+                                               os.path.splitext(filename)[0])
+        if derivative is not None:
+            return derivative
+        response = send_from_directory(db.signature_store.root_dir, filename, max_age=31536000)
+        # Blob names are content hashes, so a given URL never changes
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except:
         return jsonify({'error': 'Signature file not found'}), 404
 
@@ -175,10 +322,18 @@ def serve_signatures(filename):
 def serve_care_plans(filename):
     """Serve care plan PDF files"""
     try:
-        return send_from_directory('care-plans', filename)
+        return send_from_directory(db.care_plans_dir, filename)
     except:
         return jsonify({'error': 'Care plan file not found'}), 404
 
+MAX_CARE_PLAN_PAGE_SIZE = 100
+MAX_CARE_PLAN_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_CARE_PLAN_SEARCH_RESULTS = 100
+
+# Extracts care plan text into the search index; picks up anything not yet indexed
+care_plan_text_indexer = CarePlanTextIndexer(db)
+care_plan_text_indexer.enqueue_pending()
+
 @app.route('/api/upload-care-plan', methods=['POST'])
 def upload_care_plan():
     """Upload care plan PDF file - Admin only"""
@@ -203,129 +358,120 @@ def upload_care_plan():
         if not file.filename.lower().endswith('.pdf'):
             return jsonify({"success": False, "error": "Invalid file type. Only PDF files allowed"}), 400
         
-        # Validate file size (max 10MB)
-        file.seek(0, 2)  # Seek to end
-        file_size = file.tell()
-        file.seek(0)  # Reset to beginning
-        
-        if file_size > 10 * 1024 * 1024:  # 10MB
-            return jsonify({"success": False, "error": "File too large. Maximum size is 10MB"}), 400
-        
         # Create care-plans directory if it doesn't exist
-        import os
-        care_plans_dir = 'care-plans'
+        care_plans_dir = db.care_plans_dir
         if not os.path.exists(care_plans_dir):
             os.makedirs(care_plans_dir)
         
-        # Use original filename, but handle duplicates
-        original_filename = file.filename
-        file_path = os.path.join(care_plans_dir, original_filename)
-        
-        # If file already exists, add a number suffix
-        counter = 1
-        base_name, extension = os.path.splitext(original_filename)
-        while os.path.exists(file_path):
-            new_filename = f"{base_name}_{counter}{extension}"
-            file_path = os.path.join(care_plans_dir, new_filename)
-            counter += 1
+        # Stream to a temp file in chunks, hashing and enforcing the size limit (max 10MB) as we go
+        tmp_path, sha256, file_size = stream_to_temp(file.stream, care_plans_dir, MAX_CARE_PLAN_SIZE)
         
-        # Get the final filename (in case it was modified due to duplicates)
-        final_filename = os.path.basename(file_path)
-        
-        # Save file to care-plans directory
-        file.save(file_path)
-        
-        # Store metadata about the file
-        metadata_file = os.path.join(care_plans_dir, 'metadata.json')
-        metadata = {}
-        
-        # Load existing metadata if it exists
-        if os.path.exists(metadata_file):
-            try:
-                import json
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-            except:
-                metadata = {}
-        
-        # Add new file metadata
-        metadata[final_filename] = {
-            "original_name": file.filename,
-            "upload_date": datetime.now().isoformat(),
-            "size": file_size
-        }
-        
-        # Save updated metadata
         try:
-            import json
-            with open(metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Warning: Could not save metadata: {e}")
+            # Reserve a unique filename (original name, with a number suffix on clashes),
+            # or get the existing care plan back if this exact document is already stored
+            care_plan = db.create_care_plan(file.filename, file_size, sha256)
+            final_filename = care_plan['filename']
+            
+            if not care_plan['duplicate']:
+                # Publish atomically - the PDF appears complete or not at all
+                try:
+                    os.replace(tmp_path, os.path.join(care_plans_dir, final_filename))
+                except Exception:
+                    db.delete_care_plan(final_filename)
+                    raise
+                
+                # Extract the text for search in the background
+                care_plan_text_indexer.enqueue(care_plan)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
         
         return jsonify({
             "success": True,
             "filename": final_filename,
-            "original_name": file.filename,
+            "original_name": care_plan['original_name'],
             "size": file_size,
-            "message": "Care plan uploaded successfully"
+            "duplicate": care_plan['duplicate'],
+            "message": "Care plan already uploaded" if care_plan['duplicate'] else "Care plan uploaded successfully"
         })
         
+    except UploadTooLarge as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/care-plans', methods=['GET'])
 def get_care_plans():
-    """Get list of uploaded care plan files"""
+    """Get uploaded care plan files, newest first (?limit=&cursor= to page)"""
     try:
-        import os
-        care_plans_dir = 'care-plans'
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor') or None
         
-        if not os.path.exists(care_plans_dir):
-            return jsonify({
-                "success": True,
-                "data": [],
-                "total": 0
-            })
+        if limit is not None and (limit < 1 or limit > MAX_CARE_PLAN_PAGE_SIZE):
+            raise ValueError(f"limit must be between 1 and {MAX_CARE_PLAN_PAGE_SIZE}")
         
-        files = []
-        metadata_file = os.path.join(care_plans_dir, 'metadata.json')
-        metadata = {}
+        care_plans = db.get_care_plans(limit=limit + 1 if limit is not None else None, cursor=cursor)
         
-        # Load metadata if it exists
-        if os.path.exists(metadata_file):
-            try:
-                import json
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-            except:
-                metadata = {}
-        
-        for filename in os.listdir(care_plans_dir):
-            if filename.lower().endswith('.pdf') and filename != 'metadata.json':
-                file_path = os.path.join(care_plans_dir, filename)
-                file_stat = os.stat(file_path)
-                
-                # Get original name from metadata, fallback to filename
-                original_name = metadata.get(filename, {}).get('original_name', filename)
-                
-                files.append({
-                    "filename": filename,
-                    "original_name": original_name,
-                    "size": file_stat.st_size,
-                    "upload_date": metadata.get(filename, {}).get('upload_date', datetime.fromtimestamp(file_stat.st_ctime).isoformat()),
-                    "modified_date": datetime.fromtimestamp(file_stat.st_mtime).isoformat()
-                })
+        next_cursor = None
+        if limit is not None and len(care_plans) > limit:
+            care_plans = care_plans[:limit]
+            next_cursor = db.encode_care_plan_cursor(care_plans[-1])
         
-        # Sort by upload date (newest first)
-        files.sort(key=lambda x: x['upload_date'], reverse=True)
+        files = [{
+            "filename": care_plan['filename'],
+            "original_name": care_plan['original_name'],
+            "size": care_plan['size'],
+            "upload_date": care_plan['upload_date'],
+            # Files are never modified after upload
+            "modified_date": care_plan['upload_date']
+        } for care_plan in care_plans]
         
         return jsonify({
             "success": True,
             "data": files,
-            "total": len(files)
+            "total": len(files),
+            "next_cursor": next_cursor
         })
         
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/care-plans/search', methods=['GET'])
+def search_care_plans():
+    """Search the text of care plans (?q=&limit=); returns matching pages"""
+    try:
+        query = request.args.get('q', '')
+        limit = request.args.get('limit', 20, type=int)
+        
+        if limit is None or limit < 1 or limit > MAX_CARE_PLAN_SEARCH_RESULTS:
+            raise ValueError(f"limit must be between 1 and {MAX_CARE_PLAN_SEARCH_RESULTS}")
+        
+        hits = db.search_care_plans(query, limit=limit)
+        return jsonify({"success": True, "data": hits, "total": len(hits)})
+        
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/care-plans/<filename>/text', methods=['GET'])
+def get_care_plan_text(filename):
+    """Get the server-side extracted text of a care plan, page by page"""
+    try:
+        care_plan = db.get_care_plan(filename)
+        if not care_plan:
+            return jsonify({"success": False, "error": "Care plan not found"}), 404
+        
+        pages = db.get_care_plan_pages(filename)
+        if pages is None:
+            # Not extracted (yet) - text_status says whether it is pending or failed
+            return jsonify({"success": False, "error": "Care plan text not available",
+                            "text_status": care_plan['text_status']}), 409
+        
+        return jsonify({"success": True, "data": pages, "page_count": care_plan['page_count']})
+        
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -340,36 +486,17 @@ def delete_care_plan(filename):
         if user_role not in ['ADMIN']:
             return jsonify({"success": False, "error": "Chỉ Admin mới có quyền xóa tài liệu"}), 403
         
-        import os
-        care_plans_dir = 'care-plans'
-        file_path = os.path.join(care_plans_dir, filename)
-        
-        if not os.path.exists(file_path):
-            return jsonify({"success": False, "error": "File not found"}), 404
-        
         # Validate filename to prevent directory traversal
         if '..' in filename or '/' in filename or '\\' in filename:
             return jsonify({"success": False, "error": "Invalid filename"}), 400
         
-        os.remove(file_path)
+        file_path = os.path.join(db.care_plans_dir, filename)
         
-        # Remove metadata for this file
-        metadata_file = os.path.join(care_plans_dir, 'metadata.json')
-        if os.path.exists(metadata_file):
-            try:
-                import json
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                # Remove the file entry from metadata
-                if filename in metadata:
-                    del metadata[filename]
-                
-                # Save updated metadata
-                with open(metadata_file, 'w', encoding='utf-8') as f:
-                    json.dump(metadata, f, ensure_ascii=False, indent=2)
-            except Exception as e:
-                print(f"Warning: Could not update metadata: {e}")
+        if not db.delete_care_plan(filename) and not os.path.exists(file_path):
+            return jsonify({"success": False, "error": "File not found"}), 404
+        
+        if os.path.exists(file_path):
+            os.remove(file_path)
         
         return jsonify({
             "success": True,
@@ -387,12 +514,14 @@ def delete_care_plan(filename):
 def get_users():
     """Get all users"""
     try:
-        users = db.get_all_users()
+        users = db.get_all_users(fields=request.args.get('fields'))
         return jsonify({
             "success": True,
             "data": users,
             "total": len(users)
         })
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -458,12 +587,14 @@ def delete_user(user_id):
 def get_dogs():
     """Get all dogs"""
     try:
-        dogs = db.get_all_dogs()
+        dogs = db.get_all_dogs(fields=request.args.get('fields'))
         return jsonify({
             "success": True,
             "data": dogs,
             "total": len(dogs)
         })
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -581,13 +712,10 @@ def validate_session():
         if not session_token:
             return jsonify({"success": False, "error": "Missing session token"}), 400
         
+        # Session data already includes the user's assignedDogs
         session_data = db.validate_session(session_token)
         
         if session_data:
-            # Get assigned dogs for the user
-            assigned_dog_names = db.get_user_assigned_dog_names(session_data['user_id'])
-            session_data['assignedDogs'] = assigned_dog_names
-            
             return jsonify({"success": True, "data": session_data})
         else:
             return jsonify({"success": False, "error": "Invalid or expired session"}), 401
@@ -612,130 +740,150 @@ def logout():
 
 @app.route('/api/stats/dashboard', methods=['GET'])
 def get_dashboard_stats():
-    """Get dashboard statistics"""
+    """Get dashboard statistics (?fresh=1 recomputes them from the source tables)"""
     try:
-        stats = db.get_dashboard_stats()
+        fresh = request.args.get('fresh', '').lower() in ('1', 'true', 'yes')
+        stats = db.get_dashboard_stats(fresh=fresh)
         return jsonify({"success": True, "data": stats})
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/stats/db-pool', methods=['GET'])
+def get_db_pool_stats():
+    """Get database connection pool statistics"""
+    try:
+        stats = db.get_pool_stats()
+        return jsonify({"success": True, "data": stats})
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 
 # =============================================================================
 # TRAINING JOURNAL API ROUTES
 # =============================================================================
 
+# Largest page a client may request from the journal listing endpoints
+MAX_JOURNAL_PAGE_SIZE = 500
+
+def paginate_journals(fetch, default_limit=None):
+    """Fetch one page of journals using the request's ?limit= and ?cursor= args.
+    
+    `fetch` is a DatabaseManager journal listing method taking limit/cursor/fields.
+    One extra row is requested to tell whether another page follows; if so,
+    next_cursor points after the last returned journal, otherwise it is None.
+    """
+    limit = request.args.get('limit', default_limit, type=int)
+    cursor = request.args.get('cursor') or None
+    
+    if limit is not None and (limit < 1 or limit > MAX_JOURNAL_PAGE_SIZE):
+        raise ValueError(f"limit must be between 1 and {MAX_JOURNAL_PAGE_SIZE}")
+    
+    journals = fetch(limit=limit + 1 if limit is not None else None, cursor=cursor,
+                     fields=request.args.get('fields'))
+    
+    next_cursor = None
+    if limit is not None and len(journals) > limit:
+        journals = journals[:limit]
+        next_cursor = db.encode_journal_cursor(journals[-1])
+    
+    return journals, next_cursor
+
+def journal_page_response(journals, next_cursor):
+    """Build the JSON response for a page of journals"""
+    return jsonify({
+        "success": True,
+        "data": journals,
+        "total": len(journals),
+        "next_cursor": next_cursor
+    })
+
 @app.route('/api/journals', methods=['GET'])
 def get_training_journals():
     """Get all training journals"""
     try:
-        limit = request.args.get('limit', 100, type=int)
         dog_id = request.args.get('dog_id', type=int)
         
         if dog_id:
-            journals = db.get_training_journals_by_dog(dog_id, limit)
+            fetch = lambda **page: db.get_training_journals_by_dog(dog_id, **page)
         else:
-            journals = db.get_all_training_journals(limit)
+            fetch = db.get_all_training_journals
         
-        return jsonify({
-            "success": True,
-            "data": journals,
-            "total": len(journals)
-        })
+        journals, next_cursor = paginate_journals(fetch, default_limit=100)
+        return journal_page_response(journals, next_cursor)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+MAX_SYNC_PAGE_SIZE = 1000
+
+@app.route('/api/sync', methods=['GET'])
+def sync_changes():
+    """Get users, dogs and journals changed since a sync cursor, with tombstones for deletes.
+    ?tables=dogs,users limits the sync to those tables"""
+    try:
+        limit = request.args.get('limit', default=500, type=int)
+        if limit < 1 or limit > MAX_SYNC_PAGE_SIZE:
+            return jsonify({"success": False, "error": f"limit must be between 1 and {MAX_SYNC_PAGE_SIZE}"}), 400
+        
+        tables = request.args.get('tables')
+        if tables is not None:
+            tables = [table.strip() for table in tables.split(',') if table.strip()]
+        
+        result = db.get_changes(since=request.args.get('since'), limit=limit, tables=tables)
+        return jsonify({"success": True, **result})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/test', methods=['GET'])
 def test_endpoint():
     """Test endpoint to verify logging works"""
-    print("TEST ENDPOINT CALLED!")
+    logger.info("Test endpoint called")
     return jsonify({"success": True, "message": "Test endpoint working"})
 
 @app.route('/api/journals', methods=['POST'])
 def create_training_journal():
     """Create training journal entry"""
-    # Log to file for debugging with UTF-8 encoding
-    with open('debug.log', 'a', encoding='utf-8') as f:
-        f.write("=" * 50 + "\n")
-        f.write("JOURNAL CREATION REQUEST RECEIVED!\n")
-        f.write("=" * 50 + "\n")
-        f.flush()
-    
-    print("=" * 50)
-    print("JOURNAL CREATION REQUEST RECEIVED!")
-    print("=" * 50)
-    import sys
-    sys.stdout.flush()
-    
     try:
         data = request.get_json()
-        
-        # Log to file
-        with open('debug.log', 'a', encoding='utf-8') as f:
-            f.write(f"Received journal data: {data}\n")
-            f.flush()
-        
-        print(f"Received journal data: {data}")
+        logger.debug("Received journal data: %s", truncate(data))
         
         required_fields = ['dog_id', 'trainer_id', 'journal_date']
         for field in required_fields:
             if field not in data:
-                error_msg = f"Missing required field: {field}"
-                with open('debug.log', 'a', encoding='utf-8') as f:
-                    f.write(error_msg + "\n")
-                    f.flush()
-                print(error_msg)
+                logger.warning("Journal creation rejected - missing field: %s", field)
                 return jsonify({"success": False, "error": f"Missing field: {field}"}), 400
         
-        success_msg = "All required fields present"
-        with open('debug.log', 'a', encoding='utf-8') as f:
-            f.write(success_msg + "\n")
-            f.flush()
-        print(success_msg)
-        
         journal = db.create_training_journal(data)
         
-        db_result_msg = f"Database returned: {journal}"
-        with open('debug.log', 'a', encoding='utf-8') as f:
-            f.write(db_result_msg + "\n")
-            f.flush()
-        print(db_result_msg)
-        
         if journal is None:
-            error_msg = "Database function returned None!"
-            with open('debug.log', 'a', encoding='utf-8') as f:
-                f.write(error_msg + "\n")
-                f.flush()
-            print(error_msg)
+            logger.error("Journal creation returned no data for dog %s on %s",
+                         data.get('dog_id'), data.get('journal_date'))
             return jsonify({"success": False, "error": "Database operation failed - no data returned"}), 500
         
-        response = {"success": True, "data": journal}
-        response_msg = f"Sending response: {response}"
-        with open('debug.log', 'a', encoding='utf-8') as f:
-            f.write(response_msg + "\n")
-            f.flush()
-        print(response_msg)
-        return jsonify(response)
+        logger.info("Created journal %s for dog %s on %s",
+                    journal['id'], journal.get('dog_id'), journal.get('journal_date'))
+        return jsonify({"success": True, "data": journal})
         
     except Exception as e:
-        error_msg = f"Exception in create_training_journal: {e}"
-        with open('debug.log', 'a', encoding='utf-8') as f:
-            f.write(error_msg + "\n")
-            f.flush()
-        print(error_msg)
-        import traceback
-        traceback.print_exc()
+        logger.exception("Exception in create_training_journal: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/journals/<int:journal_id>', methods=['GET'])
 def get_training_journal(journal_id):
     """Get training journal by ID"""
     try:
-        journal = db.get_training_journal_by_id(journal_id)
+        journal = db.get_training_journal_by_id(journal_id, fields=request.args.get('fields'))
         if journal:
             return jsonify({"success": True, "data": journal})
         else:
             return jsonify({"success": False, "error": "Journal not found"}), 404
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -762,8 +910,9 @@ def approve_training_journal(journal_id):
         leader_signature = data.get('leader_signature')
         leader_signature_timestamp = data.get('leader_signature_timestamp')
         
-        print(f"🔍 Received approval data: approver_id={approver_id}, approved={approved}")
-        print(f"🔍 Signature data: leader_signature={leader_signature[:100] if leader_signature else None}..., timestamp={leader_signature_timestamp}")
+        logger.debug("🔍 Received approval data: approver_id=%s, approved=%s", approver_id, approved)
+        logger.debug("🔍 Signature data: leader_signature=%s, timestamp=%s",
+                     truncate(leader_signature, 100), leader_signature_timestamp)
         
         if not approver_id:
             return jsonify({"success": False, "error": "Approver ID is required"}), 400
@@ -791,12 +940,11 @@ def delete_training_journal(journal_id):
 def get_journals_by_dog(dog_id):
     """Get all journals for a specific dog"""
     try:
-        journals = db.get_training_journals_by_dog(dog_id)
-        return jsonify({
-            "success": True,
-            "data": journals,
-            "total": len(journals)
-        })
+        journals, next_cursor = paginate_journals(
+            lambda **page: db.get_training_journals_by_dog(dog_id, **page), default_limit=50)
+        return journal_page_response(journals, next_cursor)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -804,19 +952,16 @@ def get_journals_by_dog(dog_id):
 def get_journals_by_dog_name(dog_name):
     """Get all journals for a specific dog by name"""
     try:
-        # First get the dog by name
-        dogs = db.get_all_dogs()
-        dog = next((d for d in dogs if d['name'] == dog_name), None)
+        dog = db.get_dog_by_name(dog_name)
         
         if not dog:
             return jsonify({"success": False, "error": "Dog not found"}), 404
         
-        journals = db.get_training_journals_by_dog(dog['id'])
-        return jsonify({
-            "success": True,
-            "data": journals,
-            "total": len(journals)
-        })
+        journals, next_cursor = paginate_journals(
+            lambda **page: db.get_training_journals_by_dog(dog['id'], **page), default_limit=50)
+        return journal_page_response(journals, next_cursor)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -824,17 +969,14 @@ def get_journals_by_dog_name(dog_name):
 def get_journal_by_dog_date(dog_name, journal_date):
     """Get a specific journal by dog name and date"""
     try:
-        # First get the dog by name
-        dogs = db.get_all_dogs()
-        dog = next((d for d in dogs if d['name'] == dog_name), None)
+        dog = db.get_dog_by_name(dog_name)
         
         if not dog:
             return jsonify({"success": False, "error": "Dog not found"}), 404
         
-        # Get all journals for this dog and find the one with matching date
+        # Get the journals for this dog on this date
         # Return the journal with the most complete data (most content)
-        journals = db.get_training_journals_by_dog(dog['id'])
-        matching_journals = [j for j in journals if j['journal_date'] == journal_date]
+        matching_journals = db.get_journals_by_dog_and_date(dog['id'], journal_date)
         
         if not matching_journals:
             return jsonify({"success": False, "error": "Journal not found"}), 404
@@ -881,12 +1023,10 @@ def get_journal_by_dog_date(dog_name, journal_date):
 def get_journals_by_trainer(trainer_id):
     """Get all journals for a specific trainer"""
     try:
-        journals = db.get_training_journals_by_trainer(trainer_id)
-        return jsonify({
-            "success": True,
-            "data": journals,
-            "total": len(journals)
-        })
+        journals, next_cursor = paginate_journals(lambda **page: db.get_training_journals_by_trainer(trainer_id, **page))
+        return journal_page_response(journals, next_cursor)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -894,12 +1034,10 @@ def get_journals_by_trainer(trainer_id):
 def get_pending_journals():
     """Get all journals pending approval"""
     try:
-        journals = db.get_pending_journals()
-        return jsonify({
-            "success": True,
-            "data": journals,
-            "total": len(journals)
-        })
+        journals, next_cursor = paginate_journals(db.get_pending_journals)
+        return journal_page_response(journals, next_cursor)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -907,46 +1045,72 @@ def get_pending_journals():
 def get_approved_journals():
     """Get all approved journals"""
     try:
-        journals = db.get_approved_journals()
-        return jsonify({
-            "success": True,
-            "data": journals,
-            "total": len(journals)
-        })
+        journals, next_cursor = paginate_journals(db.get_approved_journals)
+        return journal_page_response(journals, next_cursor)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+MAX_MIGRATION_CHUNK_SIZE = 5000
+
 @app.route('/api/journals/migrate-from-localstorage', methods=['POST'])
 def migrate_journals_from_localstorage():
     """Migrate journals from localStorage to database"""
     try:
         data = request.get_json()
         journals_data = data.get('journals', [])
+        try:
+            chunk_size = int(data.get('chunk_size', 500))
+        except (TypeError, ValueError):
+            chunk_size = None
+        if chunk_size is None or chunk_size < 1 or chunk_size > MAX_MIGRATION_CHUNK_SIZE:
+            return jsonify({"success": False, "error": f"chunk_size must be an integer between 1 and {MAX_MIGRATION_CHUNK_SIZE}"}), 400
         
-        migrated_count = 0
-        errors = []
+        started = time.perf_counter()
         
+        # Resolve dog and trainer names once for the whole batch
+        dog_ids = db.get_dog_id_map()
+        trainer_ids = db.get_user_id_map()
+        
+        errors = []
+        db_journals = []
+        source_keys = []
         for journal_data in journals_data:
             try:
                 # Convert localStorage journal format to database format
-                db_journal_data = convert_localstorage_to_db_format(journal_data)
-                journal = db.create_training_journal(db_journal_data)
-                migrated_count += 1
+                db_journals.append(convert_localstorage_to_db_format(journal_data, dog_ids, trainer_ids))
+                source_keys.append(journal_data.get('key', 'unknown'))
             except Exception as e:
                 errors.append(f"Failed to migrate journal {journal_data.get('key', 'unknown')}: {str(e)}")
         
+        result = db.bulk_create_training_journals(db_journals, chunk_size=chunk_size)
+        for index, error in result['errors']:
+            errors.append(f"Failed to migrate journal {source_keys[index]}: {error}")
+        
+        elapsed = time.perf_counter() - started
+        migrated_count = result['inserted']
+        
         return jsonify({
             "success": True,
             "migrated_count": migrated_count,
             "total_journals": len(journals_data),
-            "errors": errors
+            "errors": errors,
+            "duration_ms": round(elapsed * 1000, 2),
+            "rows_per_second": round(migrated_count / elapsed, 1) if elapsed > 0 else None
         })
         
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
-def convert_localstorage_to_db_format(localstorage_data):
-    """Convert localStorage journal format to database format"""
+def convert_localstorage_to_db_format(localstorage_data, dog_ids=None, trainer_ids=None):
+    """Convert localStorage journal format to database format
+    
+    dog_ids / trainer_ids map names to IDs; pass them when converting many
+    journals so the lookup tables are only loaded once.
+    """
     general_info = localstorage_data.get('generalInfo', {})
     approval = localstorage_data.get('approval', {})
     
@@ -955,21 +1119,13 @@ def convert_localstorage_to_db_format(localstorage_data):
     trainer_name = general_info.get('hlv', '')
     
     # Find dog and trainer IDs from database
-    dogs = db.get_all_dogs()
-    users = db.get_all_users()
-    
-    dog_id = None
-    trainer_id = None
-    
-    for dog in dogs:
-        if dog['name'] == dog_name:
-            dog_id = dog['id']
-            break
+    if dog_ids is None:
+        dog_ids = db.get_dog_id_map()
+    if trainer_ids is None:
+        trainer_ids = db.get_user_id_map()
     
-    for user in users:
-        if user['name'] == trainer_name:
-            trainer_id = user['id']
-            break
+    dog_id = dog_ids.get(dog_name)
+    trainer_id = trainer_ids.get(trainer_name)
     
     if not dog_id or not trainer_id:
         raise ValueError(f"Could not find dog '{dog_name}' or trainer '{trainer_name}' in database")
@@ -1099,7 +1255,7 @@ def update_migration_status():
         
         # For now, just log the status update
         # In a full implementation, this would be stored in database
-        print(f"Migration status updated: {component} = {status}")
+        logger.info("Migration status updated: %s = %s", component, status)
         
         return jsonify({"success": True, "message": "Status updated"})
     except Exception as e:
@@ -1111,7 +1267,7 @@ def update_migration_status():
 
 @app.route('/api/tts/speak', methods=['POST'])
 def text_to_speech():
-    """Convert text to speech using gTTS"""
+    """Convert text to speech using the configured TTS backend"""
     try:
         data = request.get_json()
         text = data.get('text', '').strip()
@@ -1120,41 +1276,50 @@ def text_to_speech():
         if not text:
             return jsonify({"success": False, "error": "No text provided"}), 400
         
-        # Import gTTS here to avoid import errors if not installed
-        try:
-            from gtts import gTTS
-            import tempfile
-            import base64
-            import io
-        except ImportError:
-            return jsonify({"success": False, "error": "gTTS not installed. Please install with: pip install gTTS"}), 500
-        
-        # Create gTTS object
-        tts = gTTS(text=text, lang=lang, slow=False)
-        
-        # Generate audio in memory
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
+        audio = tts_service.synthesize(text, lang)
         
         # Convert to base64 for JSON response
-        audio_base64 = base64.b64encode(audio_buffer.getvalue()).decode('utf-8')
+        audio_base64 = base64.b64encode(audio).decode('utf-8')
         
         return jsonify({
             "success": True,
             "audio": audio_base64,
             "text": text,
             "lang": lang,
-            "size": len(audio_buffer.getvalue())
+            "size": len(audio)
         })
         
     except Exception as e:
-        print(f"❌ TTS Error: {e}")
+        logger.error("❌ TTS Error: %s", e)
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/tts/speak/stream', methods=['GET', 'POST'])
+def text_to_speech_stream():
+    """Stream synthesized speech as audio/mpeg (GET ?text=&lang= works as an <audio> src)"""
+    try:
+        data = request.get_json(silent=True) or request.args
+        text = (data.get('text') or '').strip()
+        lang = data.get('lang') or 'vi'  # Default to Vietnamese
+        
+        if not text:
+            return jsonify({"success": False, "error": "No text provided"}), 400
+        
+        filename = audio_filename(text)
+        if tts_service.cache.lookup(filename):
+            return send_from_directory(AUDIO_CACHE_DIR, filename, as_attachment=False, mimetype='audio/mpeg')
+        
+        # No Content-Length, so the response goes out with chunked transfer encoding
+        response = Response(tts_service.stream(text, lang), mimetype='audio/mpeg')
+        response.headers['X-Audio-Filename'] = filename
+        return response
+        
+    except Exception as e:
+        logger.error("❌ TTS Stream Error: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/tts/speak/file', methods=['POST'])
 def text_to_speech_file():
-    """Convert text to speech and save as file"""
+    """Convert text to speech and save as file (synthesized by the TTS worker pool)"""
     try:
         data = request.get_json()
         text = data.get('text', '').strip()
@@ -1163,57 +1328,89 @@ def text_to_speech_file():
         if not text:
             return jsonify({"success": False, "error": "No text provided"}), 400
         
-        # Import gTTS here to avoid import errors if not installed
-        try:
-            from gtts import gTTS
-            import tempfile
-            import os
-        except ImportError:
-            return jsonify({"success": False, "error": "gTTS not installed. Please install with: pip install gTTS"}), 500
-        
-        # Create hash for filename based on content (UTF-8 safe, same as frontend)
-        cleaned_content = text.replace('\s+', ' ').strip()
-        content_hash = hashlib.md5(cleaned_content.encode('utf-8')).hexdigest()[:16]
-        audio_filename = f"{content_hash}.mp3"
-        audio_path = os.path.join(AUDIO_CACHE_DIR, audio_filename)
-        
-        # Check if audio already exists
-        if os.path.exists(audio_path):
-            file_size = os.path.getsize(audio_path)
-            return jsonify({
-                "success": True,
-                "filename": audio_filename,
-                "full_path": audio_path,
-                "text": text,
-                "lang": lang,
-                "size": file_size,
-                "cached": True
-            })
+        job = tts_service.submit([{"title": "", "content": text}], lang)
         
-        # Create gTTS object and save to file
-        tts = gTTS(text=text, lang=lang, slow=False)
-        tts.save(audio_path)
+        # Clients may poll /api/tts/jobs/<job_id> instead of waiting
+        if not data.get('wait', True) or not job.wait(TTS_FILE_TIMEOUT):
+            return jsonify({"success": True, "job_id": job.id, "status": job.to_dict()['status']}), 202
         
-        # Get file size
-        file_size = os.path.getsize(audio_path)
+        section = job.to_dict()['sections'][0]
+        if section['status'] == 'failed':
+            return jsonify({"success": False, "error": section['error']}), 500
         
         return jsonify({
             "success": True,
-            "filename": audio_filename,
-            "full_path": audio_path,
+            "filename": section['filename'],
+            "full_path": tts_service.audio_path(section['filename']),
             "text": text,
             "lang": lang,
-            "size": file_size,
-            "cached": False
+            "size": section['size'],
+            "cached": section['cached']
+        })
+        
+    except TTSQueueFull as e:
+        return jsonify({"success": False, "error": str(e)}), 503
+    except Exception as e:
+        logger.error("❌ TTS File Error: %s", e)
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/tts/speak/chunked', methods=['POST'])
+def text_to_speech_chunked():
+    """Synthesize long text sentence by sentence.
+    
+    mode=stitched (default) waits for all chunks and returns one mp3 like
+    /api/tts/speak/file; mode=playlist returns the ordered chunk files at once
+    so playback can start when the first chunk is ready (poll /api/tts/jobs/<job_id>).
+    """
+    try:
+        data = request.get_json()
+        text = data.get('text', '').strip()
+        lang = data.get('lang', 'vi')  # Default to Vietnamese
+        mode = data.get('mode', 'stitched')
+        
+        if not text:
+            return jsonify({"success": False, "error": "No text provided"}), 400
+        if mode not in ('stitched', 'playlist'):
+            return jsonify({"success": False, "error": "mode must be 'stitched' or 'playlist'"}), 400
+        
+        if mode == 'playlist':
+            job = tts_service.submit_playlist(text, lang)
+            playlist = [{
+                "index": index,
+                "filename": section['filename'],
+                "url": f"/api/tts/get/{section['filename']}",
+                "status": section['status']
+            } for index, section in enumerate(job.to_dict()['sections'])]
+            return jsonify({"success": True, "mode": mode, "job_id": job.id, "playlist": playlist}), 202
+        
+        job = tts_service.submit([{"title": "", "content": text}], lang)
+        if not job.wait(TTS_FILE_TIMEOUT):
+            return jsonify({"success": True, "mode": mode, "job_id": job.id, "status": job.to_dict()['status']}), 202
+        
+        section = job.to_dict()['sections'][0]
+        if section['status'] == 'failed':
+            return jsonify({"success": False, "error": section['error']}), 500
+        
+        return jsonify({
+            "success": True,
+            "mode": mode,
+            "filename": section['filename'],
+            "url": f"/api/tts/get/{section['filename']}",
+            "text": text,
+            "lang": lang,
+            "size": section['size'],
+            "cached": section['cached']
         })
         
+    except TTSQueueFull as e:
+        return jsonify({"success": False, "error": str(e)}), 503
     except Exception as e:
-        print(f"❌ TTS File Error: {e}")
+        logger.error("❌ TTS Chunked Error: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/tts/preload', methods=['POST'])
 def preload_audio():
-    """Pre-generate and cache audio for text content"""
+    """Queue background generation of audio for text content; returns a job id"""
     try:
         data = request.get_json()
         content_sections = data.get('sections', [])
@@ -1221,64 +1418,35 @@ def preload_audio():
         if not content_sections:
             return jsonify({"success": False, "error": "No content sections provided"}), 400
         
-        # Import gTTS here to avoid import errors if not installed
-        try:
-            from gtts import gTTS
-        except ImportError:
-            return jsonify({"success": False, "error": "gTTS not installed. Please install with: pip install gTTS"}), 500
-        
-        generated_files = []
-        
-        for section in content_sections:
-            title = section.get('title', '')
-            content = section.get('content', '')
-            
-            if not content.strip():
-                continue
-            
-            # Create hash for filename based on content (UTF-8 safe, same as frontend)
-            cleaned_content = content.replace('\s+', ' ').strip()
-            content_hash = hashlib.md5(cleaned_content.encode('utf-8')).hexdigest()[:16]
-            audio_filename = f"{content_hash}.mp3"
-            audio_path = os.path.join(AUDIO_CACHE_DIR, audio_filename)
-            
-            # Check if audio already exists
-            if os.path.exists(audio_path):
-                generated_files.append({
-                    "title": title,
-                    "filename": audio_filename,
-                    "cached": True
-                })
-                continue
-            
-            # Generate audio
-            try:
-                tts = gTTS(text=content, lang='vi', slow=False)
-                tts.save(audio_path)
-                
-                file_size = os.path.getsize(audio_path)
-                
-                generated_files.append({
-                    "title": title,
-                    "filename": audio_filename,
-                    "size": file_size,
-                    "cached": False
-                })
-                
-                print(f"✅ Generated audio for '{title}': {audio_filename} ({file_size} bytes)")
-                
-            except Exception as e:
-                print(f"❌ Error generating audio for '{title}': {e}")
-                continue
-        
-        return jsonify({
-            "success": True,
-            "generated": generated_files,
-            "total_files": len(generated_files)
-        })
+        job = tts_service.submit(content_sections, data.get('lang', 'vi'))
+        return jsonify({"success": True, "job_id": job.id, "data": job.to_dict()}), 202
         
+    except TTSQueueFull as e:
+        return jsonify({"success": False, "error": str(e)}), 503
+    except Exception as e:
+        logger.error("❌ Preload Error: %s", e)
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/tts/jobs', methods=['GET'])
+def list_tts_jobs():
+    """List recent TTS jobs (newest first) and worker pool statistics"""
+    try:
+        jobs = [job.to_dict() for job in tts_service.list_jobs()]
+        for job in jobs:
+            del job['sections']
+        return jsonify({"success": True, "data": jobs, "stats": tts_service.get_stats()})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/tts/jobs/<job_id>', methods=['GET'])
+def get_tts_job(job_id):
+    """Get per-section progress of a TTS job"""
+    try:
+        job = tts_service.get_job(job_id)
+        if not job:
+            return jsonify({"success": False, "error": "Job not found"}), 404
+        return jsonify({"success": True, "data": job.to_dict()})
     except Exception as e:
-        print(f"❌ Preload Error: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/tts/get/<filename>')
@@ -1289,73 +1457,229 @@ def get_cached_audio(filename):
         if not filename.endswith('.mp3'):
             return jsonify({"success": False, "error": "Invalid file type"}), 400
         
-        audio_path = os.path.join(AUDIO_CACHE_DIR, filename)
-        
-        if not os.path.exists(audio_path):
+        if not tts_service.cache.lookup(filename):
             return jsonify({"success": False, "error": "Audio file not found"}), 404
         
-        return send_from_directory(AUDIO_CACHE_DIR, filename, as_attachment=False, mimetype='audio/mpeg')
+        response = send_from_directory(AUDIO_CACHE_DIR, filename, as_attachment=False,
+                                       mimetype='audio/mpeg', max_age=31536000)
+        # Clips are named by a hash of their text, so a given URL never changes
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
         
     except Exception as e:
-        print(f"❌ Audio serve error: {e}")
+        logger.error("❌ Audio serve error: %s", e)
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/tts/exists', methods=['POST'])
+def check_audio_exists():
+    """Check many cached clips in one request.
+    
+    Accepts content hashes ({"hashes": [...]}) and/or texts ({"texts": [...]}),
+    which are resolved to the hash-named file the server stores them under.
+    Answered from the in-memory cache index without touching the disk.
+    """
+    try:
+        data = request.get_json() or {}
+        hashes = data.get('hashes') or []
+        texts = data.get('texts') or []
+        
+        if not isinstance(hashes, list) or not isinstance(texts, list):
+            return jsonify({"success": False, "error": "hashes and texts must be lists"}), 400
+        if len(hashes) + len(texts) > MAX_AUDIO_EXISTS_BATCH:
+            return jsonify({"success": False, "error": f"At most {MAX_AUDIO_EXISTS_BATCH} items per request"}), 400
+        
+        exists = {}
+        for content_hash in hashes:
+            content_hash = str(content_hash)
+            if content_hash.endswith('.mp3'):
+                content_hash = content_hash[:-4]
+            exists[content_hash] = tts_service.cache.contains(f"{content_hash}.mp3")
+        
+        resolved = []
+        for text in texts:
+            filename = audio_filename(str(text))
+            resolved.append({
+                "hash": filename[:-4],
+                "filename": filename,
+                "exists": tts_service.cache.contains(filename)
+            })
+        
+        return jsonify({"success": True, "exists": exists, "texts": resolved})
+        
+    except Exception as e:
+        logger.error("❌ Audio exists check error: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/tts/cache/status')
 def get_cache_status():
-    """Get status of audio cache"""
+    """Get status of audio cache with a page of its index (?limit=&offset=, most recently used first)"""
     try:
-        cache_files = []
-        total_size = 0
-        
-        if os.path.exists(AUDIO_CACHE_DIR):
-            for filename in os.listdir(AUDIO_CACHE_DIR):
-                if filename.endswith('.mp3'):
-                    file_path = os.path.join(AUDIO_CACHE_DIR, filename)
-                    file_size = os.path.getsize(file_path)
-                    total_size += file_size
-                    
-                    cache_files.append({
-                        "filename": filename,
-                        "size": file_size
-                    })
+        limit = request.args.get('limit', 100, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        if limit is None or limit < 0 or offset is None or offset < 0:
+            return jsonify({"success": False, "error": "limit and offset must be non-negative integers"}), 400
+        limit = min(limit, MAX_AUDIO_CACHE_PAGE_SIZE)
+        
+        stats = tts_service.cache.get_stats()
+        cache_files = tts_service.cache.list_entries(limit=limit, offset=offset)
+        next_offset = offset + len(cache_files)
         
         return jsonify({
             "success": True,
             "cache_dir": AUDIO_CACHE_DIR,
-            "file_count": len(cache_files),
-            "total_size": total_size,
-            "files": cache_files
+            "file_count": stats['file_count'],
+            "total_size": stats['total_size'],
+            "stats": stats,
+            "files": cache_files,
+            "next_offset": next_offset if next_offset < stats['file_count'] else None
         })
         
     except Exception as e:
-        print(f"❌ Cache status error: {e}")
+        logger.error("❌ Cache status error: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/tts/cache/clear', methods=['POST'])
 def clear_audio_cache():
     """Clear all cached audio files"""
     try:
-        cleared_count = 0
-        total_size = 0
-        
-        if os.path.exists(AUDIO_CACHE_DIR):
-            for filename in os.listdir(AUDIO_CACHE_DIR):
-                if filename.endswith('.mp3'):
-                    file_path = os.path.join(AUDIO_CACHE_DIR, filename)
-                    file_size = os.path.getsize(file_path)
-                    total_size += file_size
-                    
-                    os.remove(file_path)
-                    cleared_count += 1
+        cleared = tts_service.cache.clear()
         
         return jsonify({
             "success": True,
-            "cleared_files": cleared_count,
-            "freed_space": total_size
+            "cleared_files": cleared['count'],
+            "freed_space": cleared['bytes']
         })
         
     except Exception as e:
-        print(f"❌ Cache clear error: {e}")
+        logger.error("❌ Cache clear error: %s", e)
+        return jsonify({"success": False, "error": str(e)}), 500
+
+# =============================================================================
+# BATCH REQUESTS
+# =============================================================================
+
+MAX_BATCH_SIZE = 20
+BATCH_METHODS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+# Headers of the batch request itself that must not leak into its sub-requests
+BATCH_SKIP_HEADERS = {'content-type', 'content-length', 'transfer-encoding'}
+
+# Consecutive GETs in a batch are dispatched on these threads, each chunk
+# sharing one pinned database connection
+BATCH_WORKERS = int(os.environ.get('K9_BATCH_WORKERS', 4))
+batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+
+def parse_batch_item(index, item):
+    """Validate one sub-request of /api/batch; raises ValueError"""
+    if not isinstance(item, dict):
+        raise ValueError(f"requests[{index}] must be an object")
+    
+    path = item.get('path')
+    if not isinstance(path, str) or not path.startswith('/api/'):
+        raise ValueError(f"requests[{index}].path must start with /api/")
+    if path.split('?', 1)[0].rstrip('/') == '/api/batch':
+        raise ValueError(f"requests[{index}] cannot be another batch")
+    
+    method = str(item.get('method', 'GET')).upper()
+    if method not in BATCH_METHODS:
+        raise ValueError(f"requests[{index}].method must be one of: {', '.join(sorted(BATCH_METHODS))}")
+    
+    headers = item.get('headers') or {}
+    if not isinstance(headers, dict):
+        raise ValueError(f"requests[{index}].headers must be an object")
+    
+    return {'id': item.get('id', index), 'method': method, 'path': path,
+            'body': item.get('body'), 'headers': {str(k): str(v) for k, v in headers.items()}}
+
+def dispatch_batch_item(item, base_headers, remote_addr):
+    """Run one sub-request through the app's own routing and return its result"""
+    headers = dict(base_headers)
+    headers.update(item['headers'])
+    builder = EnvironBuilder(path=item['path'], method=item['method'], headers=headers,
+                             json=item['body'] if item['method'] != 'GET' and item['body'] is not None else None,
+                             environ_base={'REMOTE_ADDR': remote_addr})
+    try:
+        with app.request_context(builder.get_environ()):
+            response = app.full_dispatch_request()
+    except Exception as e:
+        logger.error("❌ Batch item %s %s failed: %s", item['method'], item['path'], e)
+        return {'status': 500, 'body': {"success": False, "error": str(e)}}
+    finally:
+        builder.close()
+    
+    try:
+        result = {'status': response.status_code}
+        if response.is_json:
+            result['body'] = response.get_json(silent=True)
+        else:
+            # Files and other non-JSON bodies are not inlined; fetch them directly
+            result['body'] = None
+            result['content_type'] = response.content_type
+        return result
+    finally:
+        response.close()
+
+def dispatch_batch_reads(items, base_headers, remote_addr):
+    """Dispatch a chunk of GETs on one pinned connection"""
+    with db.pinned_connection():
+        return [dispatch_batch_item(item, base_headers, remote_addr) for item in items]
+
+@app.route('/api/batch', methods=['POST'])
+def batch_requests():
+    """Run several API requests in one round-trip.
+    
+    Body: {"requests": [{"id", "method", "path", "body", "headers"}, ...]}.
+    Consecutive GETs run in parallel on read-only connections (a GET route
+    that writes to the database answers 500 here); anything else runs alone
+    and in order, so reads listed after a write see its result.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        raw_items = data.get('requests')
+        if not isinstance(raw_items, list) or not raw_items:
+            return jsonify({"success": False, "error": "requests must be a non-empty list"}), 400
+        if len(raw_items) > MAX_BATCH_SIZE:
+            return jsonify({"success": False, "error": f"At most {MAX_BATCH_SIZE} requests per batch"}), 400
+        items = [parse_batch_item(index, item) for index, item in enumerate(raw_items)]
+        
+        base_headers = {key: value for key, value in request.headers.items()
+                        if key.lower() not in BATCH_SKIP_HEADERS}
+        remote_addr = request.remote_addr
+        results = [None] * len(items)
+        
+        position = 0
+        while position < len(items):
+            if items[position]['method'] != 'GET':
+                results[position] = dispatch_batch_item(items[position], base_headers, remote_addr)
+                position += 1
+                continue
+            
+            # Run of consecutive GETs: identical ones are dispatched once
+            end = position
+            unique = {}
+            while end < len(items) and items[end]['method'] == 'GET':
+                key = (items[end]['path'], tuple(sorted(items[end]['headers'].items())))
+                unique.setdefault(key, {'item': items[end], 'positions': []})['positions'].append(end)
+                end += 1
+            
+            reads = list(unique.values())
+            chunk_count = min(BATCH_WORKERS, len(reads))
+            chunks = [reads[i::chunk_count] for i in range(chunk_count)]
+            futures = [batch_pool.submit(dispatch_batch_reads, [read['item'] for read in chunk],
+                                         base_headers, remote_addr) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                for read, result in zip(chunk, future.result()):
+                    for index in read['positions']:
+                        results[index] = result
+            position = end
+        
+        responses = [{'id': item['id'], **result} for item, result in zip(items, results)]
+        logger.debug("📦 Batch of %d requests dispatched", len(items))
+        return jsonify({"success": True, "responses": responses})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        logger.error("❌ Batch request error: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
 # =============================================================================
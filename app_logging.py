@@ -0,0 +1,69 @@
+"""
+K9 Management System - Logging
+Structured logging for the backend. Records are handed to a queue and written
+by a background listener thread, so request handlers never block on file I/O
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import Any
+
+LOG_FILE = os.environ.get('K9_LOG_FILE', 'debug.log')
+LOG_LEVEL = os.environ.get('K9_LOG_LEVEL', 'INFO').upper()
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+LOG_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+# Longest string logged verbatim - signatures and notes are cut to this
+MAX_PAYLOAD_CHARS = 200
+
+_listener = None
+_setup_lock = threading.Lock()
+
+def setup_logging():
+    """Route all k9.* loggers through a queue to a rotating file and the console"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        formatter = logging.Formatter(LOG_FORMAT)
+
+        file_handler = logging.handlers.RotatingFileHandler(
+            LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+        file_handler.setFormatter(formatter)
+
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+
+        log_queue = queue.Queue(-1)
+        _listener = logging.handlers.QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        root = logging.getLogger('k9')
+        root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        root.propagate = False
+
+def get_logger(name: str) -> logging.Logger:
+    """Get a logger under the k9 namespace"""
+    setup_logging()
+    return logging.getLogger(f'k9.{name}')
+
+def truncate(value: Any, limit: int = MAX_PAYLOAD_CHARS) -> Any:
+    """Shorten long strings (recursively inside dicts and lists) for logging"""
+    if isinstance(value, str):
+        if len(value) > limit:
+            return f"{value[:limit]}... ({len(value) - limit} more chars)"
+        return value
+    if isinstance(value, dict):
+        return {key: truncate(item, limit) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [truncate(item, limit) for item in value]
+    return value
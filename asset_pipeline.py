@@ -0,0 +1,259 @@
+"""
+K9 Management System - Static Asset Pipeline
+Fingerprints the front-end assets by content hash and keeps gzip and brotli
+variants of the compressible ones in a build directory, so they are
+compressed once instead of on every request and can be cached by browsers
+for a year under their fingerprinted URLs
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Any
+from app_logging import get_logger
+
+try:
+    import brotli
+except ImportError:  # brotli variants are skipped without the optional package
+    brotli = None
+
+logger = get_logger('assets')
+
+# Front-end files served from the project root, and whole directory trees
+ASSET_FILES = ('style.css', 'script.js', 'journal_db_manager.js')
+ASSET_TREES = ('static', 'images')
+# HTML pages whose references to the assets above are rewritten to fingerprinted URLs
+ASSET_PAGES = ('index.html',)
+
+FINGERPRINT_LENGTH = 12
+FINGERPRINTED_NAME = re.compile(r'^(?P<stem>.+)\.(?P<fingerprint>[0-9a-f]{%d})(?P<ext>\.[^./]+)$' % FINGERPRINT_LENGTH)
+ASSET_REFERENCE = re.compile(r'''(\b(?:src|href)=)(["'])([^"'#?:]+)(\?[^"'#]*)?\2''')
+
+COMPRESSIBLE_TYPES = {'application/javascript', 'application/json', 'application/xml',
+                      'application/manifest+json', 'image/svg+xml'}
+MIN_COMPRESS_SIZE = 1024
+# A variant is only kept if it saves at least this fraction of the original size
+MIN_COMPRESS_SAVING = 0.1
+
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+def fingerprinted_path(logical: str, fingerprint: str) -> str:
+    """style.css -> style.<fingerprint>.css"""
+    stem, ext = posixpath.splitext(logical)
+    return f"{stem}.{fingerprint}{ext}"
+
+def _is_compressible(mimetype: str) -> bool:
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+def _compress(encoding: str, data: bytes) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def _write_atomic(path: str, data: bytes):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class AssetPipeline:
+    """Manifest of fingerprinted assets, rebuilt per file whenever a source changes"""
+
+    def __init__(self, root_dir: str = '.', build_dir: str = 'asset_build',
+                 files=ASSET_FILES, trees=ASSET_TREES, pages=ASSET_PAGES):
+        self.root_dir = root_dir
+        self.build_dir = build_dir
+        self.files = tuple(files)
+        self.trees = tuple(trees)
+        self.pages = tuple(pages)
+        self.encodings = [encoding for encoding in ('br', 'gzip') if encoding != 'br' or brotli is not None]
+        self._entries = {}  # logical path -> manifest entry
+        self._pages = {}  # logical path -> rendered page with the asset URLs it used
+        self._lock = threading.Lock()
+        os.makedirs(self.build_dir, exist_ok=True)
+
+    def is_managed(self, logical: str) -> bool:
+        return logical in self.files or logical.split('/', 1)[0] in self.trees
+
+    def _normalize(self, logical: str, managed: bool = True) -> Optional[str]:
+        logical = posixpath.normpath(logical.lstrip('/'))
+        if logical.startswith('..') or '\\' in logical or (managed and not self.is_managed(logical)):
+            return None
+        return logical
+
+    def source_path(self, logical: str) -> str:
+        return os.path.join(self.root_dir, *logical.split('/'))
+
+    def resolve(self, requested: str) -> Tuple[Optional[str], Optional[str]]:
+        """Map a requested path to (logical path, fingerprint from the URL or None)"""
+        logical = self._normalize(requested, managed=False)
+        if logical is None:
+            return None, None
+        if self.is_managed(logical) and os.path.isfile(self.source_path(logical)):
+            return logical, None
+
+        match = FINGERPRINTED_NAME.match(logical)
+        if match:
+            original = match.group('stem') + match.group('ext')
+            if self.is_managed(original) and os.path.isfile(self.source_path(original)):
+                return original, match.group('fingerprint')
+        return None, None
+
+    def get(self, logical: str) -> Optional[Dict[str, Any]]:
+        """Manifest entry for an asset, (re)building it if the source changed"""
+        logical = self._normalize(logical)
+        if logical is None:
+            return None
+        path = self.source_path(logical)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._entries.pop(logical, None)
+            return None
+
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(logical)
+        if entry is not None and entry['key'] == key:
+            return entry
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        entry = self._build(path, data, key)
+        with self._lock:
+            self._entries[logical] = entry
+        return entry
+
+    def url_for(self, logical: str) -> Optional[str]:
+        """Fingerprinted path of an asset, or None if it is not managed"""
+        entry = self.get(logical)
+        if entry is None:
+            return None
+        return fingerprinted_path(self._normalize(logical), entry['fingerprint'])
+
+    def page(self, logical: str) -> Optional[Dict[str, Any]]:
+        """Manifest entry for an HTML page with its asset references fingerprinted"""
+        path = self.source_path(logical)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._pages.get(logical)
+        # Reuse the rendered page while neither it nor any asset it references changed
+        if cached is not None and cached['key'] == key and all(
+                self.url_for(reference) == url for reference, url in cached['references'].items()):
+            return cached['entry']
+
+        references = {}
+
+        def rewrite(match):
+            reference = match.group(3)
+            url = self.url_for(reference) if not reference.startswith('//') else None
+            if url is None:
+                return match.group(0)
+            references[reference] = url
+            if reference.startswith('/'):
+                url = '/' + url
+            return f"{match.group(1)}{match.group(2)}{url}{match.group(4) or ''}{match.group(2)}"
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = ASSET_REFERENCE.sub(rewrite, f.read()).encode('utf-8')
+        fingerprint = hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]
+        rendered_path = os.path.join(self.build_dir, fingerprint + '.html')
+        if not os.path.exists(rendered_path):
+            _write_atomic(rendered_path, data)
+
+        entry = self._build(rendered_path, data, key, mimetype='text/html')
+        with self._lock:
+            self._pages[logical] = {'key': key, 'references': references, 'entry': entry}
+        return entry
+
+    def _build(self, path: str, data: bytes, key, mimetype: Optional[str] = None) -> Dict[str, Any]:
+        fingerprint = hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]
+        mimetype = mimetype or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        variants = {}
+        if _is_compressible(mimetype) and len(data) >= MIN_COMPRESS_SIZE:
+            for encoding in self.encodings:
+                variant_path = os.path.join(self.build_dir, fingerprint + ENCODING_SUFFIXES[encoding])
+                if not os.path.exists(variant_path):
+                    compressed = _compress(encoding, data)
+                    if len(compressed) > len(data) * (1 - MIN_COMPRESS_SAVING):
+                        continue
+                    _write_atomic(variant_path, compressed)
+                    logger.debug("🗜️ Built %s variant of %s (%d -> %d bytes)",
+                                 encoding, path, len(data), len(compressed))
+                variants[encoding] = variant_path
+
+        return {'path': path, 'key': key, 'fingerprint': fingerprint,
+                'mimetype': mimetype, 'size': len(data), 'variants': variants}
+
+    def sources(self) -> List[str]:
+        """Logical paths of every managed asset on disk"""
+        logicals = [logical for logical in self.files if os.path.isfile(self.source_path(logical))]
+        for tree in self.trees:
+            tree_path = self.source_path(tree)
+            for dirpath, _, filenames in os.walk(tree_path):
+                relative = os.path.relpath(dirpath, self.root_dir).replace(os.sep, '/')
+                logicals.extend(f"{relative}/{filename}" for filename in sorted(filenames))
+        return logicals
+
+    def build_all(self) -> Dict[str, int]:
+        """Build every asset and page, then drop build files nothing refers to"""
+        started = time.time()
+        built = [self.get(logical) for logical in self.sources()]
+        pages = [self.page(logical) for logical in self.pages]
+        entries = [entry for entry in built + pages if entry is not None]
+
+        keep = set()
+        for entry in entries:
+            keep.update(os.path.basename(path) for path in entry['variants'].values())
+            if os.path.dirname(entry['path']) == os.path.normpath(self.build_dir):
+                keep.add(os.path.basename(entry['path']))
+        removed = 0
+        for filename in os.listdir(self.build_dir):
+            # Leave temp files alone, a request may be building that asset right now
+            if filename in keep or filename.endswith('.tmp'):
+                continue
+            path = os.path.join(self.build_dir, filename)
+            try:
+                # Files written since the build started were made for concurrent requests
+                if os.stat(path).st_mtime < started:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+
+        stats = {'assets': len(entries),
+                 'variants': sum(len(entry['variants']) for entry in entries),
+                 'removed': removed}
+        logger.info("📦 Asset pipeline ready: %d assets, %d compressed variants (%d stale files removed)",
+                    stats['assets'], stats['variants'], stats['removed'])
+        return stats
+
+    def start(self):
+        """Build everything in the background; requests build missing assets on demand"""
+        def run():
+            try:
+                self.build_all()
+            except Exception as e:
+                logger.error("❌ Asset pipeline build failed: %s", e)
+
+        threading.Thread(target=run, name='asset-pipeline', daemon=True).start()
+
+if __name__ == "__main__":
+    AssetPipeline().build_all()
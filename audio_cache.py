@@ -0,0 +1,271 @@
+"""
+K9 Management System - Audio Cache
+Tracks the generated TTS clips in the audio cache directory and keeps it
+within a byte budget and maximum idle age by evicting least-recently-used
+files in the background. Clip metadata lives in a SQLite index next to the
+clips, mirrored in memory so cache checks never touch the disk
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any
+from app_logging import get_logger
+
+logger = get_logger('audio_cache')
+
+AUDIO_EXTENSION = '.mp3'
+INDEX_FILENAME = 'cache_index.db'
+
+class AudioCache:
+    def __init__(self, cache_dir: str, max_bytes: int = 500 * 1024 * 1024,
+                 max_age: float = 30 * 24 * 3600, sweep_interval: float = 60.0):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age  # seconds a clip may go without being used
+        self.sweep_interval = sweep_interval
+        self._entries = OrderedDict()  # filename -> entry, least recently used first
+        self._total_bytes = 0
+        self._pending_hits = {}  # filename -> (last_hit, hits since last flush)
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._sweeper = None
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'evicted_bytes': 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._db = sqlite3.connect(os.path.join(self.cache_dir, INDEX_FILENAME), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._init_index()
+        self._load()
+
+    def _init_index(self):
+        with self._db_lock:
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS audio_clips (
+                    filename TEXT PRIMARY KEY,
+                    hash TEXT NOT NULL,
+                    lang TEXT,
+                    text_len INTEGER,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_hit REAL NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0,
+                    gen_ms REAL
+                )
+            ''')
+            self._db.execute('CREATE INDEX IF NOT EXISTS idx_audio_clips_last_hit ON audio_clips(last_hit)')
+            self._db.commit()
+
+    def _load(self):
+        """Load the index and reconcile it with the files actually on disk"""
+        with self._db_lock:
+            rows = self._db.execute('SELECT * FROM audio_clips ORDER BY last_hit').fetchall()
+        indexed = {row['filename']: dict(row) for row in rows}
+
+        # One directory pass; only files missing from the index are stat()ed
+        on_disk = set()
+        added = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(AUDIO_EXTENSION) or not entry.is_file():
+                    continue
+                on_disk.add(entry.name)
+                if entry.name not in indexed:
+                    stat = entry.stat()
+                    added.append({'filename': entry.name, 'hash': entry.name[:-len(AUDIO_EXTENSION)],
+                                  'lang': None, 'text_len': None, 'size': stat.st_size,
+                                  'created_at': stat.st_mtime, 'last_hit': stat.st_mtime,
+                                  'hit_count': 0, 'gen_ms': None})
+        missing = [filename for filename in indexed if filename not in on_disk]
+
+        with self._db_lock:
+            self._db.executemany('DELETE FROM audio_clips WHERE filename = ?',
+                                 [(filename,) for filename in missing])
+            self._db.executemany('''
+                INSERT INTO audio_clips (filename, hash, lang, text_len, size, created_at, last_hit, hit_count, gen_ms)
+                VALUES (:filename, :hash, :lang, :text_len, :size, :created_at, :last_hit, :hit_count, :gen_ms)
+            ''', added)
+            self._db.commit()
+
+        for filename in missing:
+            del indexed[filename]
+        for entry in sorted(list(indexed.values()) + added, key=lambda entry: entry['last_hit']):
+            self._entries[entry['filename']] = entry
+            self._total_bytes += entry['size']
+
+        if missing or added:
+            logger.info("🔄 Reconciled audio cache index: %d files added, %d stale entries removed",
+                        len(added), len(missing))
+
+    def path_for(self, filename: str) -> str:
+        return os.path.join(self.cache_dir, filename)
+
+    def contains(self, filename: str) -> bool:
+        """Check for a clip without counting it as a use"""
+        with self._lock:
+            return filename in self._entries
+
+    def lookup(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Return the entry for a cached clip and mark it recently used"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            entry['last_hit'] = now
+            entry['hit_count'] += 1
+            self._entries.move_to_end(filename)
+            self._stats['hits'] += 1
+            _, pending = self._pending_hits.get(filename, (None, 0))
+            self._pending_hits[filename] = (now, pending + 1)
+            return dict(entry)
+
+    def add(self, filename: str, size: int, lang: Optional[str] = None,
+            text_len: Optional[int] = None, gen_ms: Optional[float] = None):
+        """Record a clip that was just written to the cache directory"""
+        now = time.time()
+        entry = {'filename': filename, 'hash': filename[:-len(AUDIO_EXTENSION)], 'lang': lang,
+                 'text_len': text_len, 'size': size, 'created_at': now, 'last_hit': now,
+                 'hit_count': 0, 'gen_ms': gen_ms}
+
+        with self._db_lock:
+            self._db.execute('''
+                INSERT OR REPLACE INTO audio_clips (filename, hash, lang, text_len, size, created_at, last_hit, hit_count, gen_ms)
+                VALUES (:filename, :hash, :lang, :text_len, :size, :created_at, :last_hit, :hit_count, :gen_ms)
+            ''', entry)
+            self._db.commit()
+
+        with self._lock:
+            previous = self._entries.pop(filename, None)
+            if previous:
+                self._total_bytes -= previous['size']
+            self._entries[filename] = entry
+            self._total_bytes += size
+            over_budget = self._total_bytes > self.max_bytes
+
+        self.start()
+        if over_budget:
+            self._wake.set()
+
+    def flush_hits(self) -> int:
+        """Write pending last_hit / hit_count updates in one transaction"""
+        with self._lock:
+            pending, self._pending_hits = self._pending_hits, {}
+        if not pending:
+            return 0
+
+        with self._db_lock:
+            self._db.executemany('''
+                UPDATE audio_clips SET last_hit = ?, hit_count = hit_count + ? WHERE filename = ?
+            ''', [(last_hit, hits, filename) for filename, (last_hit, hits) in pending.items()])
+            self._db.commit()
+        return len(pending)
+
+    def evict(self) -> List[str]:
+        """Drop clips idle for longer than max_age, then LRU clips until within budget"""
+        cutoff = time.time() - self.max_age
+        victims = []
+        with self._lock:
+            for filename, entry in self._entries.items():
+                if entry['last_hit'] < cutoff:
+                    victims.append(filename)
+            total = self._total_bytes - sum(self._entries[filename]['size'] for filename in victims)
+            for filename, entry in self._entries.items():
+                if total <= self.max_bytes:
+                    break
+                if filename not in victims:
+                    victims.append(filename)
+                    total -= entry['size']
+
+            removed = [(filename, self._entries.pop(filename)['size']) for filename in victims]
+            for filename, size in removed:
+                self._total_bytes -= size
+                self._pending_hits.pop(filename, None)
+            self._stats['evictions'] += len(removed)
+            self._stats['evicted_bytes'] += sum(size for _, size in removed)
+
+        if not removed:
+            return []
+
+        with self._db_lock:
+            self._db.executemany('DELETE FROM audio_clips WHERE filename = ?',
+                                 [(filename,) for filename, _ in removed])
+            self._db.commit()
+
+        for filename, _ in removed:
+            try:
+                os.remove(self.path_for(filename))
+            except FileNotFoundError:
+                pass
+
+        logger.info("🧹 Evicted %d audio clips from the cache", len(removed))
+        return [filename for filename, _ in removed]
+
+    def clear(self) -> Dict[str, int]:
+        """Delete every cached clip"""
+        with self._lock:
+            removed = list(self._entries.items())
+            self._entries.clear()
+            self._pending_hits.clear()
+            self._total_bytes = 0
+
+        with self._db_lock:
+            self._db.execute('DELETE FROM audio_clips')
+            self._db.commit()
+
+        for filename, _ in removed:
+            try:
+                os.remove(self.path_for(filename))
+            except FileNotFoundError:
+                pass
+
+        return {'count': len(removed), 'bytes': sum(entry['size'] for _, entry in removed)}
+
+    def list_entries(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """A page of cached clips from the index, most recently used first"""
+        self.flush_hits()
+        with self._db_lock:
+            rows = self._db.execute('''
+                SELECT * FROM audio_clips ORDER BY last_hit DESC, filename LIMIT ? OFFSET ?
+            ''', (limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['file_count'] = len(self._entries)
+            stats['total_size'] = self._total_bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else None
+        stats['max_bytes'] = self.max_bytes
+        stats['max_age'] = self.max_age
+
+        with self._db_lock:
+            row = self._db.execute('SELECT AVG(gen_ms) as avg_gen_ms FROM audio_clips').fetchone()
+        stats['avg_gen_ms'] = round(row['avg_gen_ms'], 1) if row['avg_gen_ms'] is not None else None
+        return stats
+
+    def start(self):
+        """Start the background flush/eviction thread if it is not running yet"""
+        if self._sweeper is None:
+            with self._lock:
+                if self._sweeper is None:
+                    self._sweeper = threading.Thread(target=self._run_sweeper,
+                                                     name='audio-cache-sweeper', daemon=True)
+                    self._sweeper.start()
+                    atexit.register(self.flush_hits)
+
+    def _run_sweeper(self):
+        while True:
+            self._wake.wait(self.sweep_interval)
+            self._wake.clear()
+            try:
+                self.flush_hits()
+                self.evict()
+            except Exception as e:
+                logger.warning("⚠️ Could not maintain audio cache: %s", e)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+K9 Management System - User Query Regression Benchmark
+Checks that loading users with their assigned dogs costs a constant number
+of SQL statements no matter how many users exist (no N+1 queries)
+"""
+
+import os
+import sys
+import tempfile
+import time
+from database import DatabaseManager
+
+USER_COUNTS = [10, 100, 1000]
+DOGS_PER_USER = 2
+
+def seed(db, user_count):
+    """Fill an empty database with users, dogs and active assignments"""
+    conn = db.get_connection()
+    try:
+        for i in range(user_count):
+            cursor = conn.execute(
+                "INSERT INTO users (name, username, password, role) VALUES (?, ?, ?, 'TRAINER')",
+                (f"Trainer {i}", f"trainer{i}", "secret"))
+            user_id = cursor.lastrowid
+            for j in range(DOGS_PER_USER):
+                cursor = conn.execute(
+                    "INSERT INTO dogs (name, chip_id, breed) VALUES (?, ?, 'Malinois')",
+                    (f"CNV {i}-{j}", f"CHIP-{i}-{j}"))
+                conn.execute(
+                    "INSERT INTO user_dog_assignments (user_id, dog_id) VALUES (?, ?)",
+                    (user_id, cursor.lastrowid))
+        conn.commit()
+    finally:
+        conn.close()
+
+def count_statements(db, operation):
+    """Run operation and return (statement count, elapsed ms)"""
+    statements = []
+
+    def trace(sql):
+        # Ignore the pool's health check on checkout
+        if sql.strip() != 'SELECT 1':
+            statements.append(sql)
+
+    original_get_connection = db.get_connection
+
+    def traced_get_connection():
+        conn = original_get_connection()
+        conn.set_trace_callback(trace)
+        return conn
+
+    db.get_connection = traced_get_connection
+    try:
+        started = time.perf_counter()
+        operation()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    finally:
+        db.get_connection = original_get_connection
+
+    return len(statements), elapsed_ms
+
+def main():
+    """Run the benchmark for each user count"""
+    print("🚀 K9 Management System - User Query Benchmark")
+    print("=" * 50)
+
+    results = []
+    for user_count in USER_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Keep every path the manager touches inside tmp_dir, so the real
+            # care-plans and blob directories are never scanned or migrated
+            db = DatabaseManager(os.path.join(tmp_dir, 'bench.db'),
+                                 signature_blob_dir=os.path.join(tmp_dir, 'signature_blobs'),
+                                 care_plans_dir=os.path.join(tmp_dir, 'care-plans'))
+            seed(db, user_count)
+
+            operations = {
+                'get_all_users': db.get_all_users,
+                'get_user_by_id_with_dogs': lambda: db.get_user_by_id_with_dogs(1),
+                'authenticate_user': lambda: db.authenticate_user('trainer0', 'secret')
+            }
+
+            for name, operation in operations.items():
+                statements, elapsed_ms = count_statements(db, operation)
+                results.append((name, user_count, statements))
+                print(f"  {name:<26} users={user_count:<5} statements={statements:<3} {elapsed_ms:8.2f} ms")
+
+            db.pool.close_all()
+
+    # Statement count must not depend on the number of users
+    failed = False
+    for name in {result[0] for result in results}:
+        counts = {statements for op, _, statements in results if op == name}
+        if len(counts) != 1:
+            print(f"❌ {name}: statement count grows with users {sorted(counts)}")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+    print("✅ Statement count is constant for every operation")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+K9 Management System - Content-Addressed Blob Store
+Keeps binary data (signature images) on disk under its SHA-256 hash so that
+database rows only need to hold a short reference URL
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import os
+import re
+import tempfile
+from typing import Any, BinaryIO, Optional, Tuple
+
+DATA_URL_PATTERN = re.compile(r'^data:(image/[A-Za-z0-9.+-]+);base64,(.*)$', re.DOTALL)
+
+IMAGE_EXTENSIONS = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/jpg': '.jpg',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/svg+xml': '.svg',
+}
+
+# Read uploads in fixed-size chunks so large files never sit in memory whole
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+class UploadTooLarge(ValueError):
+    """An upload exceeded its size limit while being streamed"""
+
+def stream_to_temp(stream: BinaryIO, directory: str, max_size: Optional[int] = None,
+                   chunk_size: int = UPLOAD_CHUNK_SIZE) -> Tuple[str, str, int]:
+    """Copy a stream into a temp file in directory, hashing it on the way.
+
+    Returns (temp_path, sha256 hex digest, size). The caller publishes the temp
+    file with os.replace() or removes it. Raises UploadTooLarge as soon as more
+    than max_size bytes have been read.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise UploadTooLarge(f"File too large. Maximum size is {max_size // (1024 * 1024)}MB")
+                digest.update(chunk)
+                f.write(chunk)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+    return tmp_path, digest.hexdigest(), size
+
+class BlobStore:
+    def __init__(self, root_dir: str, url_prefix: str):
+        self.root_dir = root_dir
+        self.url_prefix = url_prefix.rstrip('/') + '/'
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def put(self, data: bytes, extension: str = '') -> str:
+        """Store data and return its content-addressed filename"""
+        filename = hashlib.sha256(data).hexdigest() + extension
+        path = os.path.join(self.root_dir, filename)
+
+        # Identical content is already stored - nothing to write
+        if os.path.exists(path):
+            return filename
+
+        # Write to a temp file and rename so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=self.root_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return filename
+
+    def put_stream(self, stream: BinaryIO, extension: str = '',
+                   max_size: Optional[int] = None) -> Tuple[str, int]:
+        """Store a stream chunk by chunk and return (content-addressed filename, size)"""
+        tmp_path, sha256, size = stream_to_temp(stream, self.root_dir, max_size)
+        filename = sha256 + extension
+        path = os.path.join(self.root_dir, filename)
+
+        try:
+            if os.path.exists(path):
+                # Identical content is already stored - drop the new copy
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return filename, size
+
+    def url_for(self, filename: str) -> str:
+        """Public URL for a stored blob"""
+        return self.url_prefix + filename
+
+    def store_data_url(self, value: str) -> Optional[str]:
+        """Store an inline base64 image data URL and return its URL.
+
+        Returns None if the value is not a decodable image data URL.
+        """
+        match = DATA_URL_PATTERN.match(value.strip())
+        if not match:
+            return None
+
+        mime_type, payload = match.groups()
+        try:
+            data = base64.b64decode(payload, validate=False)
+        except (binascii.Error, ValueError):
+            return None
+
+        filename = self.put(data, IMAGE_EXTENSIONS.get(mime_type.lower(), ''))
+        return self.url_for(filename)
+
+    def externalize_signature(self, value: Optional[str]) -> Optional[str]:
+        """Replace inline image data in a signature column value with blob URLs.
+
+        Signature columns hold either a bare data URL or a JSON object (as
+        produced by the frontend) whose string fields may contain data URLs.
+        Values without inline image data are returned unchanged.
+        """
+        if not value or not isinstance(value, str) or 'data:image/' not in value:
+            return value
+
+        url = self.store_data_url(value)
+        if url:
+            return url
+
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            return value
+
+        replaced = self._replace_data_urls(parsed)
+        # Match the compact output of the frontend's JSON.stringify
+        return json.dumps(replaced, ensure_ascii=False, separators=(',', ':'))
+
+    def _replace_data_urls(self, node: Any) -> Any:
+        if isinstance(node, dict):
+            return {key: self._replace_data_urls(item) for key, item in node.items()}
+        if isinstance(node, list):
+            return [self._replace_data_urls(item) for item in node]
+        if isinstance(node, str) and node.startswith('data:image/'):
+            return self.store_data_url(node) or node
+        return node
@@ -0,0 +1,85 @@
+"""
+K9 Management System - Care Plan Text Extraction
+Extracts per-page text from uploaded care plan PDFs in a background thread
+and stores it in the care plan search index, so the text is extracted once
+on the server instead of on every client
+"""
+
+import os
+import queue
+import threading
+from typing import List, Dict, Any
+from app_logging import get_logger
+
+logger = get_logger('care_plan_text')
+
+class PdfSupportUnavailable(RuntimeError):
+    """The optional pypdf package is not installed"""
+
+def extract_pdf_pages(path: str) -> List[str]:
+    """Extract the text of each page of a PDF"""
+    # Import pypdf here to avoid import errors if not installed
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise PdfSupportUnavailable("pypdf not installed. Please install with: pip install pypdf")
+
+    reader = PdfReader(path)
+    return [(page.extract_text() or '').strip() for page in reader.pages]
+
+class CarePlanTextIndexer:
+    """Single background worker feeding extracted care plan text into the database"""
+
+    def __init__(self, db):
+        self.db = db
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, care_plan: Dict[str, Any]):
+        """Queue a care plan (as returned by DatabaseManager) for text extraction"""
+        self._start()
+        self._queue.put(care_plan)
+
+    def enqueue_pending(self):
+        """Queue every care plan whose text has not been extracted yet"""
+        self._start()
+        self._queue.put(None)
+
+    def _start(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name='care-plan-text', daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            care_plan = self._queue.get()
+            try:
+                if care_plan is None:
+                    for pending in self.db.get_care_plans_pending_text():
+                        self._index(pending)
+                else:
+                    self._index(care_plan)
+            except PdfSupportUnavailable as e:
+                # Leave plans pending so they are indexed once pypdf is installed
+                logger.warning("⚠️ Care plan search disabled: %s", e)
+            except Exception as e:
+                logger.error("❌ Care plan text worker error: %s", e)
+            finally:
+                self._queue.task_done()
+
+    def _index(self, care_plan: Dict[str, Any]):
+        path = os.path.join(self.db.care_plans_dir, care_plan['filename'])
+        try:
+            pages = extract_pdf_pages(path)
+        except PdfSupportUnavailable:
+            raise
+        except Exception as e:
+            logger.error("❌ Could not extract text from %s: %s", care_plan['filename'], e)
+            self.db.set_care_plan_text_status(care_plan['id'], 'failed')
+            return
+
+        self.db.store_care_plan_pages(care_plan['id'], pages)
+        logger.info("✅ Indexed %d pages of %s", len(pages), care_plan['filename'])
@@ -0,0 +1,58 @@
+"""
+K9 Management System - Test Fixtures
+A throwaway DatabaseManager per test, with every path it touches in tmp_path
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import pytest
+
+# database.db, the log file and app_backend's caches are created at import time -
+# point them all at a scratch directory before anything imports them
+RUNTIME_DIR = tempfile.mkdtemp(prefix='k9-tests-')
+RUNTIME_PATHS = {
+    'K9_DB_PATH': 'k9_management.db',
+    'K9_SIGNATURE_BLOB_DIR': 'signature_blobs',
+    'K9_CARE_PLANS_DIR': 'care-plans',
+    'K9_SIGNATURES_DIR': 'signatures',
+    'K9_LOG_FILE': 'debug.log',
+    'K9_AUDIO_CACHE_DIR': 'audio_cache',
+    'K9_ASSET_BUILD_DIR': 'asset_build',
+    'K9_IMAGE_CACHE_DIR': 'image_cache',
+}
+for name, path in RUNTIME_PATHS.items():
+    os.environ[name] = os.path.join(RUNTIME_DIR, path)
+os.environ['K9_TTS_BACKEND'] = 'stub'
+
+from database import DatabaseManager
+
+def pytest_unconfigure(config):
+    # app_backend's first asset build may still be writing into RUNTIME_DIR
+    for thread in threading.enumerate():
+        if thread.name == 'asset-pipeline':
+            thread.join()
+    shutil.rmtree(RUNTIME_DIR, ignore_errors=True)
+
+@pytest.fixture
+def temp_db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'test.db'),
+                         signature_blob_dir=str(tmp_path / 'signature_blobs'),
+                         care_plans_dir=str(tmp_path / 'care-plans'))
+    yield db
+    db.pool.close_all()
+
+@pytest.fixture
+def client(temp_db, monkeypatch):
+    import app_backend
+    monkeypatch.setattr(app_backend, 'db', temp_db)
+    return app_backend.app.test_client()
+
+@pytest.fixture
+def dog(temp_db):
+    """A dog with a trainer, for journals to point at"""
+    trainer = temp_db.create_user({'name': 'CNV Trainer', 'username': 'cnv_trainer',
+                                   'password': 'secret', 'role': 'TRAINER'})
+    return temp_db.create_dog({'name': 'CNV DOG', 'chip_id': 'CNV-1', 'breed': 'Malinois',
+                               'trainer_id': trainer['id']})
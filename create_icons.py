@@ -1,36 +1,60 @@
-from PIL import Image, ImageDraw
+#!/usr/bin/env python3
+"""
+K9 Management System - Icon Build
+Generates the PWA icon set named in manifest.json plus splash images in a
+process pool. A hash manifest records what each output was drawn from, so
+unchanged outputs are skipped on the next run
+"""
+
+import argparse
+import hashlib
+import json
 import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PIL import Image, ImageDraw
+
+MANIFEST_PATH = 'manifest.json'
+OUTPUT_DIR = 'static'
+# Build cache kept outside OUTPUT_DIR, which is served to browsers
+HASH_MANIFEST = '.icon-manifest.json'
 
-def create_cnv_icon(size, output_path):
-    print(f"Creating icon {size}x{size}...")
-    
-    # Tạo background xanh
-    img = Image.new('RGB', (size, size), '#667eea')
+ICON_COLOR = '#667eea'
+# Sizes always built for the PWA install prompt, on top of those in manifest.json
+DEFAULT_ICON_SIZES = [192, 512]
+# iOS launch screens (portrait), width x height
+SPLASH_SIZES = [(640, 1136), (750, 1334), (828, 1792), (1125, 2436), (1242, 2208),
+                (1242, 2688), (1536, 2048), (1668, 2388), (2048, 2732)]
+SPLASH_ICON_RATIO = 0.3  # icon size relative to the shorter splash side
+
+def draw_cnv_icon(size):
+    img = Image.new('RGB', (size, size), ICON_COLOR)
     draw = ImageDraw.Draw(img)
-    
+
     # Vẽ hình chó đơn giản
     center_x, center_y = size // 2, size // 2
     radius = size // 3
-    
+
     # Đầu chó (hình oval trắng)
     draw.ellipse([
         center_x - radius, center_y - radius//2,
         center_x + radius, center_y + radius//2
     ], fill='white', outline='#2d3748', width=max(1, size//100))
-    
+
     # Mắt trái
     eye_size = max(3, size // 20)
     draw.ellipse([
-        center_x - radius//3, center_y - radius//4, 
+        center_x - radius//3, center_y - radius//4,
         center_x - radius//3 + eye_size, center_y - radius//4 + eye_size
     ], fill='black')
-    
-    # Mắt phải  
+
+    # Mắt phải
     draw.ellipse([
         center_x + radius//3 - eye_size, center_y - radius//4,
         center_x + radius//3, center_y - radius//4 + eye_size
     ], fill='black')
-    
+
     # Mũi (tam giác nhỏ)
     nose_size = max(2, size // 30)
     draw.polygon([
@@ -38,71 +62,134 @@ def create_cnv_icon(size, output_path):
         (center_x - nose_size, center_y + radius//8 + nose_size),
         (center_x + nose_size, center_y + radius//8 + nose_size)
     ], fill='black')
-    
-    # Lưu file
 
-    img.save(output_path, 'PNG')
-    print(f"✅ Created: {output_path}")
+    return img
 
-# Tạo thư mục static nếu chưa có
-os.makedirs('static', exist_ok=True)
+def draw_splash(width, height, background):
+    img = Image.new('RGB', (width, height), background)
+    icon_size = int(min(width, height) * SPLASH_ICON_RATIO)
+    icon = draw_cnv_icon(icon_size)
+    img.paste(icon, ((width - icon_size) // 2, (height - icon_size) // 2))
+    return img
 
-print("🎨 Starting icon generation...")
+def save_optimized_png(img, output_path):
+    """Save losslessly as small as possible: palette mode when the image has few colors"""
+    if img.getcolors(256) is not None:
+        img = img.convert('P', palette=Image.ADAPTIVE, colors=256)
+    tmp_path = output_path + '.tmp'
+    img.save(tmp_path, 'PNG', optimize=True)
+    os.replace(tmp_path, output_path)
 
-# Tạo 2 icon sizes
-create_cnv_icon(192, 'static/icon-192x192.png')
-create_cnv_icon(512, 'static/icon-512x512.png')
+def build_job(job):
+    """Worker: draw one output and return (output, sha256 of the written file)"""
+    if job['kind'] == 'icon':
+        img = draw_cnv_icon(job['size'])
+    else:
+        img = draw_splash(job['width'], job['height'], job['background'])
+    save_optimized_png(img, job['output'])
+    return job['output'], file_hash(job['output'])
 
-print("🎉 Icon generation completed!")
-print("📂 Check 'static' folder for generated icons")
-from PIL import Image, ImageDraw
-import os
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-def create_cnv_icon(size, output_path):
-    print(f"Creating icon {size}x{size}...")
-    
-    # Tạo background xanh
-    img = Image.new('RGB', (size, size), '#667eea')
-    draw = ImageDraw.Draw(img)
-    
-    # Vẽ hình chó đơn giản
-    center_x, center_y = size // 2, size // 2
-    radius = size // 3
-    
-    # Đầu chó (hình oval trắng)
-    draw.ellipse([
-        center_x - radius, center_y - radius//2,
-        center_x + radius, center_y + radius//2
-    ], fill='white', outline='#2d3748', width=max(1, size//100))
-    
-    # Mắt trái
-    eye_size = max(3, size // 20)
-    draw.ellipse([
-        center_x - radius//3, center_y - radius//4, 
-        center_x - radius//3 + eye_size, center_y - radius//4 + eye_size
-    ], fill='black')
-    
-    # Mắt phải  
-    draw.ellipse([
-        center_x + radius//3 - eye_size, center_y - radius//4,
-        center_x + radius//3, center_y - radius//4 + eye_size
-    ], fill='black')
-    
-    # Mũi (tam giác nhỏ)
-    nose_size = max(2, size // 30)
-    draw.polygon([
-        (center_x, center_y + radius//8),
-        (center_x - nose_size, center_y + radius//8 + nose_size),
-        (center_x + nose_size, center_y + radius//8 + nose_size)
-    ], fill='black')
-    
-    # Lưu file
-    img.save(output_path, 'PNG')
-    print(f"✅ Created: {output_path}")
-
-# Tạo icons
-os.makedirs('static', exist_ok=True)
-print("🎨 Starting icon generation...")
-create_cnv_icon(192, 'static/icon-192x192.png')
-create_cnv_icon(512, 'static/icon-512x512.png')
-print("🎉 Icon generation completed!")
\ No newline at end of file
+def manifest_icon_sizes(manifest_path):
+    """Square sizes listed in the manifest's icons (e.g. "72x72 96x96")"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return set(), {}
+    sizes = set()
+    for icon in manifest.get('icons', []):
+        for width, height in re.findall(r'(\d+)x(\d+)', icon.get('sizes', '')):
+            if width == height:
+                sizes.add(int(width))
+    return sizes, manifest
+
+def plan_jobs(manifest_path, output_dir):
+    sizes, manifest = manifest_icon_sizes(manifest_path)
+    background = manifest.get('background_color', '#ffffff')
+    # Editing the drawing code must rebuild everything, so it is part of every hash
+    with open(__file__, 'rb') as f:
+        code_hash = hashlib.sha256(f.read()).hexdigest()
+
+    jobs = []
+    for size in sorted(sizes | set(DEFAULT_ICON_SIZES)):
+        jobs.append({'kind': 'icon', 'size': size,
+                     'output': os.path.join(output_dir, f'icon-{size}x{size}.png')})
+    for width, height in SPLASH_SIZES:
+        jobs.append({'kind': 'splash', 'width': width, 'height': height, 'background': background,
+                     'output': os.path.join(output_dir, 'splash', f'splash-{width}x{height}.png')})
+
+    for job in jobs:
+        params = {key: value for key, value in job.items() if key != 'output'}
+        job['hash'] = hashlib.sha256(json.dumps([params, code_hash], sort_keys=True).encode()).hexdigest()
+    return jobs
+
+def load_hash_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def is_up_to_date(job, recorded):
+    """Skip outputs drawn from the same parameters that nobody has touched since"""
+    entry = recorded.get(job['output'].replace(os.sep, '/'))
+    return (entry is not None and entry['params'] == job['hash']
+            and os.path.exists(job['output']) and file_hash(job['output']) == entry['output'])
+
+def main():
+    parser = argparse.ArgumentParser(description='Build PWA icons and splash images')
+    parser.add_argument('--manifest', default=MANIFEST_PATH, help='web app manifest to read icon sizes from')
+    parser.add_argument('--output', default=OUTPUT_DIR, help='directory to write images to')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='rebuild every output')
+    args = parser.parse_args()
+
+    print("🎨 Starting icon generation...")
+    started = time.perf_counter()
+    os.makedirs(os.path.join(args.output, 'splash'), exist_ok=True)
+
+    hash_manifest_path = HASH_MANIFEST
+    recorded = load_hash_manifest(hash_manifest_path)
+    jobs = plan_jobs(args.manifest, args.output)
+    pending = [job for job in jobs if args.force or not is_up_to_date(job, recorded)]
+    job_hashes = {job['output']: job['hash'] for job in jobs}
+
+    # Forget outputs that are no longer part of the build
+    outputs = {job['output'].replace(os.sep, '/') for job in jobs}
+    recorded = {output: entry for output, entry in recorded.items() if output in outputs}
+
+    failed = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {pool.submit(build_job, job): job for job in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    output, output_hash = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"❌ Failed: {job['output']}: {e}")
+                    continue
+                recorded[output.replace(os.sep, '/')] = {'params': job_hashes[output], 'output': output_hash}
+                print(f"✅ Created: {output}")
+
+    tmp_path = hash_manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(recorded, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, hash_manifest_path)
+
+    elapsed = time.perf_counter() - started
+    print(f"🎉 Icon generation completed in {elapsed:.2f}s: "
+          f"{len(pending) - failed} built, {len(jobs) - len(pending)} unchanged, {failed} failed")
+    print(f"📂 Check '{args.output}' folder for generated icons")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,24 +6,560 @@ SQLite database setup and operations for users, dogs, and journals
 import sqlite3
 import json
 import os
-from datetime import datetime
+import base64
+import queue
+import threading
+import time
+import atexit
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from typing import List, Dict, Optional, Any
+from blob_store import BlobStore, stream_to_temp
+from app_logging import get_logger
 
-class DatabaseManager:
-    def __init__(self, db_path: str = "k9_management.db"):
+logger = get_logger('database')
+
+# Journal columns that may carry inline signature image data
+SIGNATURE_COLUMNS = ('hlv_signature', 'leader_signature', 'substitute_signature')
+
+# Shared by single and bulk journal inserts
+JOURNAL_INSERT_SQL = '''
+    INSERT INTO training_journals (
+        dog_id, trainer_id, journal_date, training_activities, care_activities,
+        operation_activities, health_status, behavior_notes, weather_conditions,
+        training_duration, success_rate, challenges, next_goals, approval_status,
+        approved_by, approved_at, rejection_reason, created_at, updated_at,
+        hlv_signature, leader_signature, substitute_signature,
+        hlv_signature_timestamp, leader_signature_timestamp, substitute_signature_timestamp
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Fields selectable through ?fields=, mapped to the SQL expression producing them
+JOURNAL_FIELDS = {
+    **{column: f'tj.{column}' for column in (
+        'id', 'dog_id', 'trainer_id', 'journal_date', 'training_activities', 'care_activities',
+        'operation_activities', 'health_status', 'behavior_notes', 'weather_conditions',
+        'training_duration', 'success_rate', 'challenges', 'next_goals', 'approval_status',
+        'approved_by', 'approved_at', 'rejection_reason', 'hlv_signature', 'leader_signature',
+        'substitute_signature', 'hlv_signature_timestamp', 'leader_signature_timestamp',
+        'substitute_signature_timestamp', 'created_at', 'updated_at'
+    )},
+    'dog_name': 'd.name',
+    'chip_id': 'd.chip_id',
+    'trainer_name': 't.name',
+    'approver_name': 'a.name'
+}
+
+DOG_FIELDS = {
+    **{column: f'd.{column}' for column in (
+        'id', 'name', 'chip_id', 'breed', 'status', 'birth_date', 'birth_place', 'gender',
+        'features', 'fur_color', 'value', 'father_name', 'father_birth', 'father_place',
+        'father_breed', 'father_features', 'hlv_ten', 'hlv_ngaysinh', 'hlv_capbac', 'hlv_chucvu',
+        'hlv_donvi', 'hlv_daotao', 'acquisition_date', 'health_status', 'notes',
+        'created_at', 'updated_at'
+    )},
+    'trainer_id': 'u.id',
+    'trainer_name': 'u.name',
+    'trainer_username': 'u.username',
+    'assignment_type': 'uda.assignment_type',
+    'assigned_at': 'uda.assigned_at'
+}
+
+# Default select list for dogs joined with their current trainer
+DOG_SELECT_LIST = '''d.*, 
+                       u.name as trainer_name, 
+                       u.username as trainer_username,
+                       u.id as trainer_id,
+                       uda.assignment_type,
+                       uda.assigned_at'''
+
+# assignedDogs is computed separately, the password column is never selectable
+USER_FIELDS = {
+    **{column: f'u.{column}' for column in (
+        'id', 'name', 'username', 'role', 'status', 'email', 'phone', 'department',
+        'signature', 'created_at', 'updated_at'
+    )},
+    'assignedDogs': None
+}
+
+# Named field sets; "summary" leaves out heavy text and signature columns
+FIELD_PRESETS = {
+    'journals': {
+        'summary': ['id', 'dog_id', 'trainer_id', 'journal_date', 'health_status', 'approval_status',
+                    'approved_by', 'approved_at', 'dog_name', 'chip_id', 'trainer_name',
+                    'approver_name', 'created_at', 'updated_at']
+    },
+    'dogs': {
+        'summary': ['id', 'name', 'chip_id', 'breed', 'status', 'health_status',
+                    'trainer_id', 'trainer_name']
+    },
+    'users': {
+        'summary': ['id', 'name', 'username', 'role', 'status', 'assignedDogs']
+    }
+}
+
+def _counter_delta(metric: str, key_expr: str, delta: int, condition: str = '1') -> str:
+    """SQL statement adding delta to one dashboard counter (used inside triggers)"""
+    return f'''
+        INSERT INTO dashboard_counters (metric, key, count)
+        SELECT '{metric}', COALESCE({key_expr}, ''), {delta} WHERE {condition}
+        ON CONFLICT(metric, key) DO UPDATE SET count = count + ({delta});'''
+
+# Triggers keeping dashboard_counters in step with every write to the counted tables
+DASHBOARD_COUNTER_TRIGGERS = {
+    'stats_users_insert': ('AFTER INSERT ON users', [
+        _counter_delta('active_user_roles', 'NEW.role', 1, "NEW.status = 'ACTIVE'")]),
+    'stats_users_delete': ('AFTER DELETE ON users', [
+        _counter_delta('active_user_roles', 'OLD.role', -1, "OLD.status = 'ACTIVE'")]),
+    'stats_users_update': ('AFTER UPDATE OF role, status ON users', [
+        _counter_delta('active_user_roles', 'OLD.role', -1, "OLD.status = 'ACTIVE'"),
+        _counter_delta('active_user_roles', 'NEW.role', 1, "NEW.status = 'ACTIVE'")]),
+    'stats_dogs_insert': ('AFTER INSERT ON dogs', [
+        _counter_delta('dog_status', 'NEW.status', 1)]),
+    'stats_dogs_delete': ('AFTER DELETE ON dogs', [
+        _counter_delta('dog_status', 'OLD.status', -1)]),
+    'stats_dogs_update': ('AFTER UPDATE OF status ON dogs', [
+        _counter_delta('dog_status', 'OLD.status', -1),
+        _counter_delta('dog_status', 'NEW.status', 1)]),
+    'stats_journals_insert': ('AFTER INSERT ON training_journals', [
+        _counter_delta('journal_approval_status', 'NEW.approval_status', 1),
+        _counter_delta('journal_date', 'NEW.journal_date', 1)]),
+    'stats_journals_delete': ('AFTER DELETE ON training_journals', [
+        _counter_delta('journal_approval_status', 'OLD.approval_status', -1),
+        _counter_delta('journal_date', 'OLD.journal_date', -1)]),
+    'stats_journals_update_status': ('AFTER UPDATE OF approval_status ON training_journals', [
+        _counter_delta('journal_approval_status', 'OLD.approval_status', -1),
+        _counter_delta('journal_approval_status', 'NEW.approval_status', 1)]),
+    'stats_journals_update_date': ('AFTER UPDATE OF journal_date ON training_journals', [
+        _counter_delta('journal_date', 'OLD.journal_date', -1),
+        _counter_delta('journal_date', 'NEW.journal_date', 1)]),
+}
+
+# Recompute every dashboard counter from the source tables
+DASHBOARD_COUNTER_REBUILD_SQL = [
+    '''INSERT INTO dashboard_counters (metric, key, count)
+       SELECT 'active_user_roles', COALESCE(role, ''), COUNT(*) FROM users
+       WHERE status = 'ACTIVE' GROUP BY COALESCE(role, '')''',
+    '''INSERT INTO dashboard_counters (metric, key, count)
+       SELECT 'dog_status', COALESCE(status, ''), COUNT(*) FROM dogs
+       GROUP BY COALESCE(status, '')''',
+    '''INSERT INTO dashboard_counters (metric, key, count)
+       SELECT 'journal_approval_status', COALESCE(approval_status, ''), COUNT(*) FROM training_journals
+       GROUP BY COALESCE(approval_status, '')''',
+    '''INSERT INTO dashboard_counters (metric, key, count)
+       SELECT 'journal_date', COALESCE(journal_date, ''), COUNT(*) FROM training_journals
+       GROUP BY COALESCE(journal_date, '')''',
+]
+
+def _log_change(table: str, ids_sql: str, op: str = 'upsert') -> str:
+    """SQL statements recording a change to the rows selected by ids_sql (used inside triggers).
+    
+    Earlier entries for the same rows are dropped first, so the log holds each
+    row once, at the sequence number of its latest change.
+    """
+    return f'''
+        DELETE FROM change_log WHERE table_name = '{table}' AND row_id IN ({ids_sql});
+        INSERT INTO change_log (table_name, row_id, op) SELECT '{table}', id, '{op}' FROM ({ids_sql});'''
+
+# Tables /api/sync reports, as named in change_log
+SYNC_TABLES = ('users', 'dogs', 'journals')
+
+# Triggers feeding change_log for /api/sync. Rows that embed names from other
+# tables (a journal's dog_name, a dog's trainer_name, ...) are logged again
+# when those names change.
+CHANGE_LOG_TRIGGERS = {
+    'sync_users_insert': ('AFTER INSERT ON users', [
+        _log_change('users', 'SELECT NEW.id AS id')]),
+    'sync_users_update': ('AFTER UPDATE ON users', [
+        _log_change('users', 'SELECT NEW.id AS id')]),
+    'sync_users_rename': ('AFTER UPDATE OF name, username ON users', [
+        _log_change('dogs', 'SELECT dog_id AS id FROM user_dog_assignments WHERE user_id = NEW.id'),
+        _log_change('journals', 'SELECT id FROM training_journals WHERE trainer_id = NEW.id OR approved_by = NEW.id')]),
+    'sync_users_delete': ('AFTER DELETE ON users', [
+        _log_change('users', 'SELECT OLD.id AS id', 'delete')]),
+    'sync_dogs_insert': ('AFTER INSERT ON dogs', [
+        _log_change('dogs', 'SELECT NEW.id AS id')]),
+    'sync_dogs_update': ('AFTER UPDATE ON dogs', [
+        _log_change('dogs', 'SELECT NEW.id AS id')]),
+    'sync_dogs_rename': ('AFTER UPDATE OF name, chip_id ON dogs', [
+        _log_change('journals', 'SELECT id FROM training_journals WHERE dog_id = NEW.id'),
+        _log_change('users', 'SELECT user_id AS id FROM user_dog_assignments WHERE dog_id = NEW.id')]),
+    'sync_dogs_delete': ('AFTER DELETE ON dogs', [
+        _log_change('dogs', 'SELECT OLD.id AS id', 'delete')]),
+    'sync_journals_insert': ('AFTER INSERT ON training_journals', [
+        _log_change('journals', 'SELECT NEW.id AS id')]),
+    'sync_journals_update': ('AFTER UPDATE ON training_journals', [
+        _log_change('journals', 'SELECT NEW.id AS id')]),
+    'sync_journals_delete': ('AFTER DELETE ON training_journals', [
+        _log_change('journals', 'SELECT OLD.id AS id', 'delete')]),
+    # Assignments show up as a dog's trainer and a user's assignedDogs
+    'sync_assignments_insert': ('AFTER INSERT ON user_dog_assignments', [
+        _log_change('dogs', 'SELECT NEW.dog_id AS id'),
+        _log_change('users', 'SELECT NEW.user_id AS id')]),
+    'sync_assignments_update': ('AFTER UPDATE ON user_dog_assignments', [
+        _log_change('dogs', 'SELECT OLD.dog_id AS id UNION SELECT NEW.dog_id'),
+        _log_change('users', 'SELECT OLD.user_id AS id UNION SELECT NEW.user_id')]),
+    'sync_assignments_delete': ('AFTER DELETE ON user_dog_assignments', [
+        _log_change('dogs', 'SELECT OLD.dog_id AS id'),
+        _log_change('users', 'SELECT OLD.user_id AS id')]),
+}
+
+def resolve_fields(fields, allowed: Dict[str, Any], presets: Dict[str, List[str]],
+                   required: tuple = ('id',)) -> Optional[List[str]]:
+    """Validate a field selection against a whitelist.
+    
+    `fields` is a comma-separated string or a list of field and preset names.
+    Returns the ordered list of fields to select (always including `required`),
+    or None when no selection was made. Raises ValueError for unknown names.
+    """
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    
+    selected = list(required)
+    for name in (f.strip() for f in fields):
+        if not name:
+            continue
+        expanded = presets.get(name, [name])
+        for field in expanded:
+            if field not in allowed:
+                raise ValueError(f"Unknown field: {field}")
+            if field not in selected:
+                selected.append(field)
+    return selected
+
+def build_select_list(fields: List[str], allowed: Dict[str, Any]) -> str:
+    """Build an SQL select list for whitelisted fields"""
+    return ', '.join(f"{allowed[field]} AS {field}" for field in fields if allowed[field])
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection that returns itself to its pool on close()"""
+    
+    def close(self):
+        if getattr(self, '_pinned', False):
+            return  # Held by DatabaseManager.pinned_connection() until it exits
+        pool = getattr(self, '_pool', None)
+        if pool is not None:
+            pool.release(self)
+        else:
+            super().close()
+    
+    def close_underlying(self):
+        """Really close the SQLite handle (used by the pool)"""
+        self._pool = None
+        sqlite3.Connection.close(self)
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by all threads.
+    
+    Connections are configured (WAL, busy timeout) once when they are opened
+    and health-checked when they are handed out. If every pooled connection
+    is busy for longer than checkout_timeout, a temporary overflow connection
+    is opened instead of failing the request; it is closed on release.
+    """
+    
+    def __init__(self, db_path: str, max_size: int = 8, timeout: float = 30.0,
+                 checkout_timeout: float = 5.0):
         self.db_path = db_path
-        self.init_database()
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.checkout_timeout = checkout_timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open_count = 0
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'overflow': 0,
+            'discarded': 0,
+            'waits': 0,
+            'wait_time_ms': 0.0
+        }
     
-    def get_connection(self):
-        """Get database connection with timeout and better settings"""
-        conn = sqlite3.connect(self.db_path, timeout=30.0)
+    def _open(self, overflow: bool = False) -> PooledConnection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout,
+                               factory=PooledConnection, check_same_thread=False)
         conn.row_factory = sqlite3.Row  # Enable column access by name
         # Enable WAL mode for better concurrency
         conn.execute("PRAGMA journal_mode=WAL")
         # Set busy timeout
-        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        conn._pool = self
+        conn._overflow = overflow
+        conn._checked_out = True
         return conn
     
+    def _is_healthy(self, conn: PooledConnection) -> bool:
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def _discard(self, conn: PooledConnection):
+        try:
+            conn.close_underlying()
+        except sqlite3.Error:
+            pass
+    
+    def acquire(self) -> PooledConnection:
+        """Check a connection out of the pool"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+            
+            if conn is None:
+                with self._lock:
+                    can_open = self._open_count < self.max_size
+                    if can_open:
+                        self._open_count += 1
+                        self._stats['created'] += 1
+                if can_open:
+                    try:
+                        return self._open()
+                    except Exception:
+                        with self._lock:
+                            self._open_count -= 1
+                        raise
+                
+                # Pool exhausted - wait for a connection to be released
+                started = time.monotonic()
+                try:
+                    conn = self._idle.get(timeout=self.checkout_timeout)
+                except queue.Empty:
+                    conn = None
+                with self._lock:
+                    self._stats['waits'] += 1
+                    self._stats['wait_time_ms'] += (time.monotonic() - started) * 1000
+                    if conn is None:
+                        self._stats['overflow'] += 1
+                if conn is None:
+                    return self._open(overflow=True)
+            
+            if self._is_healthy(conn):
+                conn._checked_out = True
+                with self._lock:
+                    self._stats['reused'] += 1
+                return conn
+            
+            self._discard(conn)
+            with self._lock:
+                self._open_count -= 1
+                self._stats['discarded'] += 1
+    
+    def release(self, conn: PooledConnection):
+        """Return a connection to the pool"""
+        if not getattr(conn, '_checked_out', False):
+            return  # Already released
+        conn._checked_out = False
+        
+        if conn._overflow:
+            self._discard(conn)
+            return
+        
+        try:
+            # Never hand out a connection with a half-finished transaction
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            self._discard(conn)
+            with self._lock:
+                self._open_count -= 1
+                self._stats['discarded'] += 1
+            return
+        
+        self._idle.put(conn)
+    
+    def close_all(self):
+        """Close every idle connection in the pool"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+            with self._lock:
+                self._open_count -= 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['open'] = self._open_count
+        stats['idle'] = self._idle.qsize()
+        stats['in_use'] = stats['open'] - stats['idle']
+        stats['max_size'] = self.max_size
+        stats['wait_time_ms'] = round(stats['wait_time_ms'], 2)
+        return stats
+
+def _seconds_until(timestamp) -> float:
+    """Seconds until a stored timestamp, on the UTC clock of SQLite's CURRENT_TIMESTAMP"""
+    try:
+        moment = datetime.fromisoformat(str(timestamp))
+    except ValueError:
+        return float('inf')
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return (moment.replace(tzinfo=None) - now).total_seconds()
+
+class SessionCache:
+    """TTL-bounded LRU cache of validated sessions.
+    
+    Entries include user details and assigned dog names, so DatabaseManager
+    drops them whenever users, assignments or dogs change. Also collects
+    last_accessed touches so they can be written to the database in
+    periodic batches instead of one UPDATE per validation.
+    """
+    
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # session_token -> (expires_at monotonic, session_data)
+        self._touches = {}  # session_token -> last_accessed timestamp
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._generation = 0  # bumped by every invalidation
+    
+    def generation(self) -> int:
+        """Read before a database lookup and pass to put()"""
+        with self._lock:
+            return self._generation
+    
+    def get(self, session_token: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of the cached session data, or None if missing or stale"""
+        with self._lock:
+            entry = self._entries.get(session_token)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[session_token]
+                self._stats['misses'] += 1
+                return None
+            
+            self._entries.move_to_end(session_token)
+            self._stats['hits'] += 1
+            return dict(entry[1])
+    
+    def put(self, session_token: str, session_data: Dict[str, Any], generation: Optional[int] = None):
+        """Cache session data for up to ttl seconds, never past the session's expires_at.
+        
+        Skipped if anything was invalidated since `generation` was read, so a
+        lookup that raced a logout cannot cache the session it just ended.
+        """
+        lifetime = min(self.ttl, _seconds_until(session_data.get('expires_at')))
+        if lifetime <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[session_token] = (time.monotonic() + lifetime, dict(session_data))
+            self._entries.move_to_end(session_token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+    
+    def invalidate(self, session_token: str):
+        """Drop one session from the cache"""
+        with self._lock:
+            self._entries.pop(session_token, None)
+            self._generation += 1
+    
+    def invalidate_user(self, user_id: int):
+        """Drop every cached session belonging to a user"""
+        with self._lock:
+            for token in [t for t, (_, data) in self._entries.items() if data.get('user_id') == user_id]:
+                del self._entries[token]
+            self._generation += 1
+    
+    def clear(self):
+        """Drop all cached sessions"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+    
+    def touch(self, session_token: str):
+        """Record that a session was just used (written later by a flush)"""
+        # Same format as SQLite's CURRENT_TIMESTAMP
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            self._touches[session_token] = now
+    
+    def drain_touches(self) -> Dict[str, str]:
+        """Take all pending last_accessed updates"""
+        with self._lock:
+            touches, self._touches = self._touches, {}
+            return touches
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['pending_touches'] = len(self._touches)
+        stats['max_size'] = self.max_size
+        stats['ttl'] = self.ttl
+        return stats
+
+class DatabaseManager:
+    def __init__(self, db_path: str = "k9_management.db", pool_size: int = 8,
+                 signature_blob_dir: str = "signature_blobs", care_plans_dir: str = "care-plans"):
+        self.db_path = db_path
+        self.care_plans_dir = care_plans_dir
+        self.care_plan_search_enabled = False
+        self.pool = ConnectionPool(db_path, max_size=pool_size)
+        self._pinned = threading.local()
+        self.signature_store = BlobStore(signature_blob_dir, '/signature-blobs/')
+        self.session_cache = SessionCache()
+        self.session_flush_interval = 30.0  # seconds between last_accessed batch writes
+        self._session_flusher = None
+        self._session_flusher_lock = threading.Lock()
+        self.stats_reconcile_interval = 3600.0  # seconds between dashboard counter reconciliations
+        self._stats_reconciler = None
+        self._stats_reconciler_lock = threading.Lock()
+        self.init_database()
+    
+    def get_connection(self):
+        """Get a pooled database connection (close() returns it to the pool)"""
+        conn = getattr(self._pinned, 'conn', None)
+        if conn is not None:
+            return conn
+        return self.pool.acquire()
+    
+    @contextmanager
+    def pinned_connection(self):
+        """Serve every get_connection() in this thread from one pooled connection.
+        
+        Lets a series of read-only calls share a connection instead of checking
+        one out per query. The connection is put in query_only mode meanwhile,
+        so a write raises sqlite3.OperationalError instead of sharing a
+        transaction with whatever an enclosing call left uncommitted.
+        """
+        if getattr(self._pinned, 'conn', None) is not None:
+            yield self._pinned.conn
+            return
+        
+        conn = self.pool.acquire()
+        conn._pinned = True
+        conn.execute("PRAGMA query_only=ON")
+        self._pinned.conn = conn
+        try:
+            yield conn
+        finally:
+            self._pinned.conn = None
+            conn._pinned = False
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute("PRAGMA query_only=OFF")
+            conn.close()
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics"""
+        return self.pool.get_stats()
+    
     def init_database(self):
         """Initialize database with tables"""
         conn = self.get_connection()
@@ -42,6 +578,7 @@ class DatabaseManager:
                     email TEXT,
                     phone TEXT,
                     department TEXT,
+                    signature TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
@@ -202,10 +739,57 @@ class DatabaseManager:
                 )
             ''')
             
+            # One-time data migrations that have already been applied
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    name TEXT PRIMARY KEY,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Care plan documents (PDF files live in care_plans_dir)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS care_plans (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    filename TEXT UNIQUE NOT NULL,
+                    original_name TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    upload_date TIMESTAMP NOT NULL,
+                    sha256 TEXT,
+                    text_status TEXT DEFAULT 'pending' CHECK (text_status IN ('pending', 'done', 'failed')),
+                    page_count INTEGER
+                )
+            ''')
+            
+            # Dashboard statistics, maintained incrementally by triggers
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS dashboard_counters (
+                    metric TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (metric, key)
+                )
+            ''')
+            
+            # Latest change per synced row, read by /api/sync. AUTOINCREMENT keeps
+            # seq strictly increasing so it can serve as the clients' watermark
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS change_log (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    table_name TEXT NOT NULL,
+                    row_id INTEGER NOT NULL,
+                    op TEXT NOT NULL CHECK (op IN ('upsert', 'delete')),
+                    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
             # Create indexes for better performance
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_dogs_chip_id ON dogs(chip_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_dogs_trainer_id ON dogs(trainer_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_dogs_name ON dogs(name)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_care_plans_upload_date ON care_plans(upload_date, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_change_log_row ON change_log(table_name, row_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_journals_dog_id ON training_journals(dog_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_journals_date ON training_journals(journal_date)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_assignments_user_dog ON user_dog_assignments(user_id, dog_id)')
@@ -213,14 +797,42 @@ class DatabaseManager:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON user_sessions(user_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON user_sessions(expires_at)')
             
+            # Composite indexes backing keyset pagination on (journal_date, created_at, id)
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_journals_keyset ON training_journals(journal_date, created_at, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_journals_status_keyset ON training_journals(approval_status, journal_date, created_at, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_journals_trainer_keyset ON training_journals(trainer_id, journal_date, created_at, id)')
+            # Also serves (dog_id, journal_date) lookups through its prefix
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_journals_dog_keyset ON training_journals(dog_id, journal_date, created_at, id)')
+            
+            # Add users.signature to databases created before it was in the schema
+            self.migrate_user_signature_column(cursor)
+            
             # Add signature fields to existing training_journals table if they don't exist
             self.migrate_signature_fields(cursor)
             
+            # Move inline signature images out of journal rows into the blob store
+            self.migrate_signature_blobs(cursor)
+            
+            # Install counter triggers and seed the counters on first run
+            self.migrate_dashboard_counters(cursor)
+            
+            # Import care plan metadata from the legacy metadata.json
+            self.migrate_care_plan_metadata(cursor)
+            
+            # Content hashes let identical care plan uploads be deduplicated
+            self.migrate_care_plan_hashes(cursor)
+            
+            # Full-text search over extracted care plan pages
+            self.migrate_care_plan_text(cursor)
+            
+            # Install change log triggers and log every existing row once
+            self.migrate_change_log(cursor)
+            
             conn.commit()
-            print("✅ Database initialized successfully")
+            logger.info("✅ Database initialized successfully")
             
         except Exception as e:
-            print(f"❌ Error initializing database: {e}")
+            logger.error("❌ Error initializing database: %s", e)
             conn.rollback()
             raise
         finally:
@@ -246,15 +858,188 @@ class DatabaseManager:
                 if field not in columns:
                     if 'signature' in field and 'timestamp' not in field:
                         cursor.execute(f"ALTER TABLE training_journals ADD COLUMN {field} TEXT")
-                        print(f"✅ Added {field} column to training_journals table")
+                        logger.info("✅ Added %s column to training_journals table", field)
                     elif 'timestamp' in field:
                         cursor.execute(f"ALTER TABLE training_journals ADD COLUMN {field} TIMESTAMP")
-                        print(f"✅ Added {field} column to training_journals table")
+                        logger.info("✅ Added %s column to training_journals table", field)
                         
         except Exception as e:
-            print(f"⚠️ Warning: Could not migrate signature fields: {e}")
+            logger.warning("⚠️ Could not migrate signature fields: %s", e)
             # Continue execution - the fields will be created with new tables
     
+    def is_migration_applied(self, cursor, name: str) -> bool:
+        """Check whether a one-time data migration has already run"""
+        cursor.execute('SELECT 1 FROM schema_migrations WHERE name = ?', (name,))
+        return cursor.fetchone() is not None
+    
+    def mark_migration_applied(self, cursor, name: str):
+        """Record that a one-time data migration has run"""
+        cursor.execute('INSERT OR IGNORE INTO schema_migrations (name) VALUES (?)', (name,))
+    
+    def migrate_signature_blobs(self, cursor):
+        """Convert inline signature image data in training_journals into blob references"""
+        if self.is_migration_applied(cursor, 'signature_blobs'):
+            return
+        
+        cursor.execute('''
+            SELECT id, hlv_signature, leader_signature, substitute_signature
+            FROM training_journals
+            WHERE hlv_signature LIKE '%data:image/%'
+               OR leader_signature LIKE '%data:image/%'
+               OR substitute_signature LIKE '%data:image/%'
+        ''')
+        rows = cursor.fetchall()
+        
+        for row in rows:
+            updates = {}
+            for column in SIGNATURE_COLUMNS:
+                value = self.signature_store.externalize_signature(row[column])
+                if value != row[column]:
+                    updates[column] = value
+            
+            if updates:
+                assignments = ', '.join(f"{column} = ?" for column in updates)
+                cursor.execute(f"UPDATE training_journals SET {assignments} WHERE id = ?",
+                               (*updates.values(), row['id']))
+        
+        self.mark_migration_applied(cursor, 'signature_blobs')
+        if rows:
+            logger.info("✅ Moved inline signatures of %d journals to the blob store", len(rows))
+    
+    def migrate_dashboard_counters(self, cursor):
+        """Install dashboard counter triggers and seed the counters from existing rows"""
+        for name, (event, statements) in DASHBOARD_COUNTER_TRIGGERS.items():
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {name} {event}
+                BEGIN{''.join(statements)}
+                END
+            ''')
+        
+        if self.is_migration_applied(cursor, 'dashboard_counters'):
+            return
+        
+        self._rebuild_dashboard_counters(cursor)
+        self.mark_migration_applied(cursor, 'dashboard_counters')
+    
+    def migrate_care_plan_metadata(self, cursor):
+        """Import care plans on disk (and their metadata.json entries) into care_plans"""
+        if self.is_migration_applied(cursor, 'care_plan_metadata'):
+            return
+        
+        metadata = {}
+        metadata_file = os.path.join(self.care_plans_dir, 'metadata.json')
+        if os.path.exists(metadata_file):
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("⚠️ Could not read care plan metadata: %s", e)
+        
+        imported = 0
+        if os.path.isdir(self.care_plans_dir):
+            for filename in os.listdir(self.care_plans_dir):
+                if not filename.lower().endswith('.pdf'):
+                    continue
+                file_stat = os.stat(os.path.join(self.care_plans_dir, filename))
+                entry = metadata.get(filename, {})
+                cursor.execute('''
+                    INSERT OR IGNORE INTO care_plans (filename, original_name, size, upload_date)
+                    VALUES (?, ?, ?, ?)
+                ''', (
+                    filename,
+                    entry.get('original_name', filename),
+                    file_stat.st_size,
+                    entry.get('upload_date', datetime.fromtimestamp(file_stat.st_ctime).isoformat())
+                ))
+                imported += cursor.rowcount
+        
+        self.mark_migration_applied(cursor, 'care_plan_metadata')
+        if imported:
+            logger.info("✅ Imported %d care plans into the database", imported)
+    
+    def migrate_user_signature_column(self, cursor):
+        """Add the users.signature column that create_user and USER_FIELDS rely on"""
+        cursor.execute("PRAGMA table_info(users)")
+        if 'signature' not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE users ADD COLUMN signature TEXT")
+    
+    def migrate_care_plan_hashes(self, cursor):
+        """Add the care_plans.sha256 column and hash the care plans already stored"""
+        cursor.execute("PRAGMA table_info(care_plans)")
+        if 'sha256' not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE care_plans ADD COLUMN sha256 TEXT")
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_care_plans_sha256 ON care_plans(sha256)')
+        
+        if self.is_migration_applied(cursor, 'care_plan_hashes'):
+            return
+        
+        cursor.execute('SELECT id, filename FROM care_plans WHERE sha256 IS NULL')
+        for row in cursor.fetchall():
+            path = os.path.join(self.care_plans_dir, row['filename'])
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                tmp_path, sha256, _ = stream_to_temp(f, self.care_plans_dir)
+            os.remove(tmp_path)
+            try:
+                cursor.execute('UPDATE care_plans SET sha256 = ? WHERE id = ?', (sha256, row['id']))
+            except sqlite3.IntegrityError:
+                # Identical copies uploaded before deduplication keep a NULL hash
+                pass
+        
+        self.mark_migration_applied(cursor, 'care_plan_hashes')
+    
+    def migrate_care_plan_text(self, cursor):
+        """Add text extraction columns to care_plans and create the page search index"""
+        cursor.execute("PRAGMA table_info(care_plans)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if 'text_status' not in columns:
+            cursor.execute("ALTER TABLE care_plans ADD COLUMN text_status TEXT DEFAULT 'pending'")
+        if 'page_count' not in columns:
+            cursor.execute("ALTER TABLE care_plans ADD COLUMN page_count INTEGER")
+        
+        try:
+            # remove_diacritics lets "cho nghiep vu" match "chó nghiệp vụ"
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS care_plan_pages USING fts5(
+                    text,
+                    care_plan_id UNINDEXED,
+                    page_number UNINDEXED,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            ''')
+            self.care_plan_search_enabled = True
+        except sqlite3.OperationalError as e:
+            logger.warning("⚠️ Care plan search disabled, SQLite has no FTS5: %s", e)
+            self.care_plan_search_enabled = False
+    
+    def migrate_change_log(self, cursor):
+        """Install change log triggers and seed the log with the rows that already exist"""
+        for name, (event, statements) in CHANGE_LOG_TRIGGERS.items():
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {name} {event}
+                BEGIN{''.join(statements)}
+                END
+            ''')
+        
+        if self.is_migration_applied(cursor, 'change_log'):
+            return
+        
+        for table, source in (('users', 'users'), ('dogs', 'dogs'), ('journals', 'training_journals')):
+            cursor.execute(f'''
+                INSERT INTO change_log (table_name, row_id, op)
+                SELECT '{table}', id, 'upsert' FROM {source} ORDER BY id
+            ''')
+        self.mark_migration_applied(cursor, 'change_log')
+    
+    def externalize_journal_signatures(self, journal_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a copy of journal_data with inline signature images replaced by blob URLs"""
+        journal_data = dict(journal_data)
+        for column in SIGNATURE_COLUMNS:
+            if journal_data.get(column):
+                journal_data[column] = self.signature_store.externalize_signature(journal_data[column])
+        return journal_data
+    
     def hash_password(self, password: str) -> str:
         """Return password as-is (no encryption)"""
         return password
@@ -349,24 +1134,29 @@ class DatabaseManager:
         finally:
             conn.close()
     
-    def get_all_users(self) -> List[Dict[str, Any]]:
-        """Get all users with assigned dogs"""
+    def get_all_users(self, fields=None) -> List[Dict[str, Any]]:
+        """Get all users with assigned dogs
+        
+        `fields` optionally restricts the returned keys (see USER_FIELDS).
+        """
+        fields = resolve_fields(fields, USER_FIELDS, FIELD_PRESETS['users'])
+        select_list = build_select_list(fields, USER_FIELDS) if fields else 'u.*'
+        include_dogs = fields is None or 'assignedDogs' in fields
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute('SELECT * FROM users ORDER BY created_at DESC')
+            if include_dogs:
+                cursor.execute(self._users_with_dogs_query(select_list) + ' ORDER BY u.created_at DESC')
+            else:
+                cursor.execute(f'SELECT {select_list} FROM users u ORDER BY u.created_at DESC')
             rows = cursor.fetchall()
             
             users = []
             for row in rows:
-                user = dict(row)
-                del user['password']  # Remove password from response
-                
-                # Get assigned dogs for this user
-                assigned_dog_names = self.get_user_assigned_dog_names(user['id'])
-                user['assignedDogs'] = assigned_dog_names
-                
+                user = self._user_from_row(row) if include_dogs else dict(row)
+                user.pop('password', None)  # Remove password from response
                 users.append(user)
             
             return users
@@ -374,6 +1164,31 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    def _users_with_dogs_query(self, select_list: str = 'u.*') -> str:
+        """SELECT over users u with each user's active dog names aggregated in one column.
+        
+        Names are joined with the ASCII unit separator so that dog names
+        containing commas survive; use _user_from_row to split them.
+        """
+        return f'''
+            SELECT {select_list}, ad.dog_names AS assigned_dog_names
+            FROM users u
+            LEFT JOIN (
+                SELECT uda.user_id, GROUP_CONCAT(d.name, char(31)) AS dog_names
+                FROM user_dog_assignments uda
+                JOIN dogs d ON d.id = uda.dog_id
+                WHERE uda.status = 'ACTIVE'
+                GROUP BY uda.user_id
+            ) ad ON ad.user_id = u.id
+        '''
+    
+    def _user_from_row(self, row) -> Dict[str, Any]:
+        """Convert a _users_with_dogs_query row into a user dict with assignedDogs"""
+        user = dict(row)
+        dog_names = user.pop('assigned_dog_names', None)
+        user['assignedDogs'] = sorted(dog_names.split('\x1f')) if dog_names else []
+        return user
+    
     def update_user(self, user_id: int, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update user"""
         conn = self.get_connection()
@@ -403,6 +1218,7 @@ class DatabaseManager:
                 self.update_user_dog_assignments_with_connection(cursor, user_id, assigned_dogs)
             
             conn.commit()
+            self.session_cache.invalidate_user(user_id)
             
             # Return updated user with assigned dogs
             return self.get_user_by_id_with_dogs(user_id)
@@ -413,23 +1229,29 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    def get_user_id_map(self) -> Dict[str, int]:
+        """Map user names to IDs (the newest user wins on duplicate names)"""
+        conn = self.get_connection()
+        
+        try:
+            rows = conn.execute('SELECT id, name FROM users ORDER BY created_at ASC').fetchall()
+            return {row['name']: row['id'] for row in rows}
+            
+        finally:
+            conn.close()
+    
     def get_user_by_id_with_dogs(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user by ID with assigned dogs"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
+            cursor.execute(self._users_with_dogs_query() + ' WHERE u.id = ?', (user_id,))
             row = cursor.fetchone()
             
             if row:
-                user = dict(row)
+                user = self._user_from_row(row)
                 del user['password']  # Remove password from response
-                
-                # Get assigned dogs for this user
-                assigned_dog_names = self.get_user_assigned_dog_names(user['id'])
-                user['assignedDogs'] = assigned_dog_names
-                
                 return user
             return None
             
@@ -444,6 +1266,7 @@ class DatabaseManager:
         try:
             cursor.execute('DELETE FROM users WHERE id = ?', (user_id,))
             conn.commit()
+            self.session_cache.invalidate_user(user_id)
             return cursor.rowcount > 0
             
         except Exception as e:
@@ -454,16 +1277,21 @@ class DatabaseManager:
     
     def authenticate_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """Authenticate user"""
-        user = self.get_user_by_username(username)
-        if user and password == user['password']:  # Plain text comparison
-            del user['password']  # Remove password from response
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute(self._users_with_dogs_query() + ' WHERE u.username = ?', (username,))
+            row = cursor.fetchone()
             
-            # Get assigned dogs for this user
-            assigned_dog_names = self.get_user_assigned_dog_names(user['id'])
-            user['assignedDogs'] = assigned_dog_names
+            if row and password == row['password']:  # Plain text comparison
+                user = self._user_from_row(row)
+                del user['password']  # Remove password from response
+                return user
+            return None
             
-            return user
-        return None
+        finally:
+            conn.close()
     
     # =============================================================================
     # DOG OPERATIONS
@@ -557,12 +1385,25 @@ class DatabaseManager:
         finally:
             conn.close()
     
-    def get_all_dogs(self) -> List[Dict[str, Any]]:
-        """Get all dogs with trainer information from user_dog_assignments table"""
+    def get_dog_id_map(self) -> Dict[str, int]:
+        """Map dog names to IDs (the newest dog wins on duplicate names)"""
+        conn = self.get_connection()
+        
+        try:
+            rows = conn.execute('SELECT id, name FROM dogs ORDER BY created_at ASC').fetchall()
+            return {row['name']: row['id'] for row in rows}
+            
+        finally:
+            conn.close()
+    
+    def get_dog_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get the most recently created dog with the given name, with trainer information"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
+            # Restrict the assignment window to this dog's rows so the lookup
+            # stays an index search on dogs(name) instead of a full join
             cursor.execute('''
                 SELECT d.*, 
                        u.name as trainer_name, 
@@ -576,10 +1417,33 @@ class DatabaseManager:
                            ROW_NUMBER() OVER (PARTITION BY dog_id ORDER BY assigned_at DESC) as rn
                     FROM user_dog_assignments 
                     WHERE assignment_type = 'TRAINER' AND status = 'ACTIVE'
+                      AND dog_id IN (SELECT id FROM dogs WHERE name = ?)
                 ) uda ON d.id = uda.dog_id AND uda.rn = 1
                 LEFT JOIN users u ON uda.user_id = u.id
+                WHERE d.name = ?
                 ORDER BY d.created_at DESC
-            ''')
+                LIMIT 1
+            ''', (name, name))
+            
+            row = cursor.fetchone()
+            return dict(row) if row else None
+            
+        finally:
+            conn.close()
+    
+    def get_all_dogs(self, fields=None) -> List[Dict[str, Any]]:
+        """Get all dogs with trainer information from user_dog_assignments table
+        
+        `fields` optionally restricts the returned keys (see DOG_FIELDS).
+        """
+        fields = resolve_fields(fields, DOG_FIELDS, FIELD_PRESETS['dogs'])
+        select_list = build_select_list(fields, DOG_FIELDS) if fields else DOG_SELECT_LIST
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute(self._dogs_with_trainer_query(select_list) + ' ORDER BY d.created_at DESC')
             
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
@@ -587,6 +1451,20 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    def _dogs_with_trainer_query(self, select_list: str = 'd.*') -> str:
+        """SELECT over dogs d joined with each dog's current trainer (uda, u)"""
+        return f'''
+                SELECT {select_list}
+                FROM dogs d
+                LEFT JOIN (
+                    SELECT dog_id, user_id, assignment_type, assigned_at,
+                           ROW_NUMBER() OVER (PARTITION BY dog_id ORDER BY assigned_at DESC) as rn
+                    FROM user_dog_assignments 
+                    WHERE assignment_type = 'TRAINER' AND status = 'ACTIVE'
+                ) uda ON d.id = uda.dog_id AND uda.rn = 1
+                LEFT JOIN users u ON uda.user_id = u.id
+            '''
+    
     def update_dog(self, dog_id: int, dog_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update dog"""
         conn = self.get_connection()
@@ -610,6 +1488,7 @@ class DatabaseManager:
             
             cursor.execute(query, values)
             conn.commit()
+            self.session_cache.clear()
             
             return self.get_dog_by_id(dog_id)
             
@@ -627,6 +1506,7 @@ class DatabaseManager:
         try:
             cursor.execute('DELETE FROM dogs WHERE id = ?', (dog_id,))
             conn.commit()
+            self.session_cache.clear()
             return cursor.rowcount > 0
             
         except Exception as e:
@@ -651,6 +1531,7 @@ class DatabaseManager:
             ''', (user_id, dog_id, assignment_type))
             
             conn.commit()
+            self.session_cache.invalidate_user(user_id)
             return True
             
         except Exception as e:
@@ -728,6 +1609,7 @@ class DatabaseManager:
                     ''', (user_id, dog_id))
             
             conn.commit()
+            self.session_cache.invalidate_user(user_id)
             return True
             
         except Exception as e:
@@ -779,6 +1661,7 @@ class DatabaseManager:
             ''', (user_id, dog_id))
             
             conn.commit()
+            self.session_cache.invalidate_user(user_id)
             return cursor.rowcount > 0
             
         except Exception as e:
@@ -791,57 +1674,52 @@ class DatabaseManager:
     # TRAINING JOURNAL OPERATIONS
     # =============================================================================
     
+    def _journal_insert_params(self, journal_data: Dict[str, Any]) -> tuple:
+        """Build the JOURNAL_INSERT_SQL parameters for one journal"""
+        journal_data = self.externalize_journal_signatures(journal_data)
+        now = datetime.now().isoformat()
+        return (
+            journal_data['dog_id'],
+            journal_data['trainer_id'],
+            journal_data['journal_date'],
+            journal_data.get('training_activities'),
+            journal_data.get('care_activities'),
+            journal_data.get('operation_activities'),
+            journal_data.get('health_status'),
+            journal_data.get('behavior_notes'),
+            journal_data.get('weather_conditions'),
+            journal_data.get('training_duration'),
+            journal_data.get('success_rate'),
+            journal_data.get('challenges'),
+            journal_data.get('next_goals'),
+            journal_data.get('approval_status', 'PENDING'),  # Default to PENDING
+            journal_data.get('approved_by'),
+            journal_data.get('approved_at'),
+            journal_data.get('rejection_reason'),
+            now,  # created_at
+            now,  # updated_at
+            journal_data.get('hlv_signature'),
+            journal_data.get('leader_signature'),
+            journal_data.get('substitute_signature'),
+            journal_data.get('hlv_signature_timestamp'),
+            journal_data.get('leader_signature_timestamp'),
+            journal_data.get('substitute_signature_timestamp')
+        )
+    
     def create_training_journal(self, journal_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create training journal entry"""
+        params = self._journal_insert_params(journal_data)
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute('''
-                INSERT INTO training_journals (
-                    dog_id, trainer_id, journal_date, training_activities, care_activities,
-                    operation_activities, health_status, behavior_notes, weather_conditions,
-                    training_duration, success_rate, challenges, next_goals, approval_status,
-                    approved_by, approved_at, rejection_reason, created_at, updated_at,
-                    hlv_signature, leader_signature, substitute_signature,
-                    hlv_signature_timestamp, leader_signature_timestamp, substitute_signature_timestamp
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                journal_data['dog_id'],
-                journal_data['trainer_id'],
-                journal_data['journal_date'],
-                journal_data.get('training_activities'),
-                journal_data.get('care_activities'),
-                journal_data.get('operation_activities'),
-                journal_data.get('health_status'),
-                journal_data.get('behavior_notes'),
-                journal_data.get('weather_conditions'),
-                journal_data.get('training_duration'),
-                journal_data.get('success_rate'),
-                journal_data.get('challenges'),
-                journal_data.get('next_goals'),
-                journal_data.get('approval_status', 'PENDING'),  # Default to PENDING
-                journal_data.get('approved_by'),
-                journal_data.get('approved_at'),
-                journal_data.get('rejection_reason'),
-                datetime.now().isoformat(),  # created_at
-                datetime.now().isoformat(),  # updated_at
-                journal_data.get('hlv_signature'),
-                journal_data.get('leader_signature'),
-                journal_data.get('substitute_signature'),
-                journal_data.get('hlv_signature_timestamp'),
-                journal_data.get('leader_signature_timestamp'),
-                journal_data.get('substitute_signature_timestamp')
-            ))
+            cursor.execute(JOURNAL_INSERT_SQL, params)
             
             journal_id = cursor.lastrowid
-            print(f"Created journal with ID: {journal_id}")
             conn.commit()
-            print(f"Transaction committed")
+            logger.debug("Created journal with ID: %s", journal_id)
             
-            result = self.get_training_journal_by_id(journal_id)
-            print(f"Retrieved journal result: {result is not None}")
-            return result
+            return self.get_training_journal_by_id(journal_id)
             
         except Exception as e:
             conn.rollback()
@@ -849,98 +1727,106 @@ class DatabaseManager:
         finally:
             conn.close()
     
-    def get_training_journal_by_id(self, journal_id: int) -> Optional[Dict[str, Any]]:
-        """Get training journal by ID"""
+    def bulk_create_training_journals(self, journals: List[Dict[str, Any]],
+                                      chunk_size: int = 500) -> Dict[str, Any]:
+        """Insert many training journals with executemany, one transaction per chunk.
+        
+        If a chunk fails (e.g. a CHECK constraint), it is rolled back and its
+        rows are retried one by one so that only the offending rows are lost.
+        Returns the number of inserted rows and a list of (index, error) pairs,
+        where index is the position in `journals`.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        
+        inserted = 0
+        errors = []
+        
+        params = []
+        for index, journal_data in enumerate(journals):
+            try:
+                params.append((index, self._journal_insert_params(journal_data)))
+            except Exception as e:
+                errors.append((index, str(e)))
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            print(f"Looking for journal ID: {journal_id}")
-            
-            cursor.execute('''
-                SELECT tj.*, d.name as dog_name, d.chip_id, 
-                       t.name as trainer_name, a.name as approver_name,
-                       tj.hlv_signature, tj.leader_signature, tj.substitute_signature,
-                       tj.hlv_signature_timestamp, tj.leader_signature_timestamp, tj.substitute_signature_timestamp
-                FROM training_journals tj
-                JOIN dogs d ON tj.dog_id = d.id
-                JOIN users t ON tj.trainer_id = t.id
-                LEFT JOIN users a ON tj.approved_by = a.id
-                WHERE tj.id = ?
-            ''', (journal_id,))
-            
-            row = cursor.fetchone()
-            print(f"Query result: {row}")
+            for start in range(0, len(params), chunk_size):
+                chunk = params[start:start + chunk_size]
+                try:
+                    cursor.executemany(JOURNAL_INSERT_SQL, [row for _, row in chunk])
+                    conn.commit()
+                    inserted += len(chunk)
+                    continue
+                except sqlite3.Error:
+                    conn.rollback()
+                
+                # Isolate the bad rows of the failed chunk
+                for index, row in chunk:
+                    try:
+                        cursor.execute(JOURNAL_INSERT_SQL, row)
+                        inserted += 1
+                    except sqlite3.Error as e:
+                        errors.append((index, str(e)))
+                conn.commit()
             
-            if row:
-                result = dict(row)
-                print(f"Found journal: {result['id']} - {result['dog_name']} by {result['trainer_name']}")
-                return result
-            else:
-                print(f"No journal found with ID: {journal_id}")
-                return None
+            errors.sort()
+            return {"inserted": inserted, "errors": errors}
             
         except Exception as e:
-            print(f"Error in get_training_journal_by_id: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+            conn.rollback()
+            raise
         finally:
             conn.close()
     
-    def get_training_journals_by_dog(self, dog_id: int, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get training journals for a specific dog"""
+    def get_training_journal_by_id(self, journal_id: int, fields=None) -> Optional[Dict[str, Any]]:
+        """Get training journal by ID"""
+        select_list = self._journal_select_list(fields)
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute('''
-                SELECT tj.*, d.name as dog_name, d.chip_id, 
-                       t.name as trainer_name, a.name as approver_name,
-                       tj.hlv_signature, tj.leader_signature, tj.substitute_signature,
-                       tj.hlv_signature_timestamp, tj.leader_signature_timestamp, tj.substitute_signature_timestamp
+            cursor.execute(f'''
+                SELECT {select_list}
                 FROM training_journals tj
                 JOIN dogs d ON tj.dog_id = d.id
                 JOIN users t ON tj.trainer_id = t.id
                 LEFT JOIN users a ON tj.approved_by = a.id
-                WHERE tj.dog_id = ?
-                ORDER BY tj.journal_date DESC, tj.created_at DESC
-                LIMIT ?
-            ''', (dog_id, limit))
+                WHERE tj.id = ?
+            ''', (journal_id,))
             
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            row = cursor.fetchone()
+            if row:
+                return dict(row)
+            
+            logger.debug("No journal found with ID: %s", journal_id)
+            return None
             
+        except Exception as e:
+            logger.exception("Error in get_training_journal_by_id: %s", e)
+            return None
         finally:
             conn.close()
     
-    def get_all_training_journals(self, limit: int = 100) -> List[Dict[str, Any]]:
+    def get_training_journals_by_dog(self, dog_id: int, limit: Optional[int] = 50,
+                                     cursor: Optional[str] = None, fields=None) -> List[Dict[str, Any]]:
+        """Get training journals for a specific dog"""
+        return self._list_training_journals('tj.dog_id = ?', (dog_id,), limit, cursor, fields)
+    
+    def get_journals_by_dog_and_date(self, dog_id: int, journal_date: str) -> List[Dict[str, Any]]:
+        """Get all training journals for a dog on a specific date"""
+        return self._list_training_journals('tj.dog_id = ? AND tj.journal_date = ?', (dog_id, journal_date))
+    
+    def get_all_training_journals(self, limit: Optional[int] = 100,
+                                  cursor: Optional[str] = None, fields=None) -> List[Dict[str, Any]]:
         """Get all training journals"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                SELECT tj.*, d.name as dog_name, d.chip_id, 
-                       t.name as trainer_name, a.name as approver_name,
-                       tj.hlv_signature, tj.leader_signature, tj.substitute_signature,
-                       tj.hlv_signature_timestamp, tj.leader_signature_timestamp, tj.substitute_signature_timestamp
-                FROM training_journals tj
-                JOIN dogs d ON tj.dog_id = d.id
-                JOIN users t ON tj.trainer_id = t.id
-                LEFT JOIN users a ON tj.approved_by = a.id
-                ORDER BY tj.journal_date DESC, tj.created_at DESC
-                LIMIT ?
-            ''', (limit,))
-            
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
-            
-        finally:
-            conn.close()
+        return self._list_training_journals(None, (), limit, cursor, fields)
     
     def update_training_journal(self, journal_id: int, journal_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update training journal"""
+        journal_data = self.externalize_journal_signatures(journal_data)
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -975,6 +1861,7 @@ class DatabaseManager:
                                 rejection_reason: str = None, leader_signature: str = None, 
                                 leader_signature_timestamp: str = None) -> Dict[str, Any]:
         """Approve or reject training journal"""
+        leader_signature = self.signature_store.externalize_signature(leader_signature)
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -1016,81 +1903,92 @@ class DatabaseManager:
         finally:
             conn.close()
     
-    def get_training_journals_by_trainer(self, trainer_id: int) -> List[Dict[str, Any]]:
+    def get_training_journals_by_trainer(self, trainer_id: int, limit: Optional[int] = None,
+                                         cursor: Optional[str] = None, fields=None) -> List[Dict[str, Any]]:
         """Get training journals for a specific trainer"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                SELECT tj.*, d.name as dog_name, d.chip_id, 
-                       t.name as trainer_name, a.name as approver_name,
-                       tj.hlv_signature, tj.leader_signature, tj.substitute_signature,
-                       tj.hlv_signature_timestamp, tj.leader_signature_timestamp, tj.substitute_signature_timestamp
-                FROM training_journals tj
-                JOIN dogs d ON tj.dog_id = d.id
-                JOIN users t ON tj.trainer_id = t.id
-                LEFT JOIN users a ON tj.approved_by = a.id
-                WHERE tj.trainer_id = ?
-                ORDER BY tj.journal_date DESC, tj.created_at DESC
-            ''', (trainer_id,))
-            
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
-            
-        finally:
-            conn.close()
+        return self._list_training_journals('tj.trainer_id = ?', (trainer_id,), limit, cursor, fields)
     
-    def get_pending_journals(self) -> List[Dict[str, Any]]:
+    def get_pending_journals(self, limit: Optional[int] = None,
+                             cursor: Optional[str] = None, fields=None) -> List[Dict[str, Any]]:
         """Get all journals pending approval"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return self._list_training_journals("tj.approval_status = 'PENDING'", (), limit, cursor, fields)
+    
+    def get_approved_journals(self, limit: Optional[int] = None,
+                              cursor: Optional[str] = None, fields=None) -> List[Dict[str, Any]]:
+        """Get all approved journals"""
+        return self._list_training_journals("tj.approval_status = 'APPROVED'", (), limit, cursor, fields)
+    
+    def _journal_select_list(self, fields=None) -> str:
+        """SQL select list for journal queries, optionally restricted to `fields`.
         
-        try:
-            cursor.execute('''
-                SELECT tj.*, d.name as dog_name, d.chip_id, 
+        The pagination key (id, journal_date, created_at) is always selected.
+        """
+        fields = resolve_fields(fields, JOURNAL_FIELDS, FIELD_PRESETS['journals'],
+                                required=('id', 'journal_date', 'created_at'))
+        if fields:
+            return build_select_list(fields, JOURNAL_FIELDS)
+        
+        return '''tj.*, d.name as dog_name, d.chip_id, 
                        t.name as trainer_name, a.name as approver_name,
                        tj.hlv_signature, tj.leader_signature, tj.substitute_signature,
-                       tj.hlv_signature_timestamp, tj.leader_signature_timestamp, tj.substitute_signature_timestamp
+                       tj.hlv_signature_timestamp, tj.leader_signature_timestamp, tj.substitute_signature_timestamp'''
+    
+    def _list_training_journals(self, where: Optional[str], params: tuple,
+                                limit: Optional[int] = None, cursor: Optional[str] = None,
+                                fields=None) -> List[Dict[str, Any]]:
+        """Run a journal listing query, newest first, with optional keyset pagination.
+        
+        Rows are ordered by (journal_date, created_at, id) descending; passing the
+        cursor of the last row of a page returns the rows that follow it.
+        """
+        select_list = self._journal_select_list(fields)
+        conditions = [where] if where else []
+        values = list(params)
+        
+        if cursor:
+            conditions.append('(tj.journal_date, tj.created_at, tj.id) < (?, ?, ?)')
+            values.extend(self.decode_journal_cursor(cursor))
+        
+        query = f'''
+                SELECT {select_list}
                 FROM training_journals tj
                 JOIN dogs d ON tj.dog_id = d.id
                 JOIN users t ON tj.trainer_id = t.id
                 LEFT JOIN users a ON tj.approved_by = a.id
-                WHERE tj.approval_status = 'PENDING'
-                ORDER BY tj.journal_date DESC, tj.created_at DESC
-            ''')
-            
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
-            
-        finally:
-            conn.close()
-    
-    def get_approved_journals(self) -> List[Dict[str, Any]]:
-        """Get all approved journals"""
+            '''
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY tj.journal_date DESC, tj.created_at DESC, tj.id DESC'
+        
+        if limit is not None:
+            query += ' LIMIT ?'
+            values.append(limit)
+        
         conn = self.get_connection()
-        cursor = conn.cursor()
+        db_cursor = conn.cursor()
         
         try:
-            cursor.execute('''
-                SELECT tj.*, d.name as dog_name, d.chip_id, 
-                       t.name as trainer_name, a.name as approver_name,
-                       tj.hlv_signature, tj.leader_signature, tj.substitute_signature,
-                       tj.hlv_signature_timestamp, tj.leader_signature_timestamp, tj.substitute_signature_timestamp
-                FROM training_journals tj
-                JOIN dogs d ON tj.dog_id = d.id
-                JOIN users t ON tj.trainer_id = t.id
-                LEFT JOIN users a ON tj.approved_by = a.id
-                WHERE tj.approval_status = 'APPROVED'
-                ORDER BY tj.journal_date DESC, tj.created_at DESC
-            ''')
-            
-            rows = cursor.fetchall()
+            db_cursor.execute(query, values)
+            rows = db_cursor.fetchall()
             return [dict(row) for row in rows]
             
         finally:
             conn.close()
     
+    def encode_journal_cursor(self, journal: Dict[str, Any]) -> str:
+        """Build an opaque pagination cursor pointing after the given journal"""
+        key = [journal['journal_date'], journal['created_at'], journal['id']]
+        return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+    
+    def decode_journal_cursor(self, cursor: str) -> tuple:
+        """Decode a pagination cursor into its (journal_date, created_at, id) key"""
+        try:
+            key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            journal_date, created_at, journal_id = key
+            return (journal_date, created_at, int(journal_id))
+        except Exception:
+            raise ValueError("Invalid pagination cursor")
+    
     # =============================================================================
     # SESSION MANAGEMENT
     # =============================================================================
@@ -1126,13 +2024,27 @@ class DatabaseManager:
             conn.close()
     
     def validate_session(self, session_token: str) -> Optional[Dict[str, Any]]:
-        """Validate session token and return user info"""
+        """Validate session token and return user info (including assignedDogs)
+        
+        Validated sessions are served from session_cache for a short TTL.
+        The last_accessed update is deferred to flush_session_touches.
+        """
+        session_data = self.session_cache.get(session_token)
+        if session_data is not None:
+            self._touch_session(session_token)
+            return session_data
+        
+        generation = self.session_cache.generation()
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
             cursor.execute('''
-                SELECT us.*, u.name, u.username, u.role, u.status, u.email, u.phone, u.department
+                SELECT us.*, u.name, u.username, u.role, u.status, u.email, u.phone, u.department,
+                       (SELECT GROUP_CONCAT(d.name, char(31))
+                        FROM user_dog_assignments uda
+                        JOIN dogs d ON d.id = uda.dog_id
+                        WHERE uda.user_id = u.id AND uda.status = 'ACTIVE') AS assigned_dog_names
                 FROM user_sessions us
                 JOIN users u ON us.user_id = u.id
                 WHERE us.session_token = ? 
@@ -1143,28 +2055,68 @@ class DatabaseManager:
             
             row = cursor.fetchone()
             
-            if row:
-                # Update last accessed time
-                cursor.execute('''
-                    UPDATE user_sessions 
-                    SET last_accessed = CURRENT_TIMESTAMP 
-                    WHERE session_token = ?
-                ''', (session_token,))
-                conn.commit()
-                
-                # Return user info without password
-                session_data = dict(row)
-                if 'password' in session_data:
-                    del session_data['password']
-                return session_data
-            
-            return None
+        finally:
+            conn.close()
+        
+        if row:
+            # Return user info without password
+            session_data = self._user_from_row(row)
+            if 'password' in session_data:
+                del session_data['password']
+            
+            self.session_cache.put(session_token, session_data, generation)
+            self._touch_session(session_token)
+            return session_data
+        
+        return None
+    
+    def _touch_session(self, session_token: str):
+        """Queue a last_accessed update and make sure the flusher is running"""
+        self.session_cache.touch(session_token)
+        
+        if self._session_flusher is None:
+            with self._session_flusher_lock:
+                if self._session_flusher is None:
+                    self._session_flusher = threading.Thread(
+                        target=self._run_session_flusher, name='session-flusher', daemon=True)
+                    self._session_flusher.start()
+                    atexit.register(self.flush_session_touches)
+    
+    def _run_session_flusher(self):
+        while True:
+            time.sleep(self.session_flush_interval)
+            try:
+                self.flush_session_touches()
+            except Exception as e:
+                logger.warning("⚠️ Could not flush session access times: %s", e)
+    
+    def flush_session_touches(self) -> int:
+        """Write pending last_accessed updates in one transaction"""
+        touches = self.session_cache.drain_touches()
+        if not touches:
+            return 0
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.executemany('''
+                UPDATE user_sessions 
+                SET last_accessed = ? 
+                WHERE session_token = ?
+            ''', [(accessed_at, token) for token, accessed_at in touches.items()])
+            conn.commit()
+            return len(touches)
             
+        except Exception as e:
+            conn.rollback()
+            raise
         finally:
             conn.close()
     
     def invalidate_session(self, session_token: str) -> bool:
         """Invalidate a session token"""
+        self.session_cache.invalidate(session_token)
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -1176,6 +2128,8 @@ class DatabaseManager:
             ''', (session_token,))
             
             conn.commit()
+            # Again after the commit: a validation may have read the row meanwhile
+            self.session_cache.invalidate(session_token)
             return cursor.rowcount > 0
             
         finally:
@@ -1183,6 +2137,7 @@ class DatabaseManager:
     
     def invalidate_user_sessions(self, user_id: int) -> bool:
         """Invalidate all sessions for a user"""
+        self.session_cache.invalidate_user(user_id)
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -1194,6 +2149,8 @@ class DatabaseManager:
             ''', (user_id,))
             
             conn.commit()
+            # Again after the commit: a validation may have read the rows meanwhile
+            self.session_cache.invalidate_user(user_id)
             return cursor.rowcount > 0
             
         finally:
@@ -1201,6 +2158,7 @@ class DatabaseManager:
     
     def cleanup_expired_sessions(self) -> int:
         """Remove expired sessions"""
+        self.session_cache.clear()
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -1217,12 +2175,359 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    # =============================================================================
+    # CARE PLAN OPERATIONS
+    # =============================================================================
+    
+    def create_care_plan(self, original_name: str, size: int, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Record a care plan, reserving a unique filename derived from original_name.
+        
+        Name clashes get a numeric suffix (plan_1.pdf, plan_2.pdf, ...); the UNIQUE
+        constraint makes the reservation safe against concurrent uploads.
+        If a care plan with the same sha256 exists, no row is added: the existing
+        one gets a fresh upload_date and is returned with duplicate=True.
+        """
+        base_name, extension = os.path.splitext(original_name)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            counter = 0
+            while True:
+                if sha256:
+                    cursor.execute('''
+                        UPDATE care_plans SET upload_date = ? WHERE sha256 = ?
+                    ''', (datetime.now().isoformat(), sha256))
+                    if cursor.rowcount:
+                        conn.commit()
+                        cursor.execute('SELECT * FROM care_plans WHERE sha256 = ?', (sha256,))
+                        return dict(cursor.fetchone(), duplicate=True)
+                
+                filename = original_name if counter == 0 else f"{base_name}_{counter}{extension}"
+                counter += 1
+                # Files copied in by hand are not in the table but still taken
+                if os.path.exists(os.path.join(self.care_plans_dir, filename)):
+                    continue
+                try:
+                    cursor.execute('''
+                        INSERT INTO care_plans (filename, original_name, size, upload_date, sha256)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', (filename, original_name, size, datetime.now().isoformat(), sha256))
+                    conn.commit()
+                    break
+                except sqlite3.IntegrityError:
+                    # Filename taken, or the same content was stored concurrently
+                    conn.rollback()
+            
+            return dict(self.get_care_plan(filename), duplicate=False)
+            
+        finally:
+            conn.close()
+    
+    def get_care_plan(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Get care plan metadata by filename"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('SELECT * FROM care_plans WHERE filename = ?', (filename,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+    
+    def get_care_plans(self, limit: Optional[int] = None, cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get care plans, newest upload first, with optional keyset pagination"""
+        query = 'SELECT * FROM care_plans'
+        values = []
+        
+        if cursor:
+            query += ' WHERE (upload_date, id) < (?, ?)'
+            values.extend(self.decode_care_plan_cursor(cursor))
+        query += ' ORDER BY upload_date DESC, id DESC'
+        
+        if limit is not None:
+            query += ' LIMIT ?'
+            values.append(limit)
+        
+        conn = self.get_connection()
+        try:
+            return [dict(row) for row in conn.execute(query, values).fetchall()]
+        finally:
+            conn.close()
+    
+    def delete_care_plan(self, filename: str) -> bool:
+        """Delete care plan metadata and its indexed text; returns False if there was none"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            if self.care_plan_search_enabled:
+                cursor.execute('''
+                    DELETE FROM care_plan_pages
+                    WHERE care_plan_id = (SELECT id FROM care_plans WHERE filename = ?)
+                ''', (filename,))
+            cursor.execute('DELETE FROM care_plans WHERE filename = ?', (filename,))
+            conn.commit()
+            return cursor.rowcount > 0
+            
+        except Exception as e:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def get_care_plans_pending_text(self) -> List[Dict[str, Any]]:
+        """Get care plans whose text has not been extracted yet"""
+        conn = self.get_connection()
+        try:
+            rows = conn.execute("SELECT * FROM care_plans WHERE text_status = 'pending' ORDER BY id").fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+    
+    def set_care_plan_text_status(self, care_plan_id: int, status: str):
+        """Record the outcome of text extraction for a care plan"""
+        conn = self.get_connection()
+        try:
+            conn.execute('UPDATE care_plans SET text_status = ? WHERE id = ?', (status, care_plan_id))
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def store_care_plan_pages(self, care_plan_id: int, pages: List[str]):
+        """Replace the indexed text of a care plan with its extracted pages"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            if self.care_plan_search_enabled:
+                cursor.execute('DELETE FROM care_plan_pages WHERE care_plan_id = ?', (care_plan_id,))
+                cursor.executemany('''
+                    INSERT INTO care_plan_pages (text, care_plan_id, page_number) VALUES (?, ?, ?)
+                ''', [(text, care_plan_id, number) for number, text in enumerate(pages, 1) if text])
+            cursor.execute('''
+                UPDATE care_plans SET text_status = 'done', page_count = ? WHERE id = ?
+            ''', (len(pages), care_plan_id))
+            conn.commit()
+            
+        except Exception as e:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def get_care_plan_pages(self, filename: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the extracted text of a care plan page by page (None if not extracted)"""
+        care_plan = self.get_care_plan(filename)
+        if not care_plan or care_plan['text_status'] != 'done' or not self.care_plan_search_enabled:
+            return None
+        
+        conn = self.get_connection()
+        try:
+            rows = conn.execute('''
+                SELECT page_number, text FROM care_plan_pages
+                WHERE care_plan_id = ? ORDER BY page_number
+            ''', (care_plan['id'],)).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+    
+    def search_care_plans(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search over care plan pages, best matches first.
+        
+        Every word must appear on the page; the last word also matches as a prefix.
+        """
+        if not self.care_plan_search_enabled:
+            raise RuntimeError("Care plan search is not available")
+        
+        words = re.findall(r'\w+', query)
+        if not words:
+            raise ValueError("Search query is empty")
+        # Quote each word so user input can't inject FTS5 query syntax
+        match = ' '.join(f'"{word}"' for word in words) + '*'
+        
+        conn = self.get_connection()
+        try:
+            rows = conn.execute('''
+                SELECT cp.filename, cp.original_name, p.page_number,
+                       snippet(care_plan_pages, 0, '[', ']', '…', 16) as snippet,
+                       bm25(care_plan_pages) as score
+                FROM care_plan_pages p
+                JOIN care_plans cp ON cp.id = p.care_plan_id
+                WHERE care_plan_pages MATCH ?
+                ORDER BY score
+                LIMIT ?
+            ''', (match, limit)).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+    
+    def encode_care_plan_cursor(self, care_plan: Dict[str, Any]) -> str:
+        """Build an opaque pagination cursor pointing after the given care plan"""
+        key = [care_plan['upload_date'], care_plan['id']]
+        return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+    
+    def decode_care_plan_cursor(self, cursor: str) -> tuple:
+        """Decode a pagination cursor into its (upload_date, id) key"""
+        try:
+            key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            upload_date, care_plan_id = key
+            return (upload_date, int(care_plan_id))
+        except Exception:
+            raise ValueError("Invalid pagination cursor")
+    
+    # =============================================================================
+    # OFFLINE SYNC
+    # =============================================================================
+    
+    def get_changes(self, since: Optional[str] = None, limit: int = 500,
+                    tables: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Rows of users, dogs and journals changed after the `since` cursor.
+        
+        Returns {'changes': {table: {'upserted': [rows], 'deleted': [ids]}},
+        'cursor': ..., 'has_more': bool}. Rows have the same shape as the list
+        endpoints; deleted rows are tombstones carrying only their id. Without
+        a cursor every row is returned. Pass the returned cursor back to
+        continue from where this page ended. `tables` limits the result to some
+        of SYNC_TABLES; the cursor then only covers those tables.
+        """
+        tables = list(SYNC_TABLES) if tables is None else list(dict.fromkeys(tables))
+        unknown = [table for table in tables if table not in SYNC_TABLES]
+        if unknown or not tables:
+            raise ValueError(f"tables must be a subset of {', '.join(SYNC_TABLES)}")
+        
+        after_seq = self.decode_sync_cursor(since) if since else 0
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # One read transaction so the log and the rows come from the same snapshot
+            cursor.execute('BEGIN')
+            cursor.execute('''
+                SELECT seq, table_name, row_id, op FROM change_log
+                WHERE seq > ? AND table_name IN (SELECT value FROM json_each(?))
+                ORDER BY seq LIMIT ?
+            ''', (after_seq, json.dumps(tables), limit + 1))
+            entries = cursor.fetchall()
+            has_more = len(entries) > limit
+            entries = entries[:limit]
+            
+            changed = {'users': [], 'dogs': [], 'journals': []}
+            deleted = {'users': [], 'dogs': [], 'journals': []}
+            for entry in entries:
+                (changed if entry['op'] == 'upsert' else deleted)[entry['table_name']].append(entry['row_id'])
+            
+            def user_from_row(row):
+                user = self._user_from_row(row)
+                user.pop('password', None)  # Remove password from response
+                return user
+            
+            upserted = {
+                'users': self._sync_rows(cursor, self._users_with_dogs_query() + ' WHERE u.id IN ({ids})',
+                                         changed['users'], user_from_row),
+                'dogs': self._sync_rows(cursor, self._dogs_with_trainer_query(DOG_SELECT_LIST) + ' WHERE d.id IN ({ids})',
+                                        changed['dogs']),
+                'journals': self._sync_rows(cursor, f'''
+                    SELECT {self._journal_select_list()}
+                    FROM training_journals tj
+                    JOIN dogs d ON tj.dog_id = d.id
+                    JOIN users t ON tj.trainer_id = t.id
+                    LEFT JOIN users a ON tj.approved_by = a.id
+                    WHERE tj.id IN ({{ids}})
+                ''', changed['journals']),
+            }
+            conn.commit()
+            
+            changes = {}
+            for table in tables:
+                rows = upserted[table]
+                # A logged row that no longer joins (e.g. a journal of a deleted dog)
+                # is gone from the list endpoints too, so send a tombstone for it
+                found = {row['id'] for row in rows}
+                missing = [row_id for row_id in changed[table] if row_id not in found]
+                changes[table] = {'upserted': rows, 'deleted': deleted[table] + missing}
+            
+            last_seq = entries[-1]['seq'] if entries else after_seq
+            return {'changes': changes, 'cursor': self.encode_sync_cursor(last_seq), 'has_more': has_more}
+            
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def _sync_rows(self, cursor, query: str, ids: List[int], convert=dict) -> List[Dict[str, Any]]:
+        """Run query with {ids} bound to a list of ids (as a JSON array)"""
+        if not ids:
+            return []
+        cursor.execute(query.replace('{ids}', 'SELECT value FROM json_each(?)'), (json.dumps(ids),))
+        return [convert(row) for row in cursor.fetchall()]
+    
+    def encode_sync_cursor(self, seq: int) -> str:
+        """Build an opaque sync cursor from a change log sequence number"""
+        return base64.urlsafe_b64encode(json.dumps([seq]).encode('utf-8')).decode('ascii')
+    
+    def decode_sync_cursor(self, cursor: str) -> int:
+        """Decode a sync cursor into its change log sequence number"""
+        try:
+            key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            seq, = key
+            return int(seq)
+        except Exception:
+            raise ValueError("Invalid sync cursor")
+    
     # =============================================================================
     # STATISTICS AND REPORTS
     # =============================================================================
     
-    def get_dashboard_stats(self) -> Dict[str, Any]:
-        """Get dashboard statistics"""
+    def get_dashboard_stats(self, fresh: bool = False) -> Dict[str, Any]:
+        """Get dashboard statistics from the trigger-maintained counters.
+        
+        With fresh=True the statistics are recomputed from the source tables instead.
+        """
+        if fresh:
+            return self._compute_dashboard_stats()
+        
+        self._ensure_stats_reconciler()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            stats = {'user_roles': {}, 'dog_status': {}, 'journal_approval_status': {}}
+            groups = {
+                'active_user_roles': 'user_roles',
+                'dog_status': 'dog_status',
+                'journal_approval_status': 'journal_approval_status'
+            }
+            
+            cursor.execute('''
+                SELECT metric, key, count FROM dashboard_counters
+                WHERE metric IN ('active_user_roles', 'dog_status', 'journal_approval_status')
+                  AND count != 0
+            ''')
+            for row in cursor.fetchall():
+                # NULL column values are counted under the empty key
+                stats[groups[row['metric']]][row['key'] if row['key'] != '' else None] = row['count']
+            
+            stats['total_users'] = sum(stats['user_roles'].values())
+            stats['total_dogs'] = sum(stats['dog_status'].values())
+            stats['total_journals'] = sum(stats['journal_approval_status'].values())
+            
+            # Recent activity - one counter per journal date
+            cursor.execute('''
+                SELECT COALESCE(SUM(count), 0) as count FROM dashboard_counters
+                WHERE metric = 'journal_date' AND key >= date('now', '-7 days')
+            ''')
+            stats['recent_journals'] = cursor.fetchone()['count']
+            
+            return stats
+            
+        finally:
+            conn.close()
+    
+    def _compute_dashboard_stats(self) -> Dict[str, Any]:
+        """Compute dashboard statistics directly from the source tables"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -1262,13 +2567,67 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    def _rebuild_dashboard_counters(self, cursor):
+        cursor.execute('DELETE FROM dashboard_counters')
+        for sql in DASHBOARD_COUNTER_REBUILD_SQL:
+            cursor.execute(sql)
+    
+    def reconcile_dashboard_stats(self) -> int:
+        """Rebuild dashboard counters from the source tables.
+        
+        Returns the number of counters that had drifted from the real counts.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Take the write lock first so no trigger can run between snapshot and rebuild
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('SELECT metric, key, count FROM dashboard_counters WHERE count != 0')
+            before = {(row['metric'], row['key']): row['count'] for row in cursor.fetchall()}
+            
+            self._rebuild_dashboard_counters(cursor)
+            
+            cursor.execute('SELECT metric, key, count FROM dashboard_counters')
+            after = {(row['metric'], row['key']): row['count'] for row in cursor.fetchall()}
+            conn.commit()
+            
+            drifted = sum(1 for key in before.keys() | after.keys() if before.get(key) != after.get(key))
+            if drifted:
+                logger.warning("⚠️ Reconciled %d drifted dashboard counters", drifted)
+            return drifted
+            
+        except Exception as e:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def _ensure_stats_reconciler(self):
+        if self._stats_reconciler is None:
+            with self._stats_reconciler_lock:
+                if self._stats_reconciler is None:
+                    self._stats_reconciler = threading.Thread(
+                        target=self._run_stats_reconciler, name='stats-reconciler', daemon=True)
+                    self._stats_reconciler.start()
+    
+    def _run_stats_reconciler(self):
+        while True:
+            time.sleep(self.stats_reconcile_interval)
+            try:
+                self.reconcile_dashboard_stats()
+            except Exception as e:
+                logger.warning("⚠️ Could not reconcile dashboard statistics: %s", e)
+    
     # =============================================================================
     # DATA MIGRATION FROM JSON
     # =============================================================================
     
 
-# Global database instance
-db = DatabaseManager()
+# Global database instance - paths can be moved with $K9_DB_PATH and friends
+db = DatabaseManager(os.environ.get('K9_DB_PATH', 'k9_management.db'),
+                     signature_blob_dir=os.environ.get('K9_SIGNATURE_BLOB_DIR', 'signature_blobs'),
+                     care_plans_dir=os.environ.get('K9_CARE_PLANS_DIR', 'care-plans'))
 
 if __name__ == "__main__":
     # Initialize database
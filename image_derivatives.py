@@ -0,0 +1,221 @@
+"""
+K9 Management System - Image Derivatives
+Resizes and re-encodes photos and signature images on demand (e.g. a 480px
+WebP thumbnail of a multi-megabyte JPG) and keeps the results in a bounded
+disk cache keyed by the source content hash and the requested parameters
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+from app_logging import get_logger
+
+logger = get_logger('images')
+
+# Requested widths are rounded up to one of these, so arbitrary ?w= values
+# cannot fill the cache with near-identical copies
+DERIVATIVE_WIDTHS = (64, 128, 240, 320, 480, 640, 960, 1280, 1920)
+
+# fmt -> (Pillow format, mimetype, extension)
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', 'image/webp', '.webp'),
+    'jpeg': ('JPEG', 'image/jpeg', '.jpg'),
+    'png': ('PNG', 'image/png', '.png'),
+}
+FORMAT_ALIASES = {'jpg': 'jpeg'}
+# ?fmt=auto picks WebP for clients whose Accept header lists it, else the source format
+AUTO_FORMAT = 'auto'
+SOURCE_FORMATS = {'.jpg': 'jpeg', '.jpeg': 'jpeg', '.png': 'png', '.gif': 'png', '.webp': 'webp'}
+DERIVATIVE_QUALITY = 80
+
+class ImageSupportUnavailable(RuntimeError):
+    """The optional Pillow package is not installed"""
+
+def parse_derivative_args(args) -> Optional[Dict[str, Any]]:
+    """Read ?w= and ?fmt= from request args; None if no derivative was asked for.
+
+    Raises ValueError for values outside the supported set.
+    """
+    if 'w' not in args and 'fmt' not in args:
+        return None
+
+    width = None
+    if args.get('w'):
+        try:
+            requested = int(args['w'])
+        except ValueError:
+            raise ValueError("w must be an integer")
+        if requested <= 0:
+            raise ValueError("w must be positive")
+        width = next((allowed for allowed in DERIVATIVE_WIDTHS if allowed >= requested), DERIVATIVE_WIDTHS[-1])
+
+    fmt = args.get('fmt', '').lower() or None
+    fmt = FORMAT_ALIASES.get(fmt, fmt)
+    if fmt is not None and fmt != AUTO_FORMAT and fmt not in DERIVATIVE_FORMATS:
+        raise ValueError(f"fmt must be one of: {', '.join(sorted(DERIVATIVE_FORMATS) + [AUTO_FORMAT])}")
+
+    return {'width': width, 'fmt': fmt}
+
+def _render(source_path: str, width: Optional[int], fmt: str) -> bytes:
+    # Import Pillow here to avoid import errors if not installed
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        raise ImageSupportUnavailable("Pillow not installed. Please install with: pip install Pillow")
+
+    pil_format, _, _ = DERIVATIVE_FORMATS[fmt]
+    try:
+        with Image.open(source_path) as img:
+            img = ImageOps.exif_transpose(img)
+            if width is not None and img.width > width:
+                height = max(1, round(img.height * width / img.width))
+                img = img.resize((width, height), Image.LANCZOS)
+
+            if pil_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+                # JPEG has no alpha - flatten transparent signatures onto white
+                background = Image.new('RGB', img.size, 'white')
+                rgba = img.convert('RGBA')
+                background.paste(rgba, mask=rgba.getchannel('A'))
+                img = background
+            elif img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+                img = img.convert('RGBA')
+
+            output = io.BytesIO()
+            if pil_format == 'PNG':
+                img.save(output, pil_format, optimize=True)
+            else:
+                img.save(output, pil_format, quality=DERIVATIVE_QUALITY, optimize=pil_format == 'JPEG')
+            return output.getvalue()
+    except OSError as e:
+        raise ValueError(f"Could not read image: {e}")
+
+class ImageDerivativeCache:
+    """Disk cache of resized images, evicting least-recently-used files over max_bytes"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 200 * 1024 * 1024, max_concurrent: int = 2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # filename -> size, least recently used first
+        self._total_bytes = 0
+        self._hashes = {}  # source path -> (mtime_ns, size, sha256)
+        self._building = {}  # filename -> lock held while that derivative is rendered
+        self._lock = threading.Lock()
+        # Resizing is CPU-bound, so only a few renders run at once
+        self._render_slots = threading.BoundedSemaphore(max_concurrent)
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        files = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, filename, size in sorted(files):
+            self._entries[filename] = size
+            self._total_bytes += size
+
+    def source_hash(self, path: str) -> str:
+        """SHA-256 of a source image, recomputed only when the file changes"""
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._hashes.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        with self._lock:
+            self._hashes[path] = (stat.st_mtime_ns, stat.st_size, sha256)
+        return sha256
+
+    def get(self, source_path: str, width: Optional[int] = None, fmt: Optional[str] = None) -> Dict[str, Any]:
+        """Return the cached derivative of a source image, rendering it on a miss"""
+        extension = os.path.splitext(source_path)[1].lower()
+        if extension not in SOURCE_FORMATS:
+            raise ValueError("Unsupported image type")
+        fmt = fmt or SOURCE_FORMATS[extension]
+        _, mimetype, derivative_extension = DERIVATIVE_FORMATS[fmt]
+
+        sha256 = self.source_hash(source_path)
+        filename = f"{sha256[:32]}-w{width or 0}-q{DERIVATIVE_QUALITY}{derivative_extension}"
+        derivative = {'path': os.path.join(self.cache_dir, filename), 'filename': filename,
+                      'mimetype': mimetype, 'source_hash': sha256}
+
+        if self._touch(filename):
+            return derivative
+
+        # Single-flight: concurrent requests for the same derivative render it once
+        with self._lock:
+            building = self._building.setdefault(filename, threading.Lock())
+        with building:
+            if self._touch(filename):
+                return derivative
+            try:
+                with self._lock:
+                    self._stats['misses'] += 1
+                with self._render_slots:
+                    data = _render(source_path, width, fmt)
+                self._write_atomic(derivative['path'], data)
+                self._add(filename, len(data))
+            finally:
+                with self._lock:
+                    self._building.pop(filename, None)
+
+        logger.debug("🖼️ Rendered %s from %s", filename, source_path)
+        return derivative
+
+    def _touch(self, filename: str) -> bool:
+        with self._lock:
+            if filename not in self._entries:
+                return False
+            self._entries.move_to_end(filename)
+            self._stats['hits'] += 1
+        return True
+
+    def _write_atomic(self, path: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _add(self, filename: str, size: int):
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(filename, 0)
+            self._entries[filename] = size
+            victims = []
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                victim, victim_size = self._entries.popitem(last=False)
+                self._total_bytes -= victim_size
+                victims.append(victim)
+            self._stats['evictions'] += len(victims)
+
+        for victim in victims:
+            try:
+                os.remove(os.path.join(self.cache_dir, victim))
+            except FileNotFoundError:
+                pass
+        if victims:
+            logger.info("🧹 Evicted %d image derivatives from the cache", len(victims))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['file_count'] = len(self._entries)
+            stats['total_size'] = self._total_bytes
+        stats['max_bytes'] = self.max_bytes
+        return stats
@@ -3,6 +3,11 @@
  * Handles all journal CRUD operations using the database API instead of localStorage
  */
 
+// Dogs synced from /api/sync?tables=dogs, kept between page loads (sw.js keeps this cache on updates)
+const DOG_SYNC_CACHE = 'k9-dog-sync';
+const DOG_SYNC_CURSOR_KEY = '/api/sync/dogs/cursor';
+const DOG_SYNC_ROWS_KEY = '/api/sync/dogs/rows';
+
 class JournalDatabaseManager {
     constructor() {
         // Fix: Use localhost:5000 for API calls when running locally
@@ -11,6 +16,11 @@ class JournalDatabaseManager {
         this.currentDogId = null;
         this.currentTrainerId = null;
         
+        // Dogs kept current with /api/sync deltas instead of full refetches;
+        // journals are looked up per dog and date on the server
+        this.dogStore = null;
+        this.syncCursor = null;
+        this.syncInFlight = null;
         
         // Test API connectivity
         this.testAPIConnectivity();
@@ -104,7 +114,7 @@ class JournalDatabaseManager {
             }
 
             // Try to find existing journal
-            const journals = await this.getJournalsByDogAndDate(this.currentDogId, date);
+            const journals = await this.getJournalsByDogAndDate(dogInfo.name, date);
             
             if (journals.length > 0) {
                 const journal = journals[0];
@@ -241,6 +251,96 @@ class JournalDatabaseManager {
         }
     }
 
+    // =============================================================================
+    // DELTA SYNC
+    // =============================================================================
+
+    /**
+     * Bring the dog store up to date with /api/sync?tables=dogs. The store and its
+     * cursor are persisted, so only the first load ever fetches every dog.
+     * Concurrent callers share one sync.
+     */
+    syncDogs() {
+        if (!this.syncInFlight) {
+            this.syncInFlight = this.applyServerChanges().finally(() => {
+                this.syncInFlight = null;
+            });
+        }
+        return this.syncInFlight;
+    }
+
+    async applyServerChanges() {
+        if (!this.dogStore) {
+            await this.loadPersistedDogs();
+        }
+        
+        const startCursor = this.syncCursor;
+        let hasMore = true;
+        while (hasMore) {
+            const url = this.syncCursor
+                ? `${this.apiBaseUrl}/api/sync?tables=dogs&since=${encodeURIComponent(this.syncCursor)}`
+                : `${this.apiBaseUrl}/api/sync?tables=dogs`;
+            const response = await fetch(url);
+            
+            if (!response.ok) {
+                throw new Error(`API Error ${response.status}: ${await response.text()}`);
+            }
+            
+            const page = await response.json();
+            // Tombstones first: a row deleted and re-created comes back as an upsert
+            page.changes.dogs.deleted.forEach(id => this.dogStore.delete(id));
+            page.changes.dogs.upserted.forEach(row => this.dogStore.set(row.id, row));
+            this.syncCursor = page.cursor;
+            hasMore = page.has_more;
+        }
+        
+        if (this.syncCursor !== startCursor) {
+            await this.persistDogs();
+        }
+    }
+
+    async loadPersistedDogs() {
+        this.dogStore = new Map();
+        if (!window.caches) {
+            return;
+        }
+        
+        try {
+            const cache = await caches.open(DOG_SYNC_CACHE);
+            const [cursorResponse, rowsResponse] = await Promise.all([
+                cache.match(DOG_SYNC_CURSOR_KEY),
+                cache.match(DOG_SYNC_ROWS_KEY)
+            ]);
+            // Rows without their cursor (or the reverse) can't be resumed - start over
+            if (cursorResponse && rowsResponse) {
+                (await rowsResponse.json()).forEach(row => this.dogStore.set(row.id, row));
+                this.syncCursor = await cursorResponse.text();
+            }
+        } catch (error) {
+            console.warn('Failed to load synced dogs:', error);
+            this.dogStore.clear();
+            this.syncCursor = null;
+        }
+    }
+
+    async persistDogs() {
+        if (!window.caches) {
+            return;
+        }
+        
+        try {
+            const cache = await caches.open(DOG_SYNC_CACHE);
+            // Rows before the cursor: a cursor never points past rows that were not saved
+            await cache.put(DOG_SYNC_ROWS_KEY, new Response(
+                JSON.stringify([...this.dogStore.values()]),
+                { headers: { 'Content-Type': 'application/json' } }
+            ));
+            await cache.put(DOG_SYNC_CURSOR_KEY, new Response(this.syncCursor));
+        } catch (error) {
+            console.warn('Failed to persist synced dogs:', error);
+        }
+    }
+
     // =============================================================================
     // API CALLS
     // =============================================================================
@@ -248,46 +348,41 @@ class JournalDatabaseManager {
     async getDogByName(dogName) {
         try {
             console.log('🐕 Fetching dog info for:', dogName);
-            const response = await fetch(`${this.apiBaseUrl}/api/dogs`);
+            await this.syncDogs();
+            const dogs = [...this.dogStore.values()];
             
-            if (!response.ok) {
-                throw new Error(`API Error ${response.status}: ${await response.text()}`);
-            }
+            // Try exact match first
+            let dog = dogs.find(dog => dog.name === dogName);
             
-            const result = await response.json();
-            console.log('🐕 Dogs API response:', result);
+            // If not found, try case-insensitive match
+            if (!dog) {
+                dog = dogs.find(dog => dog.name.toLowerCase() === dogName.toLowerCase());
+            }
             
-            if (result.success) {
-                // Try exact match first
-                let dog = result.data.find(dog => dog.name === dogName);
-                
-                // If not found, try case-insensitive match
-                if (!dog) {
-                    dog = result.data.find(dog => dog.name.toLowerCase() === dogName.toLowerCase());
-                }
-                
-                // If still not found, try partial match
-                if (!dog) {
-                    dog = result.data.find(dog => dog.name.toLowerCase().includes(dogName.toLowerCase()) || dogName.toLowerCase().includes(dog.name.toLowerCase()));
-                }
-                
-                console.log('🐕 Found dog:', dog);
-                return dog;
+            // If still not found, try partial match
+            if (!dog) {
+                dog = dogs.find(dog => dog.name.toLowerCase().includes(dogName.toLowerCase()) || dogName.toLowerCase().includes(dog.name.toLowerCase()));
             }
-            return null;
+            
+            console.log('🐕 Found dog:', dog);
+            return dog;
         } catch (error) {
             console.error('❌ Error fetching dogs:', error);
             return null;
         }
     }
 
-    async getJournalsByDogAndDate(dogId, date) {
+    async getJournalsByDogAndDate(dogName, date) {
         try {
-            const response = await fetch(`${this.apiBaseUrl}/api/journals/by-dog/${dogId}`);
-            const result = await response.json();
+            // Indexed server lookup: the most complete journal of that dog on that date
+            const response = await fetch(`${this.apiBaseUrl}/api/journals/by-dog-date/${encodeURIComponent(dogName)}/${encodeURIComponent(date)}`);
+            if (response.status === 404) {
+                return [];
+            }
             
+            const result = await response.json();
             if (result.success) {
-                return result.data.filter(journal => journal.journal_date === date);
+                return [result.data];
             }
             return [];
         } catch (error) {
@@ -41,6 +41,79 @@ function getCurrentDateDDMMYYYY() {
     return formatDateToDDMMYYYY(new Date());
 }
 
+// =============================================================================
+// BATCHED API REQUESTS
+// =============================================================================
+
+// GETs issued within BATCH_WINDOW_MS of each other go to /api/batch in one round-trip
+const BATCH_WINDOW_MS = 10;
+const MAX_BATCH_SIZE = 20;
+let pendingApiBatch = [];
+let apiBatchTimer = null;
+
+/**
+ * fetch() for API GETs that are coalesced with other calls made at the same time
+ * @param {string} url - Same-origin API path, e.g. '/api/users'
+ * @param {Object} options - fetch() options; anything but a plain GET is sent on its own
+ * @returns {Promise<Response>} Response of the individual request
+ */
+function batchedFetch(url, options = {}) {
+    // Writes go out as ordinary requests, so the service worker can queue them offline
+    if (Object.keys(options).some(key => key !== 'method') || String(options.method || 'GET').toUpperCase() !== 'GET') {
+        return fetch(url, options);
+    }
+
+    return new Promise((resolve, reject) => {
+        pendingApiBatch.push({ url, resolve, reject });
+        if (pendingApiBatch.length >= MAX_BATCH_SIZE) {
+            flushApiBatch();
+        } else if (!apiBatchTimer) {
+            apiBatchTimer = setTimeout(flushApiBatch, BATCH_WINDOW_MS);
+        }
+    });
+}
+
+async function flushApiBatch() {
+    clearTimeout(apiBatchTimer);
+    apiBatchTimer = null;
+    const batch = pendingApiBatch;
+    pendingApiBatch = [];
+    if (batch.length === 0) return;
+
+    // A single request gains nothing from the batch envelope
+    if (batch.length === 1) {
+        fetch(batch[0].url).then(batch[0].resolve, batch[0].reject);
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ requests: batch.map((item, index) => ({ id: index, path: item.url })) })
+        });
+        if (response.status !== 200) throw new Error(`Batch failed with status ${response.status}`);
+        const data = await response.json();
+
+        data.responses.forEach(result => {
+            const item = batch[result.id];
+            if (result.body === null && result.status !== 204) {
+                // Non-JSON responses are not inlined in the batch
+                fetch(item.url).then(item.resolve, item.reject);
+                return;
+            }
+            item.resolve(new Response(result.status === 204 ? null : JSON.stringify(result.body), {
+                status: result.status,
+                headers: { 'Content-Type': 'application/json' }
+            }));
+        });
+    } catch (error) {
+        // Offline or an older server: let each call go out on its own
+        console.warn('⚠️ API batch failed, sending requests individually:', error);
+        batch.forEach(item => fetch(item.url).then(item.resolve, item.reject));
+    }
+}
+
 
 
 // ===== THÊM PHẦN QUẢN LÝ CHỮ KÝ THỰC =====
@@ -64,12 +137,7 @@ async function getUserSignature(userName, role) {
 
     try {
         // Fetch user data to get signature info
-        const response = await fetch('/api/users', {
-            method: 'GET',
-            headers: {
-                'Content-Type': 'application/json'
-            }
-        });
+        const response = await batchedFetch('/api/users');
 
         if (response.ok) {
             const data = await response.json();
@@ -465,12 +533,7 @@ async function updateUserDisplay() {
 
         try {
             // Fetch user data from database API
-            const response = await fetch('/api/users', {
-                method: 'GET',
-                headers: {
-                    'Content-Type': 'application/json'
-                }
-            });
+            const response = await batchedFetch('/api/users');
 
             if (response.ok) {
                 const data = await response.json();
@@ -872,7 +935,7 @@ async function refreshDynamicMenus() {
     // Try to fetch assigned dogs from database if user ID is available
     if (currentUserId) {
         try {
-            const response = await fetch(`/api/users/${currentUserId}/dogs`);
+            const response = await batchedFetch(`/api/users/${currentUserId}/dogs`);
             if (response.ok) {
                 const data = await response.json();
                 if (data.success && data.data) {
@@ -987,7 +1050,7 @@ async function updateJournalSubMenu(dashboardDogs) {
 
         try {
             // Get pending journals from database
-            const response = await fetch('/api/journals/pending');
+            const response = await batchedFetch('/api/journals/pending');
             if (response.ok) {
                 const data = await response.json();
                 actualPendingCount = data.data ? data.data.length : 0;
@@ -3496,14 +3559,29 @@ async function preloadAllAudio() {
     ];
 
     try {
-        // Use the preload endpoint to generate all audio files
+        // One existence check for every section - only the missing ones are generated
+        const audioFiles = await resolveAudioFiles(contentSections.map(section => section.content));
+        const missingSections = contentSections.filter((section, index) => {
+            if (audioFiles[index].exists) {
+                audioCache.set(section.title, audioFiles[index].filename);
+                return false;
+            }
+            return true;
+        });
+
+        if (missingSections.length === 0) {
+            audioPreloaded = true;
+            return;
+        }
+
+        // Use the preload endpoint to generate the missing audio files
         const response = await fetch('/api/tts/preload', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({
-                sections: contentSections
+                sections: missingSections
             })
         });
 
@@ -3513,17 +3591,30 @@ async function preloadAllAudio() {
 
         const data = await response.json();
 
-        if (data.success) {
+        if (!data.success) {
+            throw new Error(data.error || 'Unknown error');
+        }
+
+        // Audio is generated in the background - poll the job until every section is done
+        let job = data.data;
+        while (job.finished_at === null) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            const jobResponse = await fetch(`/api/tts/jobs/${data.job_id}`);
+            const jobData = await jobResponse.json();
+            if (!jobData.success) {
+                throw new Error(jobData.error || 'Unknown error');
+            }
+            job = jobData.data;
+        }
 
-            // Store audio file mappings in cache for instant access
-            data.generated.forEach(item => {
+        // Store audio file mappings in cache for instant access
+        job.sections.forEach(item => {
+            if (item.status !== 'failed') {
                 audioCache.set(item.title, item.filename);
-            });
+            }
+        });
 
-            audioPreloaded = true;
-        } else {
-            throw new Error(data.error || 'Unknown error');
-        }
+        audioPreloaded = true;
 
     } catch (error) {
         // Don't show alert for preload errors, just log them
@@ -3548,14 +3639,25 @@ function getCachedAudioFilename() {
     return expectedFilename;
 }
 
-// Function to check if audio file exists on server
-async function checkAudioFileExists(filename) {
-    try {
-        const response = await fetch(`/api/tts/get/${filename}`, { method: 'HEAD' });
-        return response.ok;
-    } catch (error) {
-        return false;
+// Function to resolve texts to the audio files the server stores them under
+async function resolveAudioFiles(texts) {
+    const response = await fetch('/api/tts/exists', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ texts })
+    });
+
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const data = await response.json();
+    if (!data.success) {
+        throw new Error(data.error || 'Unknown error');
     }
+    return data.texts;
 }
 
 // Function to change TTS playback speed
@@ -3630,12 +3732,10 @@ function toggleSpeech() {
         try {
             const cleanedText = cleanTextForTTS(contentText);
 
-            // Get expected filename based on content hash (UTF-8 safe)
-            const contentHash = createContentHash(cleanedText);
-            const expectedFilename = `${contentHash}.mp3`;
-
-            // Check if audio file exists on server
-            const fileExists = await checkAudioFileExists(expectedFilename);
+            // Get the server's filename for this content and whether it is cached
+            const [audioFile] = await resolveAudioFiles([cleanedText]);
+            const expectedFilename = audioFile.filename;
+            const fileExists = audioFile.exists;
 
             if (fileExists) {
 
@@ -3762,7 +3862,7 @@ async function initializeAudioSystem() {
 // Function to check audio cache status
 async function checkAudioCacheStatus() {
     try {
-        const response = await fetch('/api/tts/cache/status');
+        const response = await batchedFetch('/api/tts/cache/status');
         const data = await response.json();
 
         if (data.success) {
@@ -11277,7 +11377,7 @@ async function loadCurrentCarePlan() {
     try {
         viewerDiv.innerHTML = '<div class="loading">Đang tải tài liệu...</div>';
 
-        const response = await fetch('/api/care-plans');
+        const response = await fetch('/api/care-plans?limit=1');
         const result = await response.json();
 
         if (result.success && result.data.length > 0) {
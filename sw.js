@@ -6,6 +6,7 @@ const CACHE_NAME = 'k9-management-v5.1.0';
 const STATIC_CACHE = 'k9-static-v5.1.0';
 const DYNAMIC_CACHE = 'k9-dynamic-v5.1.0';
 const API_CACHE = 'k9-api-v5.1.0';
+const DOG_SYNC_CACHE = 'k9-dog-sync'; // journal_db_manager.js's synced dogs, unversioned
 
 // Files to cache immediately (App Shell)
 const STATIC_ASSETS = [
@@ -29,6 +30,11 @@ const STATIC_ASSETS = [
   '/offline.html'
 ];
 
+// The server fingerprints front-end assets (e.g. /style.3f2a9c1b7d4e.css) and serves
+// the plain names no-cache, so the shell caches the URLs index.html actually uses
+const FINGERPRINTED_ASSET = /\.[0-9a-f]{12}\.[^./?]+(\?|$)/;
+const PAGE_ASSET_REFERENCE = /\b(?:src|href)=(["'])([^"'#:]+?\.[0-9a-f]{12}\.[^"'#./?]+(?:\?[^"'#]*)?)\1/g;
+
 // API endpoints to cache
 const API_ENDPOINTS = [
   '/api/auth/me',
@@ -72,6 +78,9 @@ self.addEventListener('install', event => {
         );
       }),
       
+      // Cache the assets the current index.html references
+      precachePageAssets(),
+      
       // Create offline page
       createOfflinePage()
     ]).then(() => {
@@ -115,6 +124,9 @@ self.addEventListener('fetch', event => {
   if (request.method !== 'GET') {
     // Handle POST/PUT/DELETE requests
     event.respondWith(handleDynamicRequest(request));
+  } else if (url.pathname === '/api/sync') {
+    // Deltas are only valid once per cursor - never answer them from the cache
+    return;
   } else if (url.pathname.startsWith('/api/')) {
     // Handle API requests
     event.respondWith(handleApiRequest(request));
@@ -336,6 +348,8 @@ async function handleNavigationRequest(request) {
 }
 
 async function handleDynamicRequest(request) {
+  // fetch() consumes the body, so keep an unread copy for the offline queue
+  const offlineCopy = request.clone();
   try {
     // For POST/PUT/DELETE, always try network
     const networkResponse = await fetch(request);
@@ -347,8 +361,8 @@ async function handleDynamicRequest(request) {
     console.warn('Dynamic request failed:', error);
     
     // Store request for background sync
-    if (request.method === 'POST') {
-      await storeOfflineAction(request);
+    if (request.method === 'POST' && await hasWritesToReplay(offlineCopy)) {
+      await storeOfflineAction(offlineCopy);
       
       // Register background sync
       if ('serviceWorker' in navigator && 'sync' in window.ServiceWorkerRegistration.prototype) {
@@ -371,6 +385,19 @@ async function handleDynamicRequest(request) {
 // UTILITY FUNCTIONS  
 // =============================================================================
 
+// A batch of reads has nothing to replay once back online; one with writes does
+async function hasWritesToReplay(request) {
+  if (new URL(request.url).pathname !== '/api/batch') {
+    return true;
+  }
+  try {
+    const { requests } = await request.clone().json();
+    return requests.some(item => String(item.method || 'GET').toUpperCase() !== 'GET');
+  } catch (error) {
+    return false;
+  }
+}
+
 function isStaticAsset(request) {
   const url = new URL(request.url);
   return url.pathname.endsWith('.js') ||
@@ -380,9 +407,34 @@ function isStaticAsset(request) {
          url.pathname.includes('cdnjs.cloudflare.com');
 }
 
+async function precachePageAssets() {
+  try {
+    const cache = await caches.open(STATIC_CACHE);
+    const response = await fetch('/index.html', { cache: 'no-cache' });
+    if (!response.ok) {
+      return;
+    }
+    // Commented-out markup references assets too, but the page never loads them
+    const html = (await response.text()).replace(/<!--[\s\S]*?-->/g, '');
+    const pageUrl = new URL('/index.html', self.location.origin);
+    const urls = new Set([...html.matchAll(PAGE_ASSET_REFERENCE)]
+      .map(match => new URL(match[2].replace(/&amp;/g, '&'), pageUrl).href));
+    await cache.addAll([...urls]);
+    
+    // Fingerprinted files of earlier deployments are never requested again
+    for (const request of await cache.keys()) {
+      if (FINGERPRINTED_ASSET.test(new URL(request.url).pathname) && !urls.has(request.url)) {
+        await cache.delete(request);
+      }
+    }
+  } catch (error) {
+    console.warn('Failed to precache page assets:', error);
+  }
+}
+
 async function cleanOldCaches() {
   const cacheNames = await caches.keys();
-  const currentCaches = [STATIC_CACHE, DYNAMIC_CACHE, API_CACHE];
+  const currentCaches = [STATIC_CACHE, DYNAMIC_CACHE, API_CACHE, DOG_SYNC_CACHE];
   
   return Promise.all(
     cacheNames
@@ -680,13 +732,61 @@ async function syncPendingJournals() {
   return syncOfflineData();
 }
 
+// Cached list responses kept current with /api/sync deltas instead of full refetches.
+// Journals are not among them: the cached /api/journals is only its first page,
+// and journal_db_manager.js looks journals up by dog and date on the server.
+const SYNCED_ENDPOINTS = {
+  dogs: '/api/dogs',
+  users: '/api/users'
+};
+const SYNC_CURSOR_KEY = '/api/sync/cursor';
+const SYNC_URL = `/api/sync?tables=${Object.keys(SYNCED_ENDPOINTS).join(',')}`;
+
 async function updateDogData() {
   const cache = await caches.open(API_CACHE);
   try {
-    const response = await fetch('/api/dogs');
-    if (response.ok) {
-      await cache.put('/api/dogs', response);
+    const cursorResponse = await cache.match(SYNC_CURSOR_KEY);
+    let cursor = cursorResponse ? await cursorResponse.text() : null;
+    
+    // Load the cached lists; without all of them (or a cursor) start from scratch
+    const tables = {};
+    for (const [table, url] of Object.entries(SYNCED_ENDPOINTS)) {
+      const cached = cursor ? await cache.match(url) : null;
+      if (!cached) {
+        cursor = null;
+      }
+      const body = cached ? await cached.json() : null;
+      tables[table] = new Map(((body && body.data) || []).map(row => [row.id, row]));
+    }
+    if (!cursor) {
+      Object.values(tables).forEach(rows => rows.clear());
+    }
+    
+    let hasMore = true;
+    while (hasMore) {
+      const response = await fetch(cursor ? `${SYNC_URL}&since=${encodeURIComponent(cursor)}` : SYNC_URL);
+      if (!response.ok) {
+        return;
+      }
+      const page = await response.json();
+      for (const [table, rows] of Object.entries(tables)) {
+        const changes = page.changes[table];
+        changes.deleted.forEach(id => rows.delete(id));
+        changes.upserted.forEach(row => rows.set(row.id, row));
+      }
+      cursor = page.cursor;
+      hasMore = page.has_more;
+    }
+    
+    for (const [table, rows] of Object.entries(tables)) {
+      // Same order as the list endpoints: newest first
+      const data = [...rows.values()].sort((a, b) => String(b.created_at).localeCompare(String(a.created_at)));
+      await cache.put(SYNCED_ENDPOINTS[table], new Response(
+        JSON.stringify({ success: true, data, total: data.length }),
+        { headers: { 'Content-Type': 'application/json' } }
+      ));
     }
+    await cache.put(SYNC_CURSOR_KEY, new Response(cursor));
   } catch (error) {
     console.warn('Failed to update dog data:', error);
   }
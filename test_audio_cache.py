@@ -0,0 +1,47 @@
+"""
+K9 Management System - Audio Cache Tests
+Least recently used clips go first once over budget; idle clips go after max_age
+"""
+
+import os
+import time
+from audio_cache import AudioCache
+
+def add_clip(cache, name, size=100):
+    filename = f'{name}.mp3'
+    with open(cache.path_for(filename), 'wb') as f:
+        f.write(bytes(size))
+    cache.add(filename, size)
+    return filename
+
+def test_least_recently_used_clip_evicted_over_budget(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=250)
+    first, second, third = (add_clip(cache, name) for name in ('first', 'second', 'third'))
+    cache.lookup(first)  # second is now the least recently used
+
+    cache.evict()
+
+    assert not cache.contains(second)
+    assert not os.path.exists(cache.path_for(second))
+    assert cache.contains(first) and cache.contains(third)
+    assert cache.get_stats()['total_size'] == 200
+
+def test_idle_clips_evicted_after_max_age(tmp_path):
+    cache = AudioCache(str(tmp_path), max_age=0.2)
+    idle = add_clip(cache, 'idle')
+    used = add_clip(cache, 'used')
+    time.sleep(0.3)
+    cache.lookup(used)
+    fresh = add_clip(cache, 'fresh')
+
+    assert cache.evict() == [idle]
+    assert cache.contains(used) and cache.contains(fresh)
+
+def test_index_survives_restart(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=150)
+    add_clip(cache, 'old')
+    new = add_clip(cache, 'new')
+    cache.evict()
+
+    reopened = AudioCache(str(tmp_path))
+    assert [entry['filename'] for entry in reopened.list_entries()] == [new]
@@ -0,0 +1,50 @@
+"""
+K9 Management System - Batch Request Tests
+/api/batch ordering and the read-only pinned connections it runs GETs on
+"""
+
+import sqlite3
+import pytest
+
+def test_pinned_connection_rejects_writes(temp_db):
+    with temp_db.pinned_connection():
+        conn = temp_db.get_connection()
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO dogs (name, chip_id, breed) VALUES ('CNV TEST', 'TEST-1', 'Malinois')")
+
+    # The connection goes back to the pool writable again
+    conn = temp_db.get_connection()
+    try:
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 0
+        conn.execute("INSERT INTO dogs (name, chip_id, breed) VALUES ('CNV TEST', 'TEST-1', 'Malinois')")
+        conn.commit()
+    finally:
+        conn.close()
+
+def test_batch_reads_after_a_write_see_it(client):
+    response = client.post('/api/batch', json={'requests': [
+        {'id': 'before', 'path': '/api/dogs'},
+        {'id': 'create', 'method': 'POST', 'path': '/api/dogs',
+         'body': {'name': 'CNV BATCH', 'chip_id': 'BATCH-1', 'breed': 'Malinois'}},
+        {'id': 'after', 'path': '/api/dogs'},
+        {'id': 'missing', 'path': '/api/journals/999999'},
+    ]})
+    assert response.status_code == 200
+    responses = {item['id']: item for item in response.get_json()['responses']}
+
+    assert responses['create']['status'] == 200
+    assert len(responses['after']['body']['data']) == len(responses['before']['body']['data']) + 1
+    assert responses['missing']['status'] == 404
+
+@pytest.mark.parametrize('body', [
+    {},
+    {'requests': []},
+    {'requests': [{'path': '/dashboard_v5.html'}]},
+    {'requests': [{'path': '/api/batch'}]},
+    {'requests': [{'path': '/api/dogs', 'method': 'HEAD'}]},
+    {'requests': [{'path': '/api/test'}] * 21},
+])
+def test_batch_rejects_invalid_requests(client, body):
+    response = client.post('/api/batch', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
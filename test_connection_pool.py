@@ -0,0 +1,45 @@
+"""
+K9 Management System - Connection Pool Tests
+Checkout reuse, overflow past max_size and rollback of open transactions on release
+"""
+
+def test_released_connection_is_reused(temp_db):
+    pool = temp_db.pool
+    conn = pool.acquire()
+    conn.close()
+    assert pool.acquire() is conn
+    pool.release(conn)
+
+    stats = pool.get_stats()
+    assert stats['reused'] >= 1
+    assert stats['in_use'] == 0
+
+def test_exhausted_pool_opens_overflow_connection(temp_db):
+    pool = temp_db.pool
+    pool.checkout_timeout = 0.05
+    held = [pool.acquire() for _ in range(pool.max_size)]
+    try:
+        overflow = pool.acquire()
+        assert overflow not in held
+        assert pool.get_stats()['overflow'] == 1
+
+        # Overflow connections are closed on release, not pooled
+        overflow.close()
+        assert pool.get_stats()['open'] == pool.max_size
+    finally:
+        for conn in held:
+            conn.close()
+    assert pool.get_stats()['idle'] == pool.max_size
+
+def test_release_rolls_back_open_transaction(temp_db):
+    conn = temp_db.get_connection()
+    conn.execute("INSERT INTO dogs (name, chip_id, breed) VALUES ('CNV POOL', 'POOL-1', 'Malinois')")
+    assert conn.in_transaction
+    conn.close()
+
+    conn = temp_db.get_connection()
+    try:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM dogs WHERE chip_id = 'POOL-1'").fetchone()[0] == 0
+    finally:
+        conn.close()
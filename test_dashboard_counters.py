@@ -0,0 +1,38 @@
+"""
+K9 Management System - Dashboard Counter Tests
+Trigger-maintained counters agree with the ?fresh=1 recount after every kind of write
+"""
+
+from datetime import date
+
+def assert_counters_match(client):
+    cached = client.get('/api/stats/dashboard').get_json()['data']
+    fresh = client.get('/api/stats/dashboard?fresh=1').get_json()['data']
+    assert cached == fresh
+    return cached
+
+def test_counters_follow_insert_update_delete(client, temp_db, dog):
+    stats = assert_counters_match(client)
+    assert stats['total_dogs'] == 1
+
+    # Insert
+    today = date.today().isoformat()
+    journals = [temp_db.create_training_journal({'dog_id': dog['id'], 'trainer_id': dog['trainer_id'],
+                                                 'journal_date': journal_date})
+                for journal_date in (today, today, '2020-01-01')]
+    temp_db.create_dog({'name': 'CNV SECOND', 'chip_id': 'CNV-2', 'breed': 'Becgie', 'status': 'TRAINING'})
+    stats = assert_counters_match(client)
+    assert stats['total_journals'] == 3
+    assert stats['total_dogs'] == 2
+
+    # Update
+    temp_db.update_training_journal(journals[0]['id'], {'approval_status': 'APPROVED'})
+    temp_db.update_dog(dog['id'], {'status': 'RETIRED'})
+    temp_db.update_user(dog['trainer_id'], {'status': 'INACTIVE'})
+    assert_counters_match(client)
+
+    # Delete
+    temp_db.delete_training_journal(journals[1]['id'])
+    temp_db.delete_dog(dog['id'])
+    stats = assert_counters_match(client)
+    assert stats['total_dogs'] == 1
@@ -0,0 +1,21 @@
+"""
+K9 Management System - Journal Migration Tests
+chunk_size validation of the bulk localStorage journal import
+"""
+
+import pytest
+
+JOURNAL = {'dog_id': 1, 'trainer_id': 1, 'journal_date': '2024-01-01'}
+
+@pytest.mark.parametrize('chunk_size', [0, -1])
+def test_bulk_create_rejects_chunk_size_below_one(temp_db, chunk_size):
+    with pytest.raises(ValueError):
+        temp_db.bulk_create_training_journals([JOURNAL], chunk_size=chunk_size)
+
+@pytest.mark.parametrize('chunk_size', [0, -1, 'abc', None, 5001])
+def test_migrate_rejects_invalid_chunk_size(client, chunk_size):
+    response = client.post('/api/journals/migrate-from-localstorage',
+                           json={'journals': [{'key': 'journal_1'}], 'chunk_size': chunk_size})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+    assert 'chunk_size' in response.get_json()['error']
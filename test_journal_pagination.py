@@ -0,0 +1,40 @@
+"""
+K9 Management System - Journal Pagination Tests
+Keyset cursors walk every journal exactly once, even when sort keys tie
+"""
+
+import pytest
+
+def test_keyset_cursor_round_trip_with_ties(temp_db, dog):
+    # Same journal_date and created_at for most rows, so only the id breaks ties
+    journals = [{'dog_id': dog['id'], 'trainer_id': dog['trainer_id'], 'journal_date': journal_date}
+                for journal_date in ['2024-01-02'] * 5 + ['2024-01-01'] * 4]
+    temp_db.bulk_create_training_journals(journals)
+    conn = temp_db.get_connection()
+    try:
+        conn.execute("UPDATE training_journals SET created_at = '2024-01-02 08:00:00'")
+        conn.commit()
+    finally:
+        conn.close()
+
+    expected = temp_db.get_all_training_journals(limit=None)
+    seen = []
+    cursor = None
+    while True:
+        page = temp_db.get_all_training_journals(limit=2, cursor=cursor)
+        if not page:
+            break
+        seen.extend(page)
+        cursor = temp_db.encode_journal_cursor(page[-1])
+
+    assert [journal['id'] for journal in seen] == [journal['id'] for journal in expected]
+    assert len(seen) == len(journals)
+
+def test_cursor_survives_encoding(temp_db):
+    journal = {'journal_date': '2024-01-02', 'created_at': '2024-01-02 08:00:00', 'id': 7}
+    assert temp_db.decode_journal_cursor(temp_db.encode_journal_cursor(journal)) == ('2024-01-02', '2024-01-02 08:00:00', 7)
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', 'WzFd'])
+def test_invalid_cursor_is_rejected(temp_db, cursor):
+    with pytest.raises(ValueError):
+        temp_db.get_all_training_journals(cursor=cursor)
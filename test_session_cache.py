@@ -0,0 +1,45 @@
+"""
+K9 Management System - Session Cache Tests
+Cached validations end with the session: on logout, on user changes and at expires_at
+"""
+
+from datetime import datetime, timedelta, timezone
+from database import SessionCache
+
+def utc_timestamp(seconds_from_now):
+    moment = datetime.now(timezone.utc) + timedelta(seconds=seconds_from_now)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+def test_logout_drops_cached_session(temp_db, dog):
+    token = temp_db.create_session(dog['trainer_id'])
+    assert temp_db.validate_session(token)['username'] == 'cnv_trainer'
+    assert temp_db.session_cache.get(token) is not None
+
+    assert temp_db.invalidate_session(token)
+    assert temp_db.session_cache.get(token) is None
+    assert temp_db.validate_session(token) is None
+
+def test_user_sessions_dropped_together(temp_db, dog):
+    tokens = [temp_db.create_session(dog['trainer_id']) for _ in range(2)]
+    for token in tokens:
+        temp_db.validate_session(token)
+
+    temp_db.invalidate_user_sessions(dog['trainer_id'])
+    assert all(temp_db.validate_session(token) is None for token in tokens)
+
+def test_put_after_invalidation_is_skipped():
+    cache = SessionCache()
+    generation = cache.generation()
+    cache.invalidate('token')
+    cache.put('token', {'user_id': 1, 'expires_at': utc_timestamp(3600)}, generation)
+    assert cache.get('token') is None
+
+def test_cache_lifetime_is_capped_at_expires_at():
+    cache = SessionCache(ttl=60)
+    cache.put('expired', {'user_id': 1, 'expires_at': utc_timestamp(-1)})
+    assert cache.get('expired') is None
+
+    cache.put('expiring', {'user_id': 1, 'expires_at': utc_timestamp(30)})
+    deadline = cache._entries['expiring'][0]
+    cache.put('fresh', {'user_id': 1, 'expires_at': utc_timestamp(3600)})
+    assert cache._entries['fresh'][0] - deadline > 25
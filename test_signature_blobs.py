@@ -0,0 +1,66 @@
+"""
+K9 Management System - Signature Blob Tests
+Inline signature images moved to the blob store on write and by the one-time migration
+"""
+
+import base64
+import json
+import os
+from database import DatabaseManager
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'signature' * 20
+DATA_URL = 'data:image/png;base64,' + base64.b64encode(PNG).decode('ascii')
+
+def reopen(db):
+    """A second DatabaseManager on the same files, running init_database again"""
+    db.pool.close_all()
+    return DatabaseManager(db.db_path, signature_blob_dir=db.signature_store.root_dir,
+                           care_plans_dir=db.care_plans_dir)
+
+def stored_blobs(db):
+    return sorted(os.listdir(db.signature_store.root_dir))
+
+def test_new_journal_signatures_are_externalized(temp_db, dog):
+    journal = temp_db.create_training_journal({
+        'dog_id': dog['id'], 'trainer_id': dog['trainer_id'], 'journal_date': '2024-01-01',
+        'hlv_signature': DATA_URL,
+        'leader_signature': json.dumps({'image': DATA_URL, 'name': 'CNV Leader'}),
+    })
+
+    assert journal['hlv_signature'].startswith('/signature-blobs/')
+    leader = json.loads(journal['leader_signature'])
+    assert leader['name'] == 'CNV Leader'
+    # Identical images share one blob
+    assert leader['image'] == journal['hlv_signature']
+    assert len(stored_blobs(temp_db)) == 1
+
+    filename = journal['hlv_signature'].rsplit('/', 1)[-1]
+    with open(os.path.join(temp_db.signature_store.root_dir, filename), 'rb') as f:
+        assert f.read() == PNG
+
+def test_signature_blob_migration_is_idempotent(temp_db, dog):
+    conn = temp_db.get_connection()
+    try:
+        # A journal written before the blob store existed, and a migration that never ran
+        conn.execute('''INSERT INTO training_journals (dog_id, trainer_id, journal_date, hlv_signature)
+                        VALUES (?, ?, '2024-01-01', ?)''', (dog['id'], dog['trainer_id'], DATA_URL))
+        conn.execute("DELETE FROM schema_migrations WHERE name = 'signature_blobs'")
+        conn.commit()
+    finally:
+        conn.close()
+
+    db = reopen(temp_db)
+    try:
+        migrated = db.get_all_training_journals()[0]['hlv_signature']
+        assert migrated.startswith('/signature-blobs/')
+        blobs = stored_blobs(db)
+        assert len(blobs) == 1
+    finally:
+        db.pool.close_all()
+
+    db = reopen(db)
+    try:
+        assert db.get_all_training_journals()[0]['hlv_signature'] == migrated
+        assert stored_blobs(db) == blobs
+    finally:
+        db.pool.close_all()
@@ -0,0 +1,61 @@
+"""
+K9 Management System - Sync Tests
+/api/sync deltas: the since watermark, tombstones for deletes and the tables filter
+"""
+
+import pytest
+
+def test_since_watermark_returns_only_later_changes(temp_db, dog):
+    everything = temp_db.get_changes()
+    assert [row['id'] for row in everything['changes']['dogs']['upserted']] == [dog['id']]
+    assert everything['has_more'] is False
+
+    # Nothing changed since the cursor
+    quiet = temp_db.get_changes(since=everything['cursor'])
+    assert all(not changes['upserted'] and not changes['deleted'] for changes in quiet['changes'].values())
+    assert quiet['cursor'] == everything['cursor']
+
+    journal = temp_db.create_training_journal({'dog_id': dog['id'], 'trainer_id': dog['trainer_id'],
+                                               'journal_date': '2024-01-01'})
+    later = temp_db.get_changes(since=everything['cursor'])
+    assert [row['id'] for row in later['changes']['journals']['upserted']] == [journal['id']]
+    assert not later['changes']['dogs']['upserted']
+
+def test_deletes_become_tombstones(temp_db, dog):
+    journal = temp_db.create_training_journal({'dog_id': dog['id'], 'trainer_id': dog['trainer_id'],
+                                               'journal_date': '2024-01-01'})
+    cursor = temp_db.get_changes()['cursor']
+
+    temp_db.delete_training_journal(journal['id'])
+    changes = temp_db.get_changes(since=cursor)['changes']
+    assert changes['journals'] == {'upserted': [], 'deleted': [journal['id']]}
+
+    # A row created and deleted before the first sync is only a tombstone
+    assert temp_db.get_changes()['changes']['journals'] == {'upserted': [], 'deleted': [journal['id']]}
+
+def test_pages_follow_the_cursor(temp_db, dog):
+    temp_db.bulk_create_training_journals([{'dog_id': dog['id'], 'trainer_id': dog['trainer_id'],
+                                            'journal_date': f'2024-01-0{day}'} for day in range(1, 6)])
+    seen = []
+    cursor = None
+    while True:
+        page = temp_db.get_changes(since=cursor, limit=2)
+        seen.extend(row['id'] for row in page['changes']['journals']['upserted'])
+        cursor = page['cursor']
+        if not page['has_more']:
+            break
+    assert len(seen) == len(set(seen)) == 5
+
+def test_tables_filter(client, temp_db, dog):
+    temp_db.create_training_journal({'dog_id': dog['id'], 'trainer_id': dog['trainer_id'],
+                                     'journal_date': '2024-01-01'})
+    body = client.get('/api/sync?tables=dogs,users').get_json()
+    assert set(body['changes']) == {'dogs', 'users'}
+    assert [row['id'] for row in body['changes']['dogs']['upserted']] == [dog['id']]
+    assert [row['id'] for row in body['changes']['users']['upserted']] == [dog['trainer_id']]
+
+@pytest.mark.parametrize('tables', ['', 'dogs,sessions', 'change_log'])
+def test_tables_filter_rejects_unknown_tables(client, tables):
+    response = client.get(f'/api/sync?tables={tables}')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
@@ -0,0 +1,50 @@
+"""
+K9 Management System - TTS Service Tests
+Concurrent requests for the same text share one synthesis
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tts_service import StubBackend, TTSService, audio_filename
+
+TEXT = 'Chó nghiệp vụ CNV hoàn thành bài huấn luyện.'
+
+class CountingBackend(StubBackend):
+    """Stub backend that counts syntheses (synthesize() goes through synthesize_stream)"""
+
+    def __init__(self, delay: float = 0.2):
+        super().__init__(delay)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def synthesize_stream(self, text: str, lang: str):
+        with self._lock:
+            self.calls += 1
+        yield from super().synthesize_stream(text, lang)
+
+def test_concurrent_requests_synthesize_once(tmp_path):
+    backend = CountingBackend()
+    service = TTSService(str(tmp_path), backend=backend, workers=1)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: service.synthesize_to_file(TEXT), range(8)))
+
+    assert backend.calls == 1
+    assert {result['filename'] for result in results} == {audio_filename(TEXT)}
+    assert len({result['size'] for result in results}) == 1
+    assert service.synthesize_to_file(TEXT)['cached'] is True
+    assert backend.calls == 1
+
+def test_streams_join_the_same_flight(tmp_path):
+    backend = CountingBackend()
+    service = TTSService(str(tmp_path), backend=backend, workers=1)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        streams = [pool.submit(lambda: b''.join(service.stream(TEXT))) for _ in range(3)]
+        result = pool.submit(service.synthesize_to_file, TEXT).result()
+        audio = {future.result() for future in streams}
+
+    assert backend.calls == 1
+    assert len(audio) == 1
+    with open(service.audio_path(result['filename']), 'rb') as f:
+        assert f.read() == audio.pop()
@@ -0,0 +1,533 @@
+"""
+K9 Management System - Text-to-Speech Service
+Background TTS generation: a bounded task queue served by a pool of worker
+threads, with a pluggable synthesis backend (gTTS, or a local stub for tests)
+"""
+
+import hashlib
+import io
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any
+from app_logging import get_logger
+from audio_cache import AudioCache
+
+logger = get_logger('tts')
+
+# =============================================================================
+# SYNTHESIS BACKENDS
+# =============================================================================
+
+class TTSBackendUnavailable(RuntimeError):
+    """The selected synthesis backend cannot be used (e.g. missing package)"""
+
+class TTSQueueFull(RuntimeError):
+    """The job queue has no room for the requested work"""
+
+class GTTSBackend:
+    """Google Translate TTS through the gTTS package"""
+    name = 'gtts'
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        # Import gTTS here to avoid import errors if not installed
+        try:
+            from gtts import gTTS
+        except ImportError:
+            raise TTSBackendUnavailable("gTTS not installed. Please install with: pip install gTTS")
+
+        audio_buffer = io.BytesIO()
+        gTTS(text=text, lang=lang, slow=False).write_to_fp(audio_buffer)
+        return audio_buffer.getvalue()
+
+    def synthesize_stream(self, text: str, lang: str):
+        """Yield MP3 bytes as gTTS receives them (one piece per gTTS request)"""
+        try:
+            from gtts import gTTS
+        except ImportError:
+            raise TTSBackendUnavailable("gTTS not installed. Please install with: pip install gTTS")
+
+        yield from gTTS(text=text, lang=lang, slow=False).stream()
+
+class StubBackend:
+    """Offline backend producing silent MP3 frames, for tests and development"""
+    name = 'stub'
+
+    # MPEG-1 Layer III, 128 kbps, 44.1 kHz frame header followed by a silent body
+    FRAME = b'\xff\xfb\x90\x64' + bytes(413)
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        return b''.join(self.synthesize_stream(text, lang))
+
+    def synthesize_stream(self, text: str, lang: str):
+        # Roughly one frame (26 ms) per character keeps sizes proportional to text,
+        # sent in pieces the way gTTS returns one piece per 100 characters
+        for start in range(0, max(1, len(text)), 100):
+            if self.delay:
+                time.sleep(self.delay / max(1, -(-len(text) // 100)))
+            yield self.FRAME * max(1, len(text[start:start + 100]))
+
+TTS_BACKENDS = {
+    GTTSBackend.name: GTTSBackend,
+    StubBackend.name: StubBackend
+}
+
+def create_backend(name: Optional[str] = None):
+    """Create a synthesis backend by name (defaults to $K9_TTS_BACKEND or gtts)"""
+    name = (name or os.environ.get('K9_TTS_BACKEND', GTTSBackend.name)).lower()
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {name}")
+    return TTS_BACKENDS[name]()
+
+# =============================================================================
+# CACHE NAMING
+# =============================================================================
+
+def content_hash(text: str) -> str:
+    """Content hash used to name cached audio (UTF-8 safe)"""
+    return hashlib.md5(text.strip().encode('utf-8')).hexdigest()[:16]
+
+def audio_filename(text: str) -> str:
+    return f"{content_hash(text)}.mp3"
+
+# =============================================================================
+# CHUNKING
+# =============================================================================
+
+# Longest chunk sent to the backend in one request
+CHUNK_MAX_CHARS = 200
+
+# Block size used to stream an already cached clip
+STREAM_READ_SIZE = 64 * 1024
+
+# Sentence ends (including the Vietnamese ellipsis) followed by whitespace, or line breaks
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…;])\s+|\s*\n+\s*')
+CLAUSE_BOUNDARY = re.compile(r'(?<=[,:])\s+')
+
+def split_sentences(text: str, max_chars: int = CHUNK_MAX_CHARS) -> List[str]:
+    """Split text into chunks of whole sentences, each at most max_chars long.
+
+    Consecutive short sentences are packed into one chunk; a sentence longer
+    than max_chars is split at commas, then at spaces. Text that already
+    fits is returned as a single chunk, so splitting a chunk is a no-op.
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    pieces = []
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        for clause in CLAUSE_BOUNDARY.split(sentence):
+            while len(clause) > max_chars:
+                cut = clause.rfind(' ', 0, max_chars + 1)
+                cut = cut if cut > 0 else max_chars
+                pieces.append(clause[:cut])
+                clause = clause[cut:].lstrip()
+            pieces.append(clause)
+
+    chunks = []
+    for piece in (piece.strip() for piece in pieces):
+        if not piece:
+            continue
+        if chunks and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+            chunks[-1] = f"{chunks[-1]} {piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+def _strip_id3(data: bytes) -> bytes:
+    # ID3v2 header: "ID3", version (2), flags (1), syncsafe size (4)
+    if data[:3] == b'ID3' and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        return data[10 + size:]
+    return data
+
+def stitch_mp3(parts: List[bytes]) -> bytes:
+    """Concatenate MP3 clips, keeping only the first clip's ID3 tag"""
+    if not parts:
+        return b''
+    return parts[0] + b''.join(_strip_id3(part) for part in parts[1:])
+
+# =============================================================================
+# JOBS
+# =============================================================================
+
+# Section states; the last three are final
+SECTION_QUEUED = 'queued'
+SECTION_RUNNING = 'running'
+SECTION_DONE = 'done'
+SECTION_CACHED = 'cached'
+SECTION_FAILED = 'failed'
+FINAL_SECTION_STATES = (SECTION_DONE, SECTION_CACHED, SECTION_FAILED)
+
+class _Flight:
+    """One in-progress synthesis that concurrent callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class TTSJob:
+    """A batch of sections synthesized by the worker pool"""
+
+    def __init__(self, sections: List[Dict[str, Any]], lang: str):
+        self.id = uuid.uuid4().hex
+        self.lang = lang
+        self.sections = sections
+        self.created_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._check_finished()
+
+    def update_section(self, index: int, **changes):
+        with self._lock:
+            self.sections[index].update(changes)
+            self._check_finished()
+
+    def _check_finished(self):
+        if all(section['status'] in FINAL_SECTION_STATES for section in self.sections):
+            self.finished_at = self.finished_at or time.time()
+            self._finished.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every section is final; returns False on timeout"""
+        return self._finished.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            sections = [dict(section) for section in self.sections]
+
+        counts = {}
+        for section in sections:
+            counts[section['status']] = counts.get(section['status'], 0) + 1
+        completed = sum(counts.get(state, 0) for state in FINAL_SECTION_STATES)
+
+        if self.finished_at is None:
+            status = 'running' if completed or counts.get(SECTION_RUNNING) else 'queued'
+        else:
+            status = 'failed' if counts.get(SECTION_FAILED) == len(sections) and sections else 'completed'
+
+        return {
+            "job_id": self.id,
+            "status": status,
+            "lang": self.lang,
+            "total": len(sections),
+            "completed": completed,
+            "failed": counts.get(SECTION_FAILED, 0),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "sections": sections
+        }
+
+# =============================================================================
+# SERVICE
+# =============================================================================
+
+class TTSService:
+    def __init__(self, cache_dir: str, backend=None, workers: int = 4,
+                 max_queue: int = 256, max_jobs: int = 200, cache: Optional[AudioCache] = None,
+                 chunk_workers: int = 4):
+        self.cache_dir = cache_dir
+        self.cache = cache or AudioCache(cache_dir)
+        self.backend = backend or create_backend()
+        self.worker_count = workers
+        self.max_jobs = max_jobs
+        self._tasks = queue.Queue(maxsize=max_queue)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.coalesced = 0
+        # Chunks of one long text are synthesized in parallel on their own pool
+        self._chunk_pool = ThreadPoolExecutor(max_workers=chunk_workers, thread_name_prefix='tts-chunk')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._remove_partial_files()
+        self.cache.start()
+
+    def audio_path(self, filename: str) -> str:
+        return os.path.join(self.cache_dir, filename)
+
+    def synthesize(self, text: str, lang: str = 'vi') -> bytes:
+        """Synthesize text in the calling thread"""
+        return self.backend.synthesize(text, lang)
+
+    def synthesize_to_file(self, text: str, lang: str = 'vi') -> Dict[str, Any]:
+        """Synthesize text into the audio cache unless it is already there.
+
+        Long text is synthesized sentence chunk by chunk (see synthesize_chunks).
+        Concurrent calls for the same content share a single synthesis.
+        """
+        filename = audio_filename(text)
+        path = self.audio_path(filename)
+
+        entry = self.cache.lookup(filename)
+        if entry:
+            return {"filename": filename, "size": entry['size'], "cached": True}
+
+        flight, leader = self._join_flight(filename)
+        if not leader:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return dict(flight.result)
+
+        try:
+            # A previous leader may have published the file between our cache.lookup()
+            # above and taking the flight - re-check the in-memory index before synthesizing
+            entry = self.cache.lookup(filename) if self.cache.contains(filename) else None
+            if entry:
+                flight.result = {"filename": filename, "size": entry['size'], "cached": True}
+                return dict(flight.result)
+
+            started = time.perf_counter()
+            audio = self.synthesize_chunks(text, lang)
+            flight.result = self._publish(filename, audio, lang, text, started)
+            return dict(flight.result)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            self._land_flight(filename, flight)
+
+    def _join_flight(self, filename: str):
+        """Return (flight, leader): lead a new synthesis of filename or wait on the running one"""
+        with self._inflight_lock:
+            flight = self._inflight.get(filename)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[filename] = _Flight()
+            else:
+                self.coalesced += 1
+        return flight, leader
+
+    def _land_flight(self, filename: str, flight: _Flight):
+        with self._inflight_lock:
+            del self._inflight[filename]
+        flight.done.set()
+
+    def _publish(self, filename: str, audio: bytes, lang: str, text: str, started: float) -> Dict[str, Any]:
+        """Write synthesized audio into the cache and return the flight result"""
+        gen_ms = (time.perf_counter() - started) * 1000
+        self._write_atomic(self.audio_path(filename), audio)
+        self.cache.add(filename, len(audio), lang=lang, text_len=len(text), gen_ms=gen_ms)
+        logger.info("✅ Generated audio %s (%d bytes) in %.0f ms", filename, len(audio), gen_ms)
+        return {"filename": filename, "size": len(audio), "cached": False}
+
+    def synthesize_chunks(self, text: str, lang: str = 'vi') -> bytes:
+        """Synthesize text as sentence chunks in parallel and stitch the audio.
+
+        Every chunk is cached under its own hash, so sentences shared between
+        texts are only synthesized once.
+        """
+        chunks = split_sentences(text)
+        if len(chunks) <= 1:
+            return self.synthesize(text, lang)
+        return stitch_mp3(list(self._chunk_pool.map(lambda chunk: self._chunk_audio(chunk, lang), chunks)))
+
+    def stream(self, text: str, lang: str = 'vi'):
+        """Yield the MP3 audio of text in order, as soon as it is synthesized.
+
+        The first sentence chunk is relayed from the backend as its bytes
+        arrive while the remaining chunks are synthesized in parallel (and
+        cached individually). The stitched audio is published through the
+        same single-flight as synthesize_to_file, so concurrent requests for
+        the same text synthesize it once; the others stream the finished file.
+        """
+        filename = audio_filename(text)
+        flight, leader = self._join_flight(filename)
+        if leader:
+            entry = self.cache.lookup(filename) if self.cache.contains(filename) else None
+            if entry is None:
+                yield from self._stream_as_leader(text, lang, filename, flight)
+                return
+            flight.result = {"filename": filename, "size": entry['size'], "cached": True}
+            self._land_flight(filename, flight)
+        else:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+
+        try:
+            with open(self.audio_path(filename), 'rb') as f:
+                yield from iter(lambda: f.read(STREAM_READ_SIZE), b'')
+        except FileNotFoundError:
+            # Evicted in the meantime
+            yield self.synthesize(text, lang)
+
+    def _stream_as_leader(self, text: str, lang: str, filename: str, flight: _Flight):
+        started = time.perf_counter()
+        chunks = split_sentences(text)
+        rest = [self._chunk_pool.submit(self._chunk_audio, chunk, lang) for chunk in chunks[1:]]
+        first = self._synthesize_stream(chunks[0], lang)
+        first_parts = []
+        try:
+            try:
+                for piece in first:
+                    first_parts.append(piece)
+                    yield piece
+                for future in rest:
+                    yield _strip_id3(future.result())
+            except GeneratorExit:
+                # The client went away - finish anyway, other requests may wait on this flight
+                first_parts.extend(first)
+
+            first_audio = b''.join(first_parts)
+            if rest and not self.cache.contains(audio_filename(chunks[0])):
+                self._publish(audio_filename(chunks[0]), first_audio, lang, chunks[0], started)
+            audio = stitch_mp3([first_audio] + [future.result() for future in rest])
+            flight.result = self._publish(filename, audio, lang, text, started)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            self._land_flight(filename, flight)
+
+    def _synthesize_stream(self, text: str, lang: str):
+        """Yield audio pieces from the backend, or the whole clip if it cannot stream"""
+        synthesize_stream = getattr(self.backend, 'synthesize_stream', None)
+        if synthesize_stream is None:
+            yield self.synthesize(text, lang)
+        else:
+            yield from synthesize_stream(text, lang)
+
+    def _chunk_audio(self, chunk: str, lang: str) -> bytes:
+        result = self.synthesize_to_file(chunk, lang)
+        try:
+            with open(self.audio_path(result['filename']), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            # Evicted in the meantime
+            return self.synthesize(chunk, lang)
+
+    def submit_playlist(self, text: str, lang: str = 'vi') -> TTSJob:
+        """Queue the sentence chunks of text as an ordered job.
+
+        Each chunk becomes one section of the job, so a client can start
+        playing the first chunk as soon as it is done.
+        """
+        chunks = split_sentences(text)
+        return self.submit([{"title": str(index), "content": chunk} for index, chunk in enumerate(chunks)], lang)
+
+    def _write_atomic(self, path: str, data: bytes):
+        # Write to a temp file and rename so /api/tts/get never serves a partial mp3
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _remove_partial_files(self):
+        # Temp files left behind by a crash mid-write
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.tmp'):
+                try:
+                    os.remove(self.audio_path(filename))
+                except OSError:
+                    pass
+
+    def submit(self, sections: List[Dict[str, Any]], lang: str = 'vi') -> TTSJob:
+        """Queue sections ({title, content}) for background synthesis.
+
+        Sections whose audio is already cached are resolved immediately and
+        never take a queue slot. Raises TTSQueueFull if the remaining sections
+        do not fit in the queue.
+        """
+        job_sections = []
+        for section in sections:
+            content = (section.get('content') or '').strip()
+            if not content:
+                continue
+
+            filename = audio_filename(content)
+            job_section = {
+                "title": section.get('title', ''),
+                "filename": filename,
+                "status": SECTION_QUEUED
+            }
+            # Misses are counted by the worker that synthesizes the section
+            entry = self.cache.lookup(filename) if self.cache.contains(filename) else None
+            if entry:
+                job_section.update(status=SECTION_CACHED, size=entry['size'], cached=True)
+            job_sections.append((job_section, content))
+
+        job = TTSJob([job_section for job_section, _ in job_sections], lang)
+        pending = [(index, content) for index, (job_section, content) in enumerate(job_sections)
+                   if job_section['status'] == SECTION_QUEUED]
+
+        with self._lock:
+            if self._tasks.maxsize - self._tasks.qsize() < len(pending):
+                raise TTSQueueFull("TTS queue is full, please retry later")
+            self._start_workers()
+            for index, content in pending:
+                self._tasks.put_nowait((job, index, content))
+            self._remember(job)
+
+        return job
+
+    def get_job(self, job_id: str) -> Optional[TTSJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[TTSJob]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "backend": self.backend.name,
+            "workers": self.worker_count,
+            "queue_depth": self._tasks.qsize(),
+            "queue_capacity": self._tasks.maxsize,
+            "jobs": len(jobs),
+            "active_jobs": sum(1 for job in jobs if job.finished_at is None),
+            "in_flight": len(self._inflight),
+            "coalesced": self.coalesced
+        }
+
+    def _remember(self, job: TTSJob):
+        # Keep the most recent jobs so clients can poll for their progress
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+
+    def _start_workers(self):
+        while len(self._workers) < self.worker_count:
+            worker = threading.Thread(target=self._run_worker, daemon=True,
+                                      name=f'tts-worker-{len(self._workers) + 1}')
+            worker.start()
+            self._workers.append(worker)
+
+    def _run_worker(self):
+        while True:
+            job, index, content = self._tasks.get()
+            try:
+                job.update_section(index, status=SECTION_RUNNING)
+                result = self.synthesize_to_file(content, job.lang)
+                job.update_section(index, status=SECTION_DONE if not result['cached'] else SECTION_CACHED,
+                                   size=result['size'], cached=result['cached'])
+            except Exception as e:
+                logger.error("❌ Error generating audio for '%s': %s", job.sections[index]['title'], e)
+                job.update_section(index, status=SECTION_FAILED, error=str(e))
+            finally:
+                self._tasks.task_done()